@@ -0,0 +1,816 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import tempfile
+import random
+import sys
+import re
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, List
+
+from concurrent.futures import ThreadPoolExecutor
+
+from corrector_metrics import CorrectorMetrics
+from query_builder import ConnectionPool, QueryBuilder, StatementCache
+from sanitize_pipeline import NdjsonWriter, read_ndjson, run_pipeline
+from schema_corrector import ArrayRule, ObjectRule, SchemaCorrector
+from sql_injection_corrector import FieldRule, ResultCache, SQLInjectionCorrector, compile_whitelist
+
+
+# Reglas típicas de los formularios de la API de productos
+BENCH_RULES = [
+    FieldRule("username", "string", max_length=30, allowed_pattern=re.compile(r"[a-zA-Z0-9_]")),
+    FieldRule("search", "string", max_length=100),
+    FieldRule("category", "string", max_length=40, required=False),
+    FieldRule("description", "string", max_length=500, allowed_pattern=re.compile(r"[\w\s.,:()¿?¡!-]")),
+    FieldRule("email", "email", max_length=120, allowed_pattern=re.compile(r"[a-zA-Z0-9_@.+-]")),
+    FieldRule("age", "int"),
+    FieldRule("page", "int", required=False),
+]
+
+CLEAN_VALUES = {
+    "username": ["maria_88", "jperez", "ana", "  luis  ", "Carlos2024"],
+    "search": ["laptop", "teclado mecánico", "monitor 27 pulgadas", "mouse", "  silla "],
+    "category": ["electronica", "hogar", "oficina", None],
+    "description": ["Producto en buen estado, poco uso.", "Envío gratis (solo hoy)!", "Garantía: 12 meses"],
+    "email": ["ana@example.com", "j.perez@correo.mx", " luis@test.org "],
+    "age": ["25", 31, "40", " 19 "],
+    "page": ["1", "2", None],
+}
+
+INJECTION_VALUES = [
+    "' OR '1'='1", "laptop'--", "1; DROP TABLE products", "x' UNION SELECT null,null--",
+    "admin'/*", "sel;ect * from users", "abc", "  ",
+]
+
+
+@dataclass
+class LegacyResult:
+    """CorrectionResult original: dataclass con la lista de mensajes ya armada."""
+    field: str
+    is_valid: bool
+    original_value: Any
+    sanitized_value: Any
+    changes_made: bool
+    messages: List[str]
+
+
+class LegacyCorrector(SQLInjectionCorrector):
+    """
+    Implementación original (sin compilar): decide el tipo en cada llamada y
+    hace search + sub por cada patrón. Sirve de referencia para comprobar
+    que los resultados no cambian.
+    """
+
+    def sanitize_parameters(self, params):
+        results = {}
+        for field_name, rule in self.field_rules.items():
+            original_value = params.get(field_name, None)
+            if original_value is None:
+                message = "Campo requerido ausente." if rule.required else "Campo opcional ausente."
+                results[field_name] = LegacyResult(field=field_name, is_valid=not rule.required,
+                                                       original_value=None, sanitized_value=None,
+                                                       changes_made=False, messages=[message])
+                continue
+            if rule.field_type == "int":
+                results[field_name] = self._legacy_int(field_name, original_value)
+            elif rule.field_type == "email":
+                results[field_name] = self._legacy_email(field_name, original_value, rule)
+            else:
+                results[field_name] = self._legacy_string(field_name, original_value, rule)
+        for extra_field in params.keys() - self.field_rules.keys():
+            value = params[extra_field]
+            message = "Campo no definido en reglas; no se aplicó sanitización específica."
+            results[extra_field] = LegacyResult(field=extra_field, is_valid=True, original_value=value,
+                                                    sanitized_value=value, changes_made=False,
+                                                    messages=[message])
+        return results
+
+    def _legacy_string(self, field, value, rule):
+        messages = []
+        changes_made = False
+        s = str(value)
+        original = s
+        s = s.strip()
+        if s != original:
+            changes_made = True
+            messages.append("Se recortaron espacios al inicio/fin.")
+        if self._sql_meta_pattern.search(s):
+            s = self._sql_meta_pattern.sub("", s)
+            changes_made = True
+            messages.append("Se eliminaron secuencias típicas de SQL (--, /*, */, ;).")
+        if self._sql_keywords_pattern.search(s):
+            s = self._sql_keywords_pattern.sub("", s)
+            changes_made = True
+            messages.append("Se eliminaron palabras clave SQL sospechosas (UNION, SELECT, DROP, etc.).")
+        if rule.max_length is not None and len(s) > rule.max_length:
+            s = s[:rule.max_length]
+            changes_made = True
+            messages.append(f"Se recortó a {rule.max_length} caracteres.")
+        if rule.allowed_pattern is not None:
+            filtered = "".join(ch for ch in s if rule.allowed_pattern.match(ch))
+            if filtered != s:
+                s = filtered
+                changes_made = True
+                messages.append("Se eliminaron caracteres no permitidos por el patrón del campo.")
+        is_valid = True
+        if rule.required and s == "":
+            is_valid = False
+            messages.append("Tras la sanitización el valor quedó vacío en un campo requerido.")
+        return LegacyResult(field=field, is_valid=is_valid, original_value=original,
+                                sanitized_value=s, changes_made=changes_made, messages=messages)
+
+    def _legacy_int(self, field, value):
+        try:
+            ivalue = int(str(value).strip())
+        except ValueError:
+            return LegacyResult(field=field, is_valid=False, original_value=value,
+                                    sanitized_value=None, changes_made=False,
+                                    messages=["No se pudo convertir el valor a entero."])
+        return LegacyResult(field=field, is_valid=True, original_value=value,
+                                sanitized_value=ivalue, changes_made=False, messages=[])
+
+    def _legacy_email(self, field, value, rule):
+        messages = []
+        changes_made = False
+        s = str(value).strip()
+        original = s
+        if rule.max_length is not None and len(s) > rule.max_length:
+            s = s[:rule.max_length]
+            changes_made = True
+            messages.append(f"Se recortó el correo a {rule.max_length} caracteres.")
+        if not self._email_pattern.match(s):
+            return LegacyResult(field=field, is_valid=False, original_value=original,
+                                    sanitized_value=None, changes_made=changes_made,
+                                    messages=messages + ["Formato de correo inválido."])
+        if rule.allowed_pattern is not None:
+            filtered = "".join(ch for ch in s if rule.allowed_pattern.match(ch))
+            if filtered != s:
+                s = filtered
+                changes_made = True
+                messages.append("Se eliminaron caracteres no permitidos en el correo.")
+        return LegacyResult(field=field, is_valid=True, original_value=original,
+                                sanitized_value=s, changes_made=changes_made, messages=messages)
+
+
+def generate_requests(count, injection_rate=0.05, seed=1234):
+    """Formularios sintéticos: mayoría de valores limpios, algunos ataques y campos extra."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        params = {}
+        for name, values in CLEAN_VALUES.items():
+            value = rng.choice(INJECTION_VALUES) if rng.random() < injection_rate else rng.choice(values)
+            if value is not None:
+                params[name] = value
+        if rng.random() < 0.1:
+            params["utm_source"] = "newsletter"
+        requests.append(params)
+    return requests
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def throughput(correctors, requests, repeat=5):
+    """
+    Solicitudes/s de cada corrector (mejor de repeat corridas), sin retener
+    resultados. Las corridas se intercalan para que el ruido de la máquina
+    afecte a todos por igual.
+    """
+    best = [float("inf")] * len(correctors)
+    for _ in range(repeat):
+        for k, corrector in enumerate(correctors):
+            sanitize = corrector.sanitize_parameters
+            start = time.perf_counter()
+            for params in requests:
+                sanitize(params)
+            best[k] = min(best[k], time.perf_counter() - start)
+    return [len(requests) / elapsed for elapsed in best]
+
+
+def as_dicts(results):
+    return {name: asdict(r) if isinstance(r, LegacyResult) else r.to_dict() for name, r in results.items()}
+
+
+def same_results(reference, candidate, requests):
+    return all(
+        as_dicts(reference.sanitize_parameters(params)) == as_dicts(candidate.sanitize_parameters(params))
+        for params in requests
+    )
+
+
+def bench_plans(args):
+    requests = generate_requests(args.requests, args.injection_rate)
+    legacy = LegacyCorrector(BENCH_RULES)
+    compiled = SQLInjectionCorrector(BENCH_RULES)
+
+    if not same_results(legacy, compiled, requests):
+        print("❌ Los CorrectionResult NO coinciden con la implementación original")
+        return
+
+    before, after = throughput([legacy, compiled], requests)
+    print(f"Solicitudes: {len(requests):,} ({len(BENCH_RULES)} reglas, "
+          f"{args.injection_rate:.0%} de valores maliciosos)")
+    print("Resultados idénticos a la implementación original")
+    print(f"Antes:   {before:12,.0f} solicitudes/s por núcleo")
+    print(f"Después: {after:12,.0f} solicitudes/s por núcleo")
+    print(f"Aceleración: x{after / before:.2f}")
+
+
+# Textos para el filtro de caracteres permitidos: solo ASCII y con acentos
+WHITELIST_TEXTS = {
+    "ascii": "Envio gratis (solo hoy)! Producto en buen estado; poco uso -- ver fotos. ",
+    "español": "Envío gratis (¡solo hoy!). Producto en buen estado; poco uso — ver fotos. ",
+}
+
+WHITELIST_PATTERNS = {
+    "clase": re.compile(r"[\w\s.,:()¿?¡!-]"),
+    "clase+": re.compile(r"[a-zA-Z0-9_@\.]+"),
+    "alternativa": re.compile(r"\w|\s|[.,]"),
+}
+
+
+def bench_whitelist(args):
+    sizes = [int(n) for n in args.sizes.split(",")]
+    print(f"{'patrón':<12} {'texto':<8} {'bytes':>9} {'antes (MB/s)':>13} {'después (MB/s)':>15} {'x':>7}")
+    for pattern_name, pattern in WHITELIST_PATTERNS.items():
+        fast = compile_whitelist(pattern)
+        match = pattern.match
+        for text_name, unit in WHITELIST_TEXTS.items():
+            for size in sizes:
+                text = (unit * (size // len(unit) + 1))[:size]
+                before, t_before = timed(lambda s: "".join(ch for ch in s if match(ch)), text)
+                after, t_after = timed(fast, text)
+                if before != after:
+                    print(f"❌ Resultados distintos en {pattern_name}/{text_name}/{size}")
+                    return
+                mb = len(text.encode("utf-8")) / (1024 * 1024)
+                print(f"{pattern_name:<12} {text_name:<8} {size:>9} {mb / t_before:>13,.1f} "
+                      f"{mb / t_after:>15,.1f} {t_before / t_after:>7,.1f}")
+
+
+def bench_batch(args):
+    records = generate_requests(args.rows, args.injection_rate)
+    corrector = SQLInjectionCorrector(BENCH_RULES)
+    names = [rule.name for rule in BENCH_RULES]
+    columns = {name: [record.get(name) for record in records] for name in names}
+
+    # Equivalencia con sanitize_parameters en una muestra de filas
+    batch = corrector.sanitize_batch(records)
+    for i in range(0, len(records), max(1, len(records) // 2000)):
+        expected = corrector.sanitize_parameters(records[i])
+        if any(batch[name].result(i) != expected[name] for name in names):
+            print(f"❌ La fila {i} no coincide con sanitize_parameters")
+            return
+
+    legacy = LegacyCorrector(BENCH_RULES).sanitize_parameters
+    _, t_legacy = timed(lambda rs: [legacy(r) for r in rs], records)
+    sanitize = corrector.sanitize_parameters
+    _, t_rows = timed(lambda rs: [sanitize(r) for r in rs], records)
+    _, t_batch = timed(corrector.sanitize_batch, records)
+    _, t_columns = timed(corrector.sanitize_columns, columns)
+
+    print(f"Filas: {len(records):,} ({len(BENCH_RULES)} campos, {args.injection_rate:.0%} de valores maliciosos)")
+    print("Resultados idénticos a sanitize_parameters (muestra)")
+    print("Aceleración respecto de sanitize_parameters (y de la implementación original)")
+    print(f"original por fila:            {len(records) / t_legacy:12,.0f} filas/s")
+    print(f"sanitize_parameters por fila: {len(records) / t_rows:12,.0f} filas/s  x1.0 (x{t_legacy / t_rows:.1f})")
+    print(f"sanitize_batch (registros):   {len(records) / t_batch:12,.0f} filas/s  "
+          f"x{t_rows / t_batch:.1f} (x{t_legacy / t_batch:.1f})")
+    print(f"sanitize_columns (columnas):  {len(records) / t_columns:12,.0f} filas/s  "
+          f"x{t_rows / t_columns:.1f} (x{t_legacy / t_columns:.1f})")
+
+
+def unique_requests(count, seed=1234):
+    """Peor caso para la caché: ningún valor se repite."""
+    rng = random.Random(seed)
+    return [
+        {"username": f"user_{i}", "search": f"busqueda {rng.random()}", "category": f"cat{i}",
+         "description": f"Producto {i} en buen estado", "email": f"u{i}@example.com", "age": str(i % 90)}
+        for i in range(count)
+    ]
+
+
+def bench_cache(args):
+    cache = ResultCache(max_entries=args.max_entries)
+    plain = SQLInjectionCorrector(BENCH_RULES)
+    cached = SQLInjectionCorrector(BENCH_RULES, cache=cache)
+
+    scenarios = [("repetidos", generate_requests(args.requests, args.injection_rate)),
+                 ("únicos", unique_requests(args.requests))]
+    for name, requests in scenarios:
+        if not same_results(plain, cached, requests):
+            print(f"❌ Con caché los resultados cambian ({name})")
+            return
+        # Las entradas no deben poder corromperse desde afuera
+        for result in cached.sanitize_parameters(requests[0]).values():
+            result.messages.append("modificado")
+        if not same_results(plain, cached, requests[:1]):
+            print("❌ Modificar un resultado alteró la caché")
+            return
+
+        cache.clear()
+        cache.hits = cache.misses = cache.evictions = 0
+        before, after = throughput([plain, cached], requests)
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        print(f"Valores {name}: {len(requests):,} solicitudes")
+        print(f"  sin caché: {before:12,.0f} solicitudes/s")
+        print(f"  con caché: {after:12,.0f} solicitudes/s  x{after / before:.2f}")
+        print(f"  aciertos {stats['hits'] / lookups:.1%}, desalojos {stats['evictions']:,}, "
+              f"{stats['entries']:,} entradas (~{stats['bytes'] / 1024:,.0f} KiB)")
+
+    # Varios hilos sobre la misma caché: los contadores deben cuadrar
+    requests = generate_requests(args.requests, args.injection_rate)
+    cache.clear()
+    cache.hits = cache.misses = 0
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(cached.sanitize_parameters, requests, chunksize=256))
+    lookups = sum(1 for params in requests for name in ("username", "search", "category", "description", "email")
+                  if isinstance(params.get(name), str) and len(params[name]) <= cache.max_value_length)
+    status = "OK" if cache.hits + cache.misses == lookups else "❌ contadores inconsistentes"
+    print(f"{args.threads} hilos: {cache.hits + cache.misses:,} consultas, {status}")
+
+
+def retained_memory(corrector, requests):
+    """
+    (bytes, bloques) que quedan asignados al conservar los resultados de
+    todas las solicitudes; los bloques cuentan los objetos creados por el
+    corrector que sobreviven a la llamada.
+    """
+    sanitize = corrector.sanitize_parameters
+    sanitize(requests[0])
+    gc.collect()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    kept = [sanitize(params) for params in requests]
+    blocks = sys.getallocatedblocks() - blocks_before
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # La lista kept no es parte del costo de los resultados
+    size -= sys.getsizeof(kept)
+    del kept
+    return size, blocks
+
+
+def bench_memory(args):
+    requests = generate_requests(args.requests, args.injection_rate)
+    fields = sum(len(SQLInjectionCorrector(BENCH_RULES).sanitize_parameters(params)) for params in requests)
+
+    print(f"Solicitudes: {len(requests):,} ({fields:,} resultados)")
+    print(f"{'':<24} {'bytes/resultado':>16} {'bytes/llamada':>14} {'objetos/llamada':>16}")
+    rows = [("original (dataclass)", LegacyCorrector(BENCH_RULES)),
+            ("compacto", SQLInjectionCorrector(BENCH_RULES)),
+            ("compacto + caché", SQLInjectionCorrector(BENCH_RULES, cache=ResultCache()))]
+    for name, corrector in rows:
+        size, blocks = retained_memory(corrector, requests)
+        print(f"{name:<24} {size / fields:>16,.0f} {size / len(requests):>14,.0f} "
+              f"{blocks / len(requests):>16,.1f}")
+
+
+def latencies(fn, requests):
+    """Latencia de cada llamada en microsegundos (perf_counter_ns)."""
+    clock = time.perf_counter_ns
+    samples = []
+    for params in requests:
+        start = clock()
+        fn(params)
+        samples.append((clock() - start) / 1000)
+    samples.sort()
+    return samples
+
+
+def bench_validate(args):
+    corrector = SQLInjectionCorrector(BENCH_RULES)
+    requests = generate_requests(args.requests, args.injection_rate)
+
+    # El veredicto debe coincidir con el primer campo inválido o modificado
+    for params in requests:
+        results = corrector.sanitize_parameters(params)
+        expected = next((rule.name for rule in BENCH_RULES
+                         if not results[rule.name].is_valid or results[rule.name].changes_made), None)
+        verdict = corrector.validate_parameters(params)
+        if verdict.field != expected or verdict.ok != (expected is None):
+            print(f"❌ Veredicto distinto de sanitize_parameters: {params}")
+            return
+
+    clean = [params for params in requests if corrector.validate_parameters(params).ok]
+    validate = corrector.validate_parameters
+
+    # Memoria transitoria por llamada sobre solicitudes limpias. validate no
+    # crea objetos: lo que queda es el buffer interno de la regex (C), que se
+    # libera al terminar cada búsqueda.
+    tracemalloc.start()
+    for name, fn in (("sanitize_parameters", corrector.sanitize_parameters), ("validate_parameters", validate)):
+        peaks = []
+        for params in clean[:1000]:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn(params)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        print(f"{name}: pico de memoria transitoria {sum(peaks) / len(peaks):,.0f} bytes/llamada")
+    tracemalloc.stop()
+
+    print(f"Solicitudes: {len(requests):,} ({len(clean):,} limpias, {args.injection_rate:.0%} de valores maliciosos)")
+    print(f"{'':<30} {'sol/s':>10} {'p50 (µs)':>9} {'p99 (µs)':>9} {'p99.9 (µs)':>11}")
+    for name, fn, sample in (("sanitize_parameters", corrector.sanitize_parameters, requests),
+                             ("validate_parameters", validate, requests),
+                             ("sanitize_parameters (limpias)", corrector.sanitize_parameters, clean),
+                             ("validate_parameters (limpias)", validate, clean)):
+        best = min(timed(lambda rs: [fn(r) for r in rs], sample)[1] for _ in range(3))
+        lat = latencies(fn, sample)
+        print(f"{name:<30} {len(sample) / best:>10,.0f} {lat[len(lat) // 2]:>9.2f} "
+              f"{lat[int(len(lat) * 0.99)]:>9.2f} {lat[int(len(lat) * 0.999)]:>11.2f}")
+
+
+# Pedido con cliente e ítems: el caso típico de los cuerpos JSON de la API
+ITEM_RULES = [
+    FieldRule("sku", "string", max_length=20, allowed_pattern=re.compile(r"[A-Z0-9-]")),
+    FieldRule("name", "string", max_length=80),
+    FieldRule("qty", "int"),
+    FieldRule("comment", "string", max_length=200, required=False),
+]
+CUSTOMER_RULES = [
+    FieldRule("name", "string", max_length=60),
+    FieldRule("email", "email", max_length=120, allowed_pattern=re.compile(r"[a-zA-Z0-9_@.+-]")),
+]
+ORDER_SCHEMA = [
+    FieldRule("order_id", "int"),
+    ObjectRule("customer", CUSTOMER_RULES),
+    ArrayRule("items", ObjectRule("item", ITEM_RULES)),
+    ObjectRule("shipping", [FieldRule("address", "string", max_length=200)], required=False),
+]
+
+
+def generate_order(items, injection_rate=0.05, seed=1234):
+    rng = random.Random(seed)
+
+    def text(values):
+        return rng.choice(INJECTION_VALUES) if rng.random() < injection_rate else rng.choice(values)
+
+    return {
+        "order_id": "1001",
+        "customer": {"name": text(["Ana López", "Luis"]), "email": text(CLEAN_VALUES["email"])},
+        "items": [
+            {"sku": text(["AB-100", "X-2", "kb-9"]), "name": text(CLEAN_VALUES["search"]),
+             "qty": text(["1", "2", " 3 "]), **({"comment": text(["regalo", "sin bolsa"])} if i % 3 == 0 else {})}
+            for i in range(items)
+        ],
+    }
+
+
+def flatten_by_hand(order, top, customer, item):
+    """Lo que había que escribir antes: un corrector plano por nivel y rutas armadas a mano."""
+    results = top.sanitize_parameters(order)
+    # Los sub-objetos no son campos extra del nivel superior
+    del results["customer"], results["items"]
+    for name, result in customer.sanitize_parameters(order.get("customer") or {}).items():
+        results["customer." + name] = result._replace(field="customer." + name)
+    for i, params in enumerate(order.get("items") or []):
+        prefix = f"items[{i}]."
+        for name, result in item.sanitize_parameters(params).items():
+            results[prefix + name] = result._replace(field=prefix + name)
+    return results
+
+
+def bench_schema(args):
+    schema = SchemaCorrector(ORDER_SCHEMA)
+    top = SQLInjectionCorrector([FieldRule("order_id", "int")])
+    customer = SQLInjectionCorrector(CUSTOMER_RULES)
+    item = SQLInjectionCorrector(ITEM_RULES)
+
+    print(f"{'ítems':>8} {'a mano (ms)':>12} {'esquema (ms)':>13} {'valores/s':>12} {'x':>6}")
+    for size in [int(n) for n in args.items.split(",")]:
+        order = generate_order(size, args.injection_rate)
+        expected = flatten_by_hand(order, top, customer, item)
+        got = schema.sanitize_payload(order).results
+        # El esquema además reporta 'shipping' (opcional ausente)
+        got.pop("shipping")
+        if got != expected:
+            print(f"❌ Los resultados no coinciden con el recorrido a mano ({size} ítems)")
+            return
+        t_hand = min(timed(flatten_by_hand, order, top, customer, item)[1] for _ in range(args.repeat))
+        t_schema = min(timed(schema.sanitize_payload, order)[1] for _ in range(args.repeat))
+        print(f"{size:>8,} {t_hand * 1000:>12.1f} {t_schema * 1000:>13.1f} "
+              f"{len(expected) / t_schema:>12,.0f} {t_hand / t_schema:>6.2f}")
+
+    # Profundidad: un recorrido recursivo agotaría el límite de recursión
+    depth = args.depth
+    rule, payload = FieldRule("value", "string"), {"value": "hoja; DROP"}
+    for _ in range(depth):
+        rule, payload = ObjectRule("child", [rule]), {"child": payload}
+    deep = SchemaCorrector([rule])
+    result, elapsed = timed(deep.sanitize_payload, payload)
+    leaf = next(path for path in result.results if path.endswith("value"))
+    print(f"Profundidad {depth:,} (límite de recursión {sys.getrecursionlimit():,}): "
+          f"{elapsed * 1000:.1f} ms, hoja → {result.results[leaf].sanitized_value!r}")
+
+
+def write_export(path, records, injection_rate, seed=1234):
+    """Export NDJSON sintético: los formularios de generate_requests, repetidos hasta llegar a records."""
+    base = generate_requests(min(records, 100000), injection_rate, seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(records):
+            f.write(json.dumps(base[i % len(base)], ensure_ascii=False) + "\n")
+
+
+def vm_hwm_mb():
+    """Pico de memoria residente del proceso en MB (VmHWM, solo Linux; None si no hay /proc)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _run_stream(path, jobs, chunk_size, queue):
+    baseline = vm_hwm_mb()
+    with open(path, encoding='utf-8') as src, open(os.devnull, 'w', encoding='utf-8') as out:
+        stats, elapsed = timed(run_pipeline, read_ndjson(src), BENCH_RULES, NdjsonWriter(out), None, jobs, chunk_size)
+    peak = vm_hwm_mb()
+    queue.put((stats, elapsed, None if baseline is None else peak - baseline))
+
+
+def bench_stream(args):
+    # Cada corrida en un proceso nuevo: el pico de memoria no incluye la
+    # generación del export ni corridas anteriores (los workers no cuentan).
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'registros':>10} {'MB':>6} {'procesos':>9} {'registros/s':>12} {'memoria (MB)':>13} {'rechazados':>11}")
+        for records in [int(n) for n in args.records.split(",")]:
+            path = os.path.join(tmp, f"export-{records}.ndjson")
+            write_export(path, records, args.injection_rate)
+            size_mb = os.path.getsize(path) / 2 ** 20
+            for jobs in [int(n) for n in args.jobs.split(",")]:
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_stream, args=(path, jobs, args.chunk_size, queue))
+                proc.start()
+                stats, elapsed, memory = queue.get()
+                proc.join()
+                memory = "?" if memory is None else f"+{memory:.1f}"
+                print(f"{records:>10,} {size_mb:>6.0f} {jobs:>9} {stats['read'] / elapsed:>12,.0f} {memory:>13} "
+                      f"{stats['rejected']:>11,}")
+    print(f"Núcleos disponibles: {os.cpu_count()}")
+
+
+def bench_metrics(args):
+    requests = generate_requests(args.requests, args.injection_rate)
+    configs = [("sin métricas", None)] + [
+        (f"muestreo {rate:g}", CorrectorMetrics(sample_rate=rate)) for rate in (1.0, 0.1, 0.01)
+    ]
+    correctors = [SQLInjectionCorrector(BENCH_RULES, metrics=metrics) for _, metrics in configs]
+    for corrector in correctors[1:]:
+        if not same_results(correctors[0], corrector, requests[:5000]):
+            print("❌ Con métricas los resultados cambian")
+            return
+
+    rates = throughput(correctors, requests)
+    print(f"Solicitudes: {len(requests):,}")
+    for (name, _), rate in zip(configs, rates):
+        print(f"  {name:<14} {rate:12,.0f} solicitudes/s  costo {1 - rate / rates[0]:6.1%}")
+
+    metrics = configs[2][1].to_dict()
+    print("Campo        cambios  rechazos  keywords  p50 aprox. (µs)")
+    for name, field in metrics["fields"].items():
+        buckets = field["latency"]["buckets"]
+        half = field["latency"]["count"] / 2
+        p50 = next((le for le, count in buckets.items() if count >= half), "+Inf")
+        p50 = p50 if p50 == "+Inf" else f"≤{float(p50) * 1e6:g}"
+        print(f"  {name:<12} {field['change_rate']:6.1%} {field['reject_rate']:8.1%} "
+              f"{field['steps'].get('keywords', {}).get('fired', 0):>9,} {p50:>12}")
+    if args.prometheus:
+        with open(args.prometheus, 'w', encoding='utf-8') as f:
+            f.write(configs[2][1].to_prometheus())
+        print(f"Métricas en formato Prometheus: {args.prometheus}")
+
+
+# Tabla de populate-db.js y reglas de sus columnas
+PRODUCTS_TABLE = """
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        price REAL NOT NULL,
+        category TEXT NOT NULL,
+        stock INTEGER NOT NULL DEFAULT 0
+    )
+"""
+PRODUCT_RULES = [
+    FieldRule("id", "int", required=False),
+    FieldRule("name", "string", max_length=100),
+    FieldRule("price", "string", max_length=20, allowed_pattern=re.compile(r"[0-9.]")),
+    FieldRule("category", "string", max_length=50),
+    FieldRule("stock", "int"),
+]
+# Parámetros de los endpoints de server-sqlite.js, para el enfoque de sanitizar
+SEARCH_RULES = [
+    FieldRule("id", "int", required=False),
+    FieldRule("name", "string", max_length=100, required=False),
+    FieldRule("category", "string", max_length=50, required=False),
+    FieldRule("minPrice", "int", required=False),
+    FieldRule("maxPrice", "int", required=False),
+]
+PRODUCT_CATEGORIES = ["Electrónica", "Hogar", "Deportes", "Libros", "Juguetes", "Ropa", "Oficina", "Jardín"]
+PRODUCT_WORDS = ["Laptop", "Mouse", "Teclado", "Monitor", "Silla", "Lámpara", "Balón", "Novela", "Cafetera"]
+
+
+def create_products(pool, count, seed=1234):
+    rng = random.Random(seed)
+    with pool.connection() as conn:
+        conn.execute(PRODUCTS_TABLE)
+        conn.execute("CREATE INDEX products_category ON products (category)")
+        conn.executemany(
+            "INSERT INTO products (name, price, category, stock) VALUES (?, ?, ?, ?)",
+            [(f"{rng.choice(PRODUCT_WORDS)} {i}", round(rng.uniform(5, 2000), 2),
+              rng.choice(PRODUCT_CATEGORIES), rng.randrange(100)) for i in range(count)],
+        )
+        conn.commit()
+
+
+def generate_queries(count, products, seed=1234):
+    """
+    Parámetros de los GET/POST de búsqueda de la API, por tipo: por id,
+    por categoría (con LIMIT, como una página), por nombre y búsqueda avanzada.
+    """
+    rng = random.Random(seed)
+    kinds = {"id": [], "categoría": [], "nombre": [], "avanzada": []}
+    for _ in range(count):
+        kind = rng.choice(list(kinds))
+        if kind == "id":
+            params = {"id": rng.randrange(1, products + 1)}
+        elif kind == "categoría":
+            params = {"category": rng.choice(PRODUCT_CATEGORIES), "limit": 20}
+        elif kind == "nombre":
+            params = {"name": f"{rng.choice(PRODUCT_WORDS)} {rng.randrange(products // 10)}"}
+        else:
+            low = rng.randrange(0, 1500)
+            params = {"name": rng.choice(PRODUCT_WORDS), "minPrice": low, "maxPrice": low + 200,
+                      "category": rng.choice(PRODUCT_CATEGORIES)}
+        kinds[kind].append(params)
+    return kinds
+
+
+def interpolated_query(corrector, conn, params):
+    """Como server-sqlite.js, pero con los valores sanitizados antes de armar el SQL."""
+    values = {name: result.sanitized_value for name, result in corrector.sanitize_parameters(params).items()
+              if result.is_valid and result.sanitized_value is not None}
+    conditions = []
+    if "id" in values:
+        conditions.append(f"id = {values['id']}")
+    if "name" in values:
+        conditions.append("name LIKE '%{}%'".format(values["name"].replace("'", "''")))
+    if "minPrice" in values:
+        conditions.append(f"price >= {values['minPrice']}")
+    if "maxPrice" in values:
+        conditions.append(f"price <= {values['maxPrice']}")
+    if "category" in values:
+        conditions.append("category = '{}'".format(values["category"].replace("'", "''")))
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    limit = f" LIMIT {int(params['limit'])}" if "limit" in params else ""
+    return conn.execute("SELECT * FROM products" + where + limit).fetchall()
+
+
+def builder_query(builder, params):
+    where = {}
+    if "id" in params:
+        where["id"] = params["id"]
+    if "name" in params:
+        where["name"] = ("contains", params["name"])
+    if "minPrice" in params:
+        where["price"] = [(">=", params["minPrice"]), ("<=", params["maxPrice"])]
+    if "category" in params:
+        where["category"] = params["category"]
+    return builder.select(where, limit=params.get("limit"))
+
+
+def bench_queries(args):
+    pool = ConnectionPool(":memory:", size=args.pool_size)
+    create_products(pool, args.products)
+    queries = generate_queries(args.queries, args.products)
+
+    corrector = SQLInjectionCorrector(SEARCH_RULES)
+    cached = QueryBuilder("products", PRODUCT_RULES, pool)
+    # Sin caché de SQL ni de sentencias compiladas: cada consulta se arma y se prepara de nuevo
+    uncached_pool = ConnectionPool(pool.database, size=args.pool_size, statement_cache_size=0, uri=True)
+    uncached = QueryBuilder("products", PRODUCT_RULES, uncached_pool, StatementCache(max_entries=0))
+
+    with pool.connection() as conn:
+        def run_interpolated(batch):
+            return [interpolated_query(corrector, conn, params) for params in batch]
+
+        def run_builder(builder):
+            return lambda batch: [builder_query(builder, params) for params in batch]
+
+        runners = [
+            ("sanitizar + interpolar", run_interpolated),
+            ("parametrizada sin caché", run_builder(uncached)),
+            ("parametrizada con caché", run_builder(cached)),
+        ]
+        for kind, batch in queries.items():
+            reference = run_interpolated(batch[:500])
+            for name, run in runners[1:]:
+                if run(batch[:500]) != reference:
+                    print(f"❌ {name}: resultados distintos en las consultas por {kind}")
+                    return
+
+        # Mejor de repeat corridas por tipo de consulta, intercaladas
+        best = {kind: [float("inf")] * len(runners) for kind in queries}
+        for _ in range(args.repeat):
+            for kind, batch in queries.items():
+                for k, (_, run) in enumerate(runners):
+                    _, elapsed = timed(run, batch)
+                    best[kind][k] = min(best[kind][k], elapsed)
+
+    print(f"Consultas: {args.queries:,} sobre {args.products:,} productos (SQLite en memoria), consultas/s")
+    print(f"{'tipo':<10} " + " ".join(f"{name:>24}" for name, _ in runners))
+    for kind, batch in queries.items():
+        times = best[kind]
+        print(f"{kind:<10} " + " ".join(
+            f"{len(batch) / elapsed:>17,.0f} (x{times[0] / elapsed:.2f})" for elapsed in times))
+    print(f"Caché de SQL: {cached.statements.stats()}")
+    print(f"Pool: {pool.stats()}")
+    uncached_pool.close()
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del corrector de SQL Injection")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_plans = subparsers.add_parser("plans", help="Implementación original vs reglas compiladas")
+    p_plans.add_argument("--requests", type=int, default=100000)
+    p_plans.add_argument("--injection-rate", type=float, default=0.05,
+                         help="Proporción de valores maliciosos")
+    p_plans.set_defaults(func=bench_plans)
+
+    p_whitelist = subparsers.add_parser("whitelist", help="Filtro de caracteres permitidos: por carácter vs en C")
+    p_whitelist.add_argument("--sizes", default="1024,16384,131072,1048576",
+                             help="Largos de texto a probar (caracteres)")
+    p_whitelist.set_defaults(func=bench_whitelist)
+
+    p_batch = subparsers.add_parser("batch", help="Una llamada por fila vs API por columnas")
+    p_batch.add_argument("--rows", type=int, default=200000)
+    p_batch.add_argument("--injection-rate", type=float, default=0.05)
+    p_batch.set_defaults(func=bench_batch)
+
+    p_memory = subparsers.add_parser("memory", help="Memoria y objetos retenidos por resultado")
+    p_memory.add_argument("--requests", type=int, default=50000)
+    p_memory.add_argument("--injection-rate", type=float, default=0.05)
+    p_memory.set_defaults(func=bench_memory)
+
+    p_validate = subparsers.add_parser("validate", help="Solo validar vs sanitizar")
+    p_validate.add_argument("--requests", type=int, default=100000)
+    p_validate.add_argument("--injection-rate", type=float, default=0.05)
+    p_validate.set_defaults(func=bench_validate)
+
+    p_schema = subparsers.add_parser("schema", help="Payload anidado: esquema compilado vs recorrido a mano")
+    p_schema.add_argument("--items", default="100,1000,10000,50000", help="Cantidades de ítems a probar")
+    p_schema.add_argument("--injection-rate", type=float, default=0.05)
+    p_schema.add_argument("--depth", type=int, default=5000, help="Anidamiento del esquema profundo")
+    p_schema.add_argument("--repeat", type=int, default=3)
+    p_schema.set_defaults(func=bench_schema)
+
+    p_stream = subparsers.add_parser("stream", help="Pipeline NDJSON en streaming, en serie y con procesos")
+    p_stream.add_argument("--records", default="100000,400000", help="Tamaños del export a probar")
+    p_stream.add_argument("--jobs", default="1,2,4", help="Cantidades de procesos a probar")
+    p_stream.add_argument("--chunk-size", type=int, default=1000)
+    p_stream.add_argument("--injection-rate", type=float, default=0.05)
+    p_stream.set_defaults(func=bench_stream)
+
+    p_metrics = subparsers.add_parser("metrics", help="Costo de la instrumentación según el muestreo")
+    p_metrics.add_argument("--requests", type=int, default=100000)
+    p_metrics.add_argument("--injection-rate", type=float, default=0.05)
+    p_metrics.add_argument("--prometheus", help="Guardar las métricas (muestreo 0.1) en este archivo")
+    p_metrics.set_defaults(func=bench_metrics)
+
+    p_queries = subparsers.add_parser("queries", help="Consultas parametrizadas vs sanitizar e interpolar")
+    p_queries.add_argument("--queries", type=int, default=50000)
+    p_queries.add_argument("--products", type=int, default=5000)
+    p_queries.add_argument("--pool-size", type=int, default=4)
+    p_queries.add_argument("--repeat", type=int, default=3)
+    p_queries.set_defaults(func=bench_queries)
+
+    p_cache = subparsers.add_parser("cache", help="Con y sin caché LRU de resultados")
+    p_cache.add_argument("--requests", type=int, default=100000)
+    p_cache.add_argument("--injection-rate", type=float, default=0.05)
+    p_cache.add_argument("--max-entries", type=int, default=10000)
+    p_cache.add_argument("--threads", type=int, default=4)
+    p_cache.set_defaults(func=bench_cache)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
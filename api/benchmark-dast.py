@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import os
+import time
+
+from dast_engine import AsyncHttpClient, run_tests
+from dast_payloads import Fuzzer, load_corpus
+from dast_standin import StandInServer
+
+
+def load_dast():
+    """Importa test-dast.py (el guion no se puede importar por nombre)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test-dast.py")
+    spec = importlib.util.spec_from_file_location("test_dast", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_sequential(dast, timeout, mutate):
+    """Como el test-dast.py original: una prueba tras otra, 1 s tras el chequeo y 0,5 s entre pruebas."""
+    async with AsyncHttpClient(timeout=timeout) as http:
+        if not await dast.check_server(http):
+            return False
+        await asyncio.sleep(1)
+        dast.results.clear()
+        fuzzer = Fuzzer(load_corpus(), dast.BASE_URL, concurrency=1, mutate=mutate)
+        for test in dast.build_tests(fuzzer):
+            outcome = (await run_tests([test], http, concurrency=1))[0]
+            if isinstance(outcome.result, dict):
+                dast.results.append(outcome.result)
+            await asyncio.sleep(0.5)
+    return True
+
+
+def scan(dast, mode, args):
+    """Corre un análisis completo sin imprimir; devuelve (segundos, hallazgos)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode is None:
+            ok = asyncio.run(run_sequential(dast, args.timeout, args.mutate))
+        else:
+            concurrency, rate, keep_alive = mode
+            ok = asyncio.run(dast.run_scan(concurrency, rate, args.burst, args.timeout, on_done=None,
+                                           keep_alive=keep_alive, mutate=args.mutate))
+    if not ok:
+        raise RuntimeError("El servidor sustituto no respondió")
+    # Las mediciones de la detección por tiempo cambian de una corrida a otra
+    return time.perf_counter() - start, [{k: v for k, v in result.items() if k != 'timing'} for result in dast.results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo total del DAST: secuencial con pausas vs motor concurrente")
+    parser.add_argument("--latency", default="0.01,0.1,0.3",
+                        help="Demoras por solicitud del servidor sustituto (segundos)")
+    parser.add_argument("--concurrency", default="1,4,8", help="Concurrencias del motor a probar")
+    # Por defecto, los mismos límites que test-dast.py
+    parser.add_argument("--rate", type=float, default=20.0, help="Límite de solicitudes/s del motor")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--mutate", action="store_true", help="Expandir el corpus con sus mutadores")
+    args = parser.parse_args()
+
+    dast = load_dast()
+    levels = [int(n) for n in args.concurrency.split(",")]
+    modes = [("secuencial (original)", None)] + [
+        (f"motor, concurrencia {c}", (c, args.rate, True)) for c in levels
+    ] + [(f"c={levels[-1]} sin keep-alive", (levels[-1], args.rate, False))]
+    reuse = {}
+    print(f"Límite del motor: {args.rate:g} solicitudes/s (ráfaga {args.burst})")
+    print(f"{'demora (s)':>10} " + " ".join(f"{name:>24}" for name, _ in modes))
+    for latency in [float(n) for n in args.latency.split(",")]:
+        with StandInServer(latency=latency) as server:
+            dast.BASE_URL = server.base_url
+            times, reference = [], None
+            for name, mode in modes:
+                elapsed, findings = scan(dast, mode, args)
+                if reference is None:
+                    reference = findings
+                elif findings != reference:
+                    print(f"❌ {name}: hallazgos distintos a los del análisis secuencial")
+                    return
+                times.append(elapsed)
+                if mode is not None:
+                    reuse[mode[2]] = dast.transport["reuse_rate"]
+        print(f"{latency:>10g} " + " ".join(
+            f"{elapsed:>14.2f} s (x{times[0] / elapsed:.1f})" for elapsed in times))
+    print(f"Reuso de conexiones en la última corrida: {reuse[True]:.0%} con keep-alive, {reuse[False]:.0%} sin")
+    fuzzing = dast.fuzzing
+    print(f"Payloads por corrida: {fuzzing['probes']} | respuestas distintas: {fuzzing['unique_responses']} | "
+          f"evaluaciones: {fuzzing['evaluations']} ({fuzzing['cache_hits']} resueltas por hash)")
+    print(f"Hallazgos en cada corrida: {len(reference)} ({sum(r.get('vulnerable', False) for r in reference)} vulnerables)")
+
+
+if __name__ == '__main__':
+    main()
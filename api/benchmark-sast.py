@@ -0,0 +1,421 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no hay getrusage, se omite el pico de RSS
+    resource = None
+
+from sast_engine import DEFAULT_MATCHER, PATTERNS, CompiledMatcher
+from sast_scanner import iter_source_files, scan_files
+from sast_taint import TaintIndex
+
+
+# Líneas de ejemplo tipo Express/SQLite para el corpus sintético
+VULNERABLE_LINES = [
+    "const query = `SELECT * FROM products WHERE name LIKE '%${searchTerm}%'`;\n",
+    "const query = `INSERT INTO products (name) VALUES ('${name}')`;\n",
+    "const query = `UPDATE products SET name = '${name}' WHERE id = ${productId}`;\n",
+    "const query = `DELETE FROM products WHERE id = ${productId}`;\n",
+    "const query = `SELECT * FROM products ORDER BY ${field} ${order}`;\n",
+]
+
+CLEAN_LINES = [
+    "const query = 'SELECT * FROM products ORDER BY id';\n",
+    "  res.json({ success: true, count: result.rows.length, data: result.rows });\n",
+    "  console.error('Error al obtener productos:', error);\n",
+    "  const logEntry = `[${timestamp}] Method: ${method} | IP: ${ip}`;\n",
+    "app.get('/api/products/:id', async (req, res) => {\n",
+    "  try {\n",
+    "  }\n",
+    "\n",
+]
+
+
+def legacy_scan(lines):
+    """Bucle original de detect-sqli.py: seis re.search por línea."""
+    vulnerabilities = []
+    for line_num, line in enumerate(lines, 1):
+        for pattern, description in PATTERNS:
+            if re.search(pattern, line):
+                vulnerabilities.append({
+                    'line': line_num,
+                    'code': line.strip(),
+                    'type': description,
+                    'severity': 'CRITICAL',
+                    'cwe': 'CWE-89'
+                })
+    return vulnerabilities
+
+
+def generate_lines(count, density=0.02, seed=1234):
+    rng = random.Random(seed)
+    return [
+        rng.choice(VULNERABLE_LINES if rng.random() < density else CLEAN_LINES)
+        for _ in range(count)
+    ]
+
+
+def pad_line(line, length):
+    """Alarga la línea hasta length caracteres con un comentario al final."""
+    body = line.rstrip("\n")
+    if len(body) + 4 > length:
+        return line
+    return body + " // " + "x" * (length - len(body) - 4) + "\n"
+
+
+def generate_source(size_bytes, density=0.02, line_length=0, seed=1234):
+    """
+    Genera líneas de un archivo Express/SQLite sintético hasta size_bytes.
+    line_length > 0 rellena cada línea hasta ese largo (sin cambiar qué
+    reglas la detectan), para medir el efecto de las líneas largas.
+    """
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size_bytes:
+        line = rng.choice(VULNERABLE_LINES if rng.random() < density else CLEAN_LINES)
+        if line_length:
+            line = pad_line(line, line_length)
+        lines.append(line)
+        total += len(line.encode("utf-8"))
+    return lines
+
+
+def load_detector():
+    """Importa detect-sqli.py (el guion no se puede importar por nombre)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detect-sqli.py")
+    spec = importlib.util.spec_from_file_location("detect_sqli", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_matcher(args):
+    lines = generate_lines(args.lines, args.density)
+    matcher = CompiledMatcher()
+
+    before, t_before = timed(legacy_scan, lines)
+    after, t_after = timed(lambda ls: list(matcher.scan_lines(ls)), lines)
+
+    if before != after:
+        print("❌ Los hallazgos NO coinciden con el bucle original")
+        return
+
+    print(f"Líneas analizadas: {len(lines)}")
+    print(f"Hallazgos: {len(after)} (idénticos al bucle original)")
+    print(f"Antes:   {len(lines) / t_before:,.0f} líneas/s")
+    print(f"Después: {len(lines) / t_after:,.0f} líneas/s")
+    print(f"Aceleración: x{t_before / t_after:.1f}")
+
+
+# Líneas adversariales: muchos backticks y '${' sin '}' que cierre, lo que
+# obliga a los '.*' de las reglas a probar todas las particiones posibles.
+ADVERSARIAL_UNITS = {
+    "where": "`WHERE ${ ",
+    "select": "`SELECT ${ ` ",
+    "backticks": "`${`",
+}
+
+
+def bench_redos(args):
+    matcher = CompiledMatcher()
+    lengths = [int(n) for n in args.lengths.split(",")]
+
+    print(f"{'caso':<10} {'bytes':>8} {'re.search (ns/B)':>18} {'motor (ns/B)':>14}")
+    for name, unit in ADVERSARIAL_UNITS.items():
+        for length in lengths:
+            line = (unit * (length // len(unit) + 1))[:length] + "\n"
+
+            if length <= args.max_legacy:
+                before, t_before = timed(legacy_scan, [line])
+                legacy = f"{t_before * 1e9 / length:18,.0f}"
+            else:
+                before, legacy = None, f"{'(omitido)':>18}"
+
+            after, t_after = timed(lambda ls: list(matcher.scan_lines(ls)), [line])
+            if before is not None and before != after:
+                print(f"❌ Resultados distintos en {name}/{length}")
+                return
+            print(f"{name:<10} {length:>8} {legacy} {t_after * 1e9 / length:14,.0f}")
+
+
+# Handler Express con SQL armado por concatenación en varias sentencias
+TAINT_HANDLER = """
+app.get('/api/items{i}', async (req, res) => {{
+  const {{ name, order }} = req.query;
+  let query = "SELECT * FROM items{i} WHERE name = '" + name + "'";
+  if (order) {{
+    query += " ORDER BY " + order;
+  }}
+  const result = await db.queryAsync(query);
+  res.json({{ success: true, data: result.rows }});
+}});
+
+function findItem{i}(id) {{
+  const sql = 'SELECT * FROM items{i} WHERE id = ' + id;
+  return db.get(sql);
+}}
+"""
+
+
+def bench_taint(args):
+    print(f"{'handlers':>9} {'KB':>9} {'índice (ms)':>12} {'µs/KB':>8} {'hallazgos':>10}")
+    for handlers in (int(n) for n in args.handlers.split(",")):
+        source = "".join(TAINT_HANDLER.format(i=i) for i in range(handlers))
+        findings, elapsed = timed(lambda s: TaintIndex(s).analyze(), source)
+        size_kb = len(source.encode("utf-8")) / 1024
+        print(f"{handlers:>9} {size_kb:>9,.0f} {elapsed * 1e3:>12,.1f} "
+              f"{elapsed * 1e6 / size_kb:>8,.1f} {len(findings):>10}")
+
+
+def write_corpus(directory, files, lines_per_file, density=0.02, seed=1234, line_length=0):
+    """Crea un árbol de archivos JS sintéticos (100 por subdirectorio)."""
+    for i in range(files):
+        subdir = os.path.join(directory, f"pkg{i // 100:04d}")
+        os.makedirs(subdir, exist_ok=True)
+        lines = generate_lines(lines_per_file, density, seed + i)
+        if line_length:
+            lines = [pad_line(line, line_length) for line in lines]
+        with open(os.path.join(subdir, f"file{i:05d}.js"), "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def bench_scaling(args):
+    cpu_count = os.cpu_count() or 1
+    job_counts = sorted({int(j) if j != "N" else cpu_count for j in args.jobs.split(",")})
+
+    with tempfile.TemporaryDirectory() as corpus:
+        write_corpus(corpus, args.files, args.lines, args.density)
+        filenames = iter_source_files([corpus])
+        print(f"Corpus: {len(filenames)} archivos x {args.lines} líneas ({cpu_count} núcleos)")
+
+        reference = None
+        t_serial = None
+        for jobs in job_counts:
+            (findings, _), elapsed = timed(scan_files, filenames, jobs)
+            if reference is None:
+                reference, t_serial = findings, elapsed
+            elif findings != reference:
+                print(f"❌ Resultados distintos con {jobs} procesos")
+                return
+            print(f"  jobs={jobs:<3} {elapsed:7.2f} s  "
+                  f"{len(filenames) / elapsed:9,.0f} archivos/s  x{t_serial / elapsed:.2f}")
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso actual en MB (None si no se puede medir)."""
+    # En Linux VmHWM se reinicia con exec; ru_maxrss en cambio hereda el pico del padre
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo informa en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure_rss(filename, multiline, taint, queue):
+    baseline = peak_rss_mb()
+    load_detector().analyze_sql_injection(filename, multiline=multiline, taint=taint)
+    queue.put((baseline, peak_rss_mb()))
+
+
+def measure_rss(filename, multiline, taint):
+    """
+    Pico de RSS de analyze_sql_injection en un proceso nuevo, para que no
+    cuente la memoria usada al generar el corpus ni la de corridas previas.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure_rss, args=(filename, multiline, taint, queue))
+    proc.start()
+    baseline, peak = queue.get()
+    proc.join()
+    return baseline, peak
+
+
+def pattern_costs(lines):
+    """Costo aislado de cada regla de PATTERNS: ns por línea y coincidencias."""
+    costs = []
+    for pattern, description in PATTERNS:
+        regex = re.compile(pattern)
+        search = regex.search
+        start = time.perf_counter()
+        matches = sum(1 for line in lines if search(line))
+        elapsed = time.perf_counter() - start
+        costs.append({
+            "type": description,
+            "ns_per_line": elapsed * 1e9 / len(lines),
+            "matches": matches,
+        })
+    return costs
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(args):
+    detector = load_detector()
+    lines = generate_source(int(args.size_mb * 1024 * 1024), args.density, args.line_length, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "server-synthetic.js")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        size = os.path.getsize(filename)
+
+        timings = []
+        findings = []
+        for _ in range(args.repeat):
+            findings, elapsed = timed(detector.analyze_sql_injection, filename,
+                                      DEFAULT_MATCHER, args.multiline, args.taint)
+            timings.append(elapsed)
+        rss_baseline, rss_peak = measure_rss(filename, args.multiline, args.taint)
+
+    best = min(timings)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "params": {
+            "size_mb": args.size_mb, "density": args.density, "line_length": args.line_length,
+            "seed": args.seed, "repeat": args.repeat, "multiline": args.multiline, "taint": args.taint,
+        },
+        "results": {
+            "bytes": size,
+            "lines": len(lines),
+            "findings": len(findings),
+            "seconds": best,
+            "mb_per_s": size / (1024 * 1024) / best,
+            "lines_per_s": len(lines) / best,
+            "peak_rss_mb": rss_peak,
+            "rss_over_baseline_mb": None if rss_peak is None else rss_peak - rss_baseline,
+            "patterns": pattern_costs(lines),
+        },
+    }
+
+    results = report["results"]
+    print(f"Corpus: {size / (1024 * 1024):.1f} MB, {len(lines):,} líneas, {len(findings):,} hallazgos")
+    print(f"Tiempo (mejor de {args.repeat}): {best:.3f} s")
+    print(f"Throughput: {results['mb_per_s']:.1f} MB/s, {results['lines_per_s']:,.0f} líneas/s")
+    if rss_peak is not None:
+        print(f"Pico de RSS: {rss_peak:.1f} MB ({results['rss_over_baseline_mb']:+.1f} MB sobre el intérprete)")
+    print("Costo por regla (re.search aislado):")
+    for cost in results["patterns"]:
+        print(f"  {cost['type']:<32} {cost['ns_per_line']:8,.0f} ns/línea {cost['matches']:>9,} coincidencias")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\nComparación con {args.compare} (commit {previous.get('commit')}):")
+        for key in ("mb_per_s", "lines_per_s", "peak_rss_mb"):
+            old, new = previous["results"].get(key), results[key]
+            if old and new is not None:
+                print(f"  {key:<12} {old:12,.1f} -> {new:12,.1f} ({(new - old) / old:+.1%})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Resultados guardados en: {args.output}")
+
+
+def bench_corpus(args):
+    """Solo genera el corpus, para usarlo con detect-sqli.py u otras herramientas."""
+    if args.files == 1:
+        lines = generate_source(int(args.size_mb * 1024 * 1024), args.density, args.line_length, args.seed)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        print(f"✅ {args.output}: {len(lines):,} líneas")
+        return
+    # Largo medio aproximado de las líneas de ejemplo
+    average_line = args.line_length or 40
+    lines_per_file = max(1, int(args.size_mb * 1024 * 1024 / args.files / average_line))
+    write_corpus(args.output, args.files, lines_per_file, args.density, args.seed, args.line_length)
+    print(f"✅ {args.output}: {args.files} archivos x {lines_per_file} líneas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del detector SAST")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_matcher = subparsers.add_parser("matcher", help="Bucle re.search vs motor compilado")
+    p_matcher.add_argument("--lines", type=int, default=200000)
+    p_matcher.add_argument("--density", type=float, default=0.02,
+                           help="Proporción de líneas vulnerables")
+    p_matcher.set_defaults(func=bench_matcher)
+
+    p_scaling = subparsers.add_parser("scaling", help="Escalado del modo directorio con --jobs")
+    p_scaling.add_argument("--files", type=int, default=10000)
+    p_scaling.add_argument("--lines", type=int, default=200, help="Líneas por archivo")
+    p_scaling.add_argument("--density", type=float, default=0.02)
+    p_scaling.add_argument("--jobs", default="1,2,4,N",
+                           help="Lista de procesos a probar; N = todos los núcleos")
+    p_scaling.set_defaults(func=bench_scaling)
+
+    p_redos = subparsers.add_parser("redos", help="Costo por byte en líneas adversariales")
+    p_redos.add_argument("--lengths", default="64,256,1024,2048,65536,1048576")
+    p_redos.add_argument("--max-legacy", type=int, default=2048,
+                         help="Largo máximo en el que se ejecuta el bucle re.search original")
+    p_redos.set_defaults(func=bench_redos)
+
+    p_taint = subparsers.add_parser("taint", help="Tiempo de construcción del índice de flujo de datos")
+    p_taint.add_argument("--handlers", default="10,100,1000,10000",
+                         help="Cantidad de handlers por archivo sintético")
+    p_taint.set_defaults(func=bench_taint)
+
+    p_suite = subparsers.add_parser("suite", help="analyze_sql_injection sobre un corpus sintético "
+                                                  "(throughput, RSS, costo por regla, JSON)")
+    p_suite.add_argument("--size-mb", type=float, default=16, help="Tamaño del archivo generado")
+    p_suite.add_argument("--density", type=float, default=0.02, help="Proporción de líneas vulnerables")
+    p_suite.add_argument("--line-length", type=int, default=0,
+                         help="Rellenar cada línea hasta este largo (0 = largo natural)")
+    p_suite.add_argument("--seed", type=int, default=1234)
+    p_suite.add_argument("--repeat", type=int, default=3, help="Corridas; se informa la mejor")
+    p_suite.add_argument("--multiline", action="store_true")
+    p_suite.add_argument("--taint", action="store_true")
+    p_suite.add_argument("--output", help="Guardar los resultados en este archivo JSON")
+    p_suite.add_argument("--compare", metavar="JSON",
+                         help="Resultados previos (de --output) contra los que comparar")
+    p_suite.set_defaults(func=bench_suite)
+
+    p_corpus = subparsers.add_parser("corpus", help="Generar un corpus sintético reproducible")
+    p_corpus.add_argument("output", help="Archivo (con --files 1) o directorio a crear")
+    p_corpus.add_argument("--files", type=int, default=1)
+    p_corpus.add_argument("--size-mb", type=float, default=16, help="Tamaño total aproximado")
+    p_corpus.add_argument("--density", type=float, default=0.02)
+    p_corpus.add_argument("--line-length", type=int, default=0)
+    p_corpus.add_argument("--seed", type=int, default=1234)
+    p_corpus.set_defaults(func=bench_corpus)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+# corrector_metrics.py
+
+from bisect import bisect_left
+from collections import Counter
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import threading
+import time
+
+
+# Límites de los histogramas de latencia, en segundos (como en Prometheus)
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+
+# Llamadas que se acumulan antes de volcarlas en los contadores
+_FLUSH_EVERY = 1024
+
+_codes_and_validity = attrgetter("codes", "is_valid")
+
+
+class Histogram:
+    """Histograma de latencias con límites fijos; se observa en nanosegundos."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._bounds_ns = [round(bound * 1e9) for bound in self.buckets]
+        # Un contador por límite más el de +Inf (no acumulados)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ns = 0
+
+    def observe(self, elapsed_ns: int) -> None:
+        self.counts[bisect_left(self._bounds_ns, elapsed_ns)] += 1
+        self.count += 1
+        self.sum_ns += elapsed_ns
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, acumulado) por límite, incluido '+Inf'."""
+        total = 0
+        rows = []
+        for bound, count in zip(list(map(repr, self.buckets)) + ["+Inf"], self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum_seconds": self.sum_ns / 1e9,
+                "buckets": dict(self.cumulative())}
+
+
+class FieldMetrics:
+    """Contadores e histogramas de un campo."""
+
+    def __init__(self, steps: Sequence[str], buckets: Sequence[float]):
+        self.values = 0
+        self.changed = 0
+        self.rejected = 0
+        self.missing = 0
+        self.sampled = 0
+        self.fired = {step: 0 for step in steps}
+        self.latency = Histogram(buckets)
+        self.step_latency = {step: Histogram(buckets) for step in steps}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "values": self.values,
+            "changed": self.changed,
+            "rejected": self.rejected,
+            "missing": self.missing,
+            "change_rate": self.changed / self.values if self.values else 0.0,
+            "reject_rate": self.rejected / (self.values + self.missing) if self.values + self.missing else 0.0,
+            "sampled": self.sampled,
+            "latency": self.latency.to_dict(),
+            "steps": {
+                step: {"fired": self.fired[step], "latency": self.step_latency[step].to_dict()}
+                for step in self.fired
+            },
+        }
+
+
+class CorrectorMetrics:
+    """
+    Instrumentación opcional de SQLInjectionCorrector (se pasa como
+    metrics=...). Sin ella el corrector no cambia en nada.
+    - Contadores exactos por campo: valores, modificados, rechazados,
+      ausentes, y cuántas veces actuó cada paso (strip, meta, keywords,
+      truncate, whitelist, ...), a partir de los códigos del resultado. En
+      el camino caliente solo se guardan (códigos, válido) de cada
+      resultado, nunca los valores del usuario; se cuentan por lotes de
+      _FLUSH_EVERY llamadas, agrupando solicitudes iguales, y al exportar.
+    - Histogramas de latencia por campo y por paso, solo en las llamadas
+      muestreadas (1 de cada round(1 / sample_rate)): en ellas cada valor
+      se vuelve a sanitizar midiendo el tiempo (sin la caché de
+      resultados, que daría siempre un acierto), y después paso a paso.
+    - Correctores distintos pueden compartir las métricas: un campo con el
+      mismo nombre acumula en el mismo FieldMetrics, con la unión de sus pasos.
+    - Exportación en formato de texto de Prometheus y en JSON.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate debe estar en (0, 1]")
+        self.sample_rate = sample_rate
+        self.sample_every = max(1, round(1 / sample_rate))
+        self.buckets = tuple(buckets)
+        self.fields: Dict[str, FieldMetrics] = {}
+        # Por cada sanitize_parameters instrumentado, cómo contar sus
+        # resultados, [(campo, step_codes, change_codes, missing_codes)], y
+        # las llamadas aún no contadas: una tupla de (códigos, válido) por
+        # llamada, en el orden de los campos (list.append es atómico, no
+        # necesita lock)
+        self._pending: List[Tuple[List[tuple], List[tuple]]] = []
+        self._lock = threading.RLock()
+
+    def _field(self, name: str, steps: Sequence[str]) -> FieldMetrics:
+        with self._lock:
+            metrics = self.fields.get(name)
+            if metrics is None:
+                metrics = self.fields[name] = FieldMetrics(steps, self.buckets)
+            # Otro corrector con un campo del mismo nombre puede tener otros pasos
+            for step in steps:
+                if step not in metrics.fired:
+                    metrics.fired[step] = 0
+                    metrics.step_latency[step] = Histogram(self.buckets)
+            return metrics
+
+    def instrument(
+        self,
+        sanitize_parameters: Callable[[Dict[str, Any]], Dict[str, Any]],
+        fields: List[Tuple[str, Callable[..., Any], List[Tuple[str, Callable[[Any], Any]]]]],
+        step_codes: List[Tuple[int, str]],
+        change_codes: int,
+        missing_codes: int,
+    ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Envuelve sanitize_parameters. fields tiene por campo (nombre,
+        sanitizador, pasos), en el orden en que sanitize_parameters arma el
+        dict de resultados: los pasos son el sanitizador como funciones
+        valor -> valor (None corta la cadena). step_codes dice qué código de
+        MessageCode corresponde a cada paso; un resultado con missing_codes
+        es un campo ausente.
+        """
+        counted = [(name, step_codes, change_codes, missing_codes) for name, _, _ in fields]
+        timed = [(name, sanitize, steps, self._field(name, [step for step, _ in steps]))
+                 for name, sanitize, steps in fields]
+        pending: List[tuple] = []
+        entry = (counted, pending)
+        with self._lock:
+            self._pending.append(entry)
+        append = pending.append
+        every = self.sample_every
+        countdown = every
+
+        def sanitize_parameters_measured(params: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal countdown
+            results = sanitize_parameters(params)
+            append(tuple(map(_codes_and_validity, results.values())))
+            if len(pending) >= _FLUSH_EVERY:
+                self._flush(entry)
+            countdown -= 1
+            if not countdown:
+                countdown = every
+                self._time_fields(timed, params)
+            return results
+
+        return sanitize_parameters_measured
+
+    def _time_fields(self, timed: List[tuple], params: Dict[str, Any]) -> None:
+        """Llamada muestreada: mide cada campo presente y cada uno de sus pasos."""
+        clock = time.perf_counter_ns
+        get = params.get
+        for name, sanitize, steps, metrics in timed:
+            value = get(name)
+            if value is None:
+                continue
+            start = clock()
+            sanitize(value)
+            elapsed = clock() - start
+            with self._lock:
+                metrics.sampled += 1
+                metrics.latency.observe(elapsed)
+            self._trace_steps(metrics, steps, value)
+
+    def _flush(self, entry: Tuple[List[tuple], List[tuple]]) -> None:
+        """Cuenta las llamadas pendientes, agrupando cada campo por (códigos, válido)."""
+        counted, pending = entry
+        with self._lock:
+            batch = pending[:]
+            # Otros hilos pueden haber agregado al final mientras tanto
+            del pending[:len(batch)]
+            if not batch:
+                return
+            # Las solicitudes limpias se repiten: se agrupan antes de separar por campo
+            calls = Counter(batch)
+            for i, (name, step_codes, change_codes, missing_codes) in enumerate(counted):
+                metrics = self.fields[name]
+                fired = metrics.fired
+                groups: Counter = Counter()
+                for row, count in calls.items():
+                    groups[row[i]] += count
+                for (codes, is_valid), count in groups.items():
+                    if not is_valid:
+                        metrics.rejected += count
+                    if codes & missing_codes:
+                        metrics.missing += count
+                        continue
+                    metrics.values += count
+                    if codes & change_codes:
+                        metrics.changed += count
+                    if codes:
+                        for code, step in step_codes:
+                            if codes & code and step in fired:
+                                fired[step] += count
+
+    def _trace_steps(self, metrics: FieldMetrics, steps: List[Tuple[str, Callable]], value: Any) -> None:
+        """Repite los pasos de la regla midiendo cada uno (solo en llamadas muestreadas)."""
+        clock = time.perf_counter_ns
+        timings = []
+        current = value
+        for name, step in steps:
+            start = clock()
+            try:
+                current = step(current)
+            except ValueError:
+                current = None
+            timings.append((name, clock() - start))
+            if current is None:
+                break
+        with self._lock:
+            for name, elapsed in timings:
+                metrics.step_latency[name].observe(elapsed)
+
+    def flush(self) -> None:
+        """Cuenta todas las llamadas pendientes (lo hace la exportación)."""
+        with self._lock:
+            for entry in self._pending:
+                self._flush(entry)
+
+    def reset(self) -> None:
+        """
+        Pone los contadores en cero. Las funciones ya instrumentadas guardan
+        su FieldMetrics, así que se limpia en el lugar en vez de reemplazarlo.
+        """
+        with self._lock:
+            for _, pending in self._pending:
+                pending.clear()
+            for metrics in self.fields.values():
+                metrics.__dict__.update(FieldMetrics(list(metrics.fired), self.buckets).__dict__)
+
+    # -- Exportación --------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            self.flush()
+            return {"sample_rate": self.sample_rate,
+                    "fields": {name: metrics.to_dict() for name, metrics in self.fields.items()}}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix: str = "sql_corrector") -> str:
+        """Métricas en el formato de texto de Prometheus (exposition format 0.0.4)."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def histogram(name: str, labels: str, hist: Histogram) -> None:
+            for le, count in hist.cumulative():
+                lines.append(f'{prefix}_{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum{{{labels}}} {hist.sum_ns / 1e9}")
+            lines.append(f"{prefix}_{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            self.flush()
+            fields = [(_label(name), metrics) for name, metrics in self.fields.items()]
+            for name, attr, help_text in (
+                ("values_total", "values", "Valores sanitizados"),
+                ("changed_total", "changed", "Valores modificados por la sanitización"),
+                ("rejected_total", "rejected", "Valores inválidos o requeridos ausentes"),
+                ("missing_total", "missing", "Campos ausentes"),
+            ):
+                header(name, "counter", help_text)
+                for label, metrics in fields:
+                    lines.append(f'{prefix}_{name}{{field="{label}"}} {getattr(metrics, attr)}')
+
+            header("step_fired_total", "counter", "Veces que cada paso modificó o rechazó el valor")
+            for label, metrics in fields:
+                for step, count in metrics.fired.items():
+                    lines.append(f'{prefix}_step_fired_total{{field="{label}",step="{step}"}} {count}')
+
+            header("latency_seconds", "histogram", "Latencia de sanitizar un valor (muestreada)")
+            for label, metrics in fields:
+                histogram("latency_seconds", f'field="{label}"', metrics.latency)
+
+            header("step_latency_seconds", "histogram", "Latencia de cada paso (muestreada)")
+            for label, metrics in fields:
+                for step, hist in metrics.step_latency.items():
+                    histogram("step_latency_seconds", f'field="{label}",step="{step}"', hist)
+
+            header("sample_rate", "gauge", "Fracción de llamadas con latencias medidas")
+            lines.append(f"{prefix}_sample_rate {self.sample_rate}")
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    """Escapa un valor de etiqueta de Prometheus."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
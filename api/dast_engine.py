@@ -0,0 +1,538 @@
+# dast_engine.py
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import json
+import random
+import ssl
+import time
+
+
+# Salida de la prueba en curso: las pruebas corren a la vez, así que cada una
+# escribe en su propio buffer y el motor imprime los bloques en orden.
+_output: ContextVar[Optional[List[str]]] = ContextVar("dast_output", default=None)
+
+# True dentro de AsyncHttpClient.exclusive(): las solicitudes de esa tarea ya
+# tienen el cliente para sí y no esperan el cerrojo.
+_exclusive: ContextVar[bool] = ContextVar("dast_exclusive", default=False)
+
+
+def emit(text: str = "") -> None:
+    """print() que, dentro de una prueba del motor, va al buffer de esa prueba."""
+    buffer = _output.get()
+    if buffer is None:
+        print(text)
+    else:
+        buffer.append(text)
+
+
+class TokenBucket:
+    """
+    Límite de solicitudes por segundo: rate fichas por segundo, hasta burst
+    acumuladas. Reemplaza las pausas fijas entre pruebas; usa el reloj
+    monotónico del event loop.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # El lock hace que los que esperan tomen las fichas por orden de llegada
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._updated is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+                self._tokens = 1.0
+                self._updated = loop.time()
+            self._tokens -= 1
+
+
+class TimeoutPolicy(NamedTuple):
+    """Timeouts de cada intento, en segundos (la misma política para todas las pruebas)."""
+    # Abrir la conexión TCP (o TLS)
+    connect: float = 5.0
+    # Entre enviar la solicitud y cada parte de la respuesta
+    read: float = 10.0
+    # El intento completo
+    total: float = 15.0
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Reintentos con backoff exponencial y jitter: antes del intento n se
+    espera un valor al azar entre 0 y min(max_backoff, backoff * 2 ** n).
+    Los métodos no idempotentes (POST) solo se reintentan si no llegaron a
+    conectar; los estados de statuses solo en métodos idempotentes.
+    """
+    attempts: int = 3
+    backoff: float = 0.1
+    max_backoff: float = 2.0
+    statuses: Tuple[int, ...] = (502, 503, 504)
+
+
+_IDEMPOTENT = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+
+class RequestTiming(NamedTuple):
+    """Tiempos del intento que respondió, en segundos desde que empezó."""
+    # Abrir la conexión (0 si se reusó una del pool)
+    connect: float
+    # Hasta el primer byte de la respuesta
+    ttfb: float
+    # Hasta leer el cuerpo completo
+    total: float
+    reused: bool
+    attempts: int
+
+
+class HttpResponse(NamedTuple):
+    """Respuesta HTTP con la interfaz que usan las pruebas (como requests.Response)."""
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    timing: RequestTiming
+
+    @property
+    def elapsed(self) -> float:
+        return self.timing.total
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class TransportError(ConnectionError):
+    """
+    Falla de transporte de una solicitud. phase indica dónde falló
+    ('connect', 'request' o 'total') y timed_out si fue por timeout.
+    """
+
+    def __init__(self, message: str, phase: str, timed_out: bool = False):
+        super().__init__(message)
+        self.phase = phase
+        self.timed_out = timed_out
+
+
+class _StaleConnection(Exception):
+    """
+    Una conexión reusada ya estaba cerrada por el servidor antes de
+    responder, y repetir el pedido es seguro (método idempotente o no se
+    llegó a escribir nada).
+    """
+
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def usable(self) -> bool:
+        return not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _DelayGate:
+    """
+    Cerrojo lectores/escritor de AsyncHttpClient: las solicitudes normales
+    corren a la vez; un bloque exclusivo (ej. un payload de demora en
+    dast_timing) corre solo, sin ninguna otra solicitud en vuelo. Los
+    bloques exclusivos en espera tienen prioridad.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @asynccontextmanager
+    async def shared(self) -> AsyncIterator[None]:
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._exclusive and not self._waiting)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[None]:
+        async with self._condition:
+            self._waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._exclusive and not self._shared)
+            finally:
+                self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class AsyncHttpClient:
+    """
+    Transporte HTTP/1.1 compartido por todas las pruebas, sobre asyncio
+    (solo biblioteca estándar):
+    - pool de conexiones keep-alive por (esquema, host, puerto): una
+      conexión libre se reusa en la siguiente solicitud a ese destino;
+    - límite de tasa (TokenBucket) por intento;
+    - la misma TimeoutPolicy y RetryPolicy para todas las solicitudes;
+    - tiempos de cada solicitud (conexión, primer byte, total) y
+      contadores de reuso de conexiones, reintentos y timeouts (stats()).
+      Los tiempos son una muestra uniforme de hasta max_timings
+      solicitudes (reservoir sampling), así la memoria no crece con la
+      cantidad de solicitudes;
+    - bloques exclusivos (exclusive()): esperan a que no haya solicitudes
+      en vuelo y las de otras tareas esperan a que terminen, para medir
+      tiempos sin interferencia (_DelayGate).
+    Se cierra con close() o usándolo como "async with".
+    """
+
+    def __init__(self, timeout: Any = None, bucket: Optional[TokenBucket] = None,
+                 retry: Optional[RetryPolicy] = None, keep_alive: bool = True,
+                 max_idle_per_host: int = 8, user_agent: str = "dast-engine/1.0",
+                 max_timings: int = 4096):
+        # Un número es el timeout total (como antes); connect y read no lo superan
+        if timeout is None:
+            timeout = TimeoutPolicy()
+        elif not isinstance(timeout, TimeoutPolicy):
+            timeout = TimeoutPolicy(min(5.0, timeout), timeout, timeout)
+        self.timeout = timeout
+        self.bucket = bucket
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.keep_alive = keep_alive
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+
+        self.requests = 0
+        self.attempts = 0
+        self.connections = 0
+        self.reused = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.max_timings = max_timings
+        self.timings: List[RequestTiming] = []
+        self._timed = 0
+        self._idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+        self._gate = _DelayGate()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    async def get(self, url: str, **options: Any) -> HttpResponse:
+        return await self.request("GET", url, **options)
+
+    async def post(self, url: str, json: Any = None, **options: Any) -> HttpResponse:
+        return await self.request("POST", url, json_body=json, **options)
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[None]:
+        """Mientras dura el bloque solo corren las solicitudes de esta tarea."""
+        async with self._gate.exclusive():
+            token = _exclusive.set(True)
+            try:
+                yield
+            finally:
+                _exclusive.reset(token)
+
+    async def request(self, method: str, url: str, json_body: Any = None,
+                      attempts: Optional[int] = None) -> HttpResponse:
+        """
+        Envía la solicitud con la política de reintentos del cliente;
+        attempts la reemplaza para esta solicitud (1: sin reintentos).
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        key = (parts.scheme, parts.hostname or "localhost", parts.port or (443 if secure else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        body = json.dumps(json_body).encode("utf-8") if json_body is not None else b""
+        head = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {self.user_agent}",
+                "Accept: */*", "Connection: " + ("keep-alive" if self.keep_alive else "close")]
+        if json_body is not None:
+            head += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        payload = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+        self.requests += 1
+        retry = self.retry if attempts is None else self.retry._replace(attempts=attempts)
+        idempotent = method in _IDEMPOTENT
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            try:
+                if _exclusive.get():
+                    status, headers, content, timing = await self._attempt(key, payload, method, attempt)
+                else:
+                    async with self._gate.shared():
+                        status, headers, content, timing = await self._attempt(key, payload, method, attempt)
+            except _StaleConnection:
+                # El servidor cerró una conexión libre y el pedido se puede
+                # repetir: se repite en una conexión nueva sin contar intento
+                attempt -= 1
+                continue
+            except TransportError as e:
+                if e.timed_out:
+                    self.timeouts += 1
+                if attempt >= retry.attempts or not (idempotent or e.phase == "connect"):
+                    raise TransportError(f"{e} ({method} {url}, {attempt} intento(s))", e.phase, e.timed_out) from None
+            else:
+                if status not in retry.statuses or not idempotent or attempt >= retry.attempts:
+                    self._record(timing)
+                    return HttpResponse(status, headers, content, timing)
+            self.retries += 1
+            await asyncio.sleep(random.uniform(0, min(retry.max_backoff, retry.backoff * 2 ** (attempt - 1))))
+
+    async def _attempt(self, key: Tuple[str, str, int], payload: bytes, method: str,
+                       attempt: int) -> Tuple[int, Dict[str, str], bytes, RequestTiming]:
+        timeout = self.timeout
+        try:
+            return await asyncio.wait_for(self._exchange(key, payload, method, attempt), timeout.total)
+        except asyncio.TimeoutError:
+            raise TransportError(f"Sin respuesta completa tras {timeout.total} s", "total", True) from None
+
+    async def _exchange(self, key: Tuple[str, str, int], payload: bytes, method: str,
+                        attempt: int) -> Tuple[int, Dict[str, str], bytes, RequestTiming]:
+        timeout = self.timeout
+        self.attempts += 1
+        start = time.perf_counter()
+        conn = self._take_idle(key)
+        reused = conn is not None
+        if conn is None:
+            scheme, host, port = key
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port, ssl=ssl.create_default_context() if scheme == "https" else None),
+                    timeout.connect,
+                )
+            except asyncio.TimeoutError:
+                raise TransportError(f"No se pudo conectar en {timeout.connect} s", "connect", True) from None
+            except OSError as e:
+                raise TransportError(f"No se pudo conectar: {e}", "connect") from None
+            conn = _Connection(reader, writer)
+            self.connections += 1
+        else:
+            self.reused += 1
+        connected = time.perf_counter()
+
+        keep = False
+        written = False
+        try:
+            conn.writer.write(payload)
+            await conn.writer.drain()
+            written = True
+            status, headers = await asyncio.wait_for(read_head(conn.reader), timeout.read)
+            # Respuestas informativas (100 Continue, ...) antes de la final
+            while 100 <= status < 200 and status != 101:
+                status, headers = await asyncio.wait_for(read_head(conn.reader), timeout.read)
+            first_byte = time.perf_counter()
+            content, delimited = await asyncio.wait_for(read_body(conn.reader, headers, method, status),
+                                                        timeout.read)
+            keep = self.keep_alive and delimited and headers.get("connection", "").lower() != "close"
+        except asyncio.TimeoutError:
+            raise TransportError(f"Sin respuesta tras {timeout.read} s", "request", True) from None
+        except TransportError:
+            raise
+        except (OSError, asyncio.IncompleteReadError) as e:
+            # Un POST ya escrito pudo haberse procesado aunque la conexión
+            # se cortara: no se repite
+            if (reused and isinstance(e, (ConnectionError, asyncio.IncompleteReadError))
+                    and (method in _IDEMPOTENT or not written)):
+                raise _StaleConnection() from None
+            raise TransportError(f"Conexión interrumpida: {e}", "request") from None
+        finally:
+            if keep:
+                self._put_idle(key, conn)
+            else:
+                conn.close()
+        end = time.perf_counter()
+        return status, headers, content, RequestTiming(
+            connected - start if not reused else 0.0, first_byte - start, end - start, reused, attempt)
+
+    def _take_idle(self, key: Tuple[str, str, int]) -> Optional[_Connection]:
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.usable():
+                return conn
+            conn.close()
+        return None
+
+    def _put_idle(self, key: Tuple[str, str, int], conn: _Connection) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host:
+            idle.append(conn)
+        else:
+            conn.close()
+
+    def _record(self, timing: RequestTiming) -> None:
+        """Reservoir sampling: cada solicitud queda en timings con probabilidad max_timings / n."""
+        self._timed += 1
+        if len(self.timings) < self.max_timings:
+            self.timings.append(timing)
+            return
+        slot = random.randrange(self._timed)
+        if slot < self.max_timings:
+            self.timings[slot] = timing
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores del transporte y percentiles de los tiempos (en ms) para el reporte."""
+        timings = self.timings
+
+        def percentiles(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {}
+            values = sorted(values)
+            pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+            return {"p50": pick(0.5), "p95": pick(0.95), "max": round(values[-1] * 1000, 2)}
+
+        opened = [t.connect for t in timings if not t.reused]
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "connections": self.connections,
+            "reused": self.reused,
+            "reuse_rate": round(self.reused / self.attempts, 3) if self.attempts else 0.0,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "connect_ms": percentiles(opened),
+            "ttfb_ms": percentiles([t.ttfb for t in timings]),
+            "total_ms": percentiles([t.total for t in timings]),
+        }
+
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    """Línea de estado y encabezados (nombres en minúsculas)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("El servidor cerró la conexión sin responder")
+    try:
+        status = int(status_line.split(None, 2)[1])
+    except (IndexError, ValueError):
+        raise ConnectionError(f"Respuesta HTTP inválida: {status_line[:80]!r}") from None
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return status, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+async def read_body(reader: asyncio.StreamReader, headers: Dict[str, str], method: str,
+                    status: int = 200) -> Tuple[bytes, bool]:
+    """
+    Cuerpo según Content-Length, chunked o hasta que se cierre la conexión.
+    También indica si el largo estaba delimitado (si no, la conexión no se
+    puede reusar). HEAD, 1xx, 204 y 304 nunca llevan cuerpo (RFC 9112 6.3).
+    """
+    if method == "HEAD" or status < 200 or status in (204, 304):
+        return b"", True
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            line = await reader.readline()
+            try:
+                size = int(line.split(b";")[0], 16)
+            except ValueError:
+                raise TransportError(f"Tamaño de chunk inválido: {line[:80]!r}", "request") from None
+            if size == 0:
+                # Trailers hasta la línea vacía
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks), True
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    length = headers.get("content-length")
+    if length is not None:
+        try:
+            size = int(length)
+            if size < 0:
+                raise ValueError(length)
+        except ValueError:
+            raise TransportError(f"Content-Length inválido: {length[:80]!r}", "request") from None
+        return await reader.readexactly(size), True
+    return await reader.read(), False
+
+
+class TestOutcome(NamedTuple):
+    """Resultado de una prueba: lo que devolvió, su salida y cuánto tardó."""
+    name: str
+    result: Any
+    output: List[str]
+    elapsed: float
+    error: Optional[BaseException] = None
+
+
+DastTest = Callable[[AsyncHttpClient], Awaitable[Any]]
+
+
+async def run_tests(
+    tests: List[DastTest],
+    client: AsyncHttpClient,
+    concurrency: int = 4,
+    on_done: Optional[Callable[[TestOutcome], None]] = None,
+) -> List[TestOutcome]:
+    """
+    Ejecuta cada prueba como una tarea, con hasta concurrency a la vez.
+    Devuelve los resultados en el orden de tests; on_done se llama también
+    en ese orden, apenas terminan la prueba y todas las anteriores (así la
+    salida sale ordenada pero sin esperar al final). Una prueba que lanza
+    una excepción no detiene a las demás: queda en error.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(test: DastTest) -> TestOutcome:
+        async with semaphore:
+            buffer: List[str] = []
+            _output.set(buffer)
+            start = time.perf_counter()
+            try:
+                result, error = await test(client), None
+            except Exception as e:
+                result, error = None, e
+            return TestOutcome(test.__name__, result, buffer, time.perf_counter() - start, error)
+
+    tasks = [asyncio.create_task(run(test)) for test in tests]
+    outcomes = []
+    for task in tasks:
+        outcome = await task
+        outcomes.append(outcome)
+        if on_done is not None:
+            on_done(outcome)
+    return outcomes
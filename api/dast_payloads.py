@@ -0,0 +1,622 @@
+# dast_payloads.py
+
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+
+# Corpus por defecto, junto a test-dast.py
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dast-payloads.json")
+
+# Tope de variantes por familia al aplicar mutadores (evita explosiones combinatorias)
+DEFAULT_MAX_VARIANTS = 512
+
+
+class CorpusError(ValueError):
+    """El archivo de payloads no tiene el formato esperado."""
+
+
+# --- Mutadores -------------------------------------------------------------
+# Cada mutador recibe un payload y devuelve sus variantes (sin incluirlo).
+
+_KEYWORDS = re.compile(r"\b(?:or|and|union|select|null|drop|table|from|where|insert|values)\b", re.IGNORECASE)
+_NULL_LIST = re.compile(r"null(?:\s*,\s*null)*", re.IGNORECASE)
+
+
+def _alternate_case(word: str) -> str:
+    return "".join(c.upper() if i % 2 == 0 else c.lower() for i, c in enumerate(word))
+
+
+def mutate_case(payload: str) -> List[str]:
+    """Palabras clave SQL en mayúsculas, minúsculas y alternadas (UnIoN)."""
+    return [_KEYWORDS.sub(lambda m: change(m.group(0)), payload)
+            for change in (str.upper, str.lower, _alternate_case)]
+
+
+def mutate_whitespace(payload: str) -> List[str]:
+    """Espacios reemplazados por comentario vacío, tabulador o salto de línea."""
+    if " " not in payload:
+        return []
+    return [payload.replace(" ", sep) for sep in ("/**/", "\t", "\n")]
+
+
+def mutate_comments(payload: str) -> List[str]:
+    """Otros estilos para comentar el resto de la consulta."""
+    if "--" not in payload:
+        return []
+    return [payload.replace("--", style) for style in ("-- -", "--+", "/*")]
+
+
+def mutate_urlencode(payload: str) -> List[str]:
+    """El payload ya codificado: el servidor recibe la forma doblemente codificada."""
+    return [quote(payload, safe="")]
+
+
+def columns_mutator(low: int = 1, high: int = 8) -> Callable[[str], List[str]]:
+    """Cambia la lista de null de un UNION SELECT por de low a high columnas."""
+    def mutate_columns(payload: str) -> List[str]:
+        if not _NULL_LIST.search(payload):
+            return []
+        return [_NULL_LIST.sub(",".join(["null"] * n), payload, count=1) for n in range(low, high + 1)]
+    return mutate_columns
+
+
+MUTATORS: Dict[str, Callable[..., Callable[[str], List[str]]]] = {
+    "case": lambda: mutate_case,
+    "whitespace": lambda: mutate_whitespace,
+    "comments": lambda: mutate_comments,
+    "urlencode": lambda: mutate_urlencode,
+    "columns": lambda min=1, max=8: columns_mutator(min, max),
+}
+
+
+def expand(payloads: Iterable[str], mutators: List[Callable[[str], List[str]]],
+           limit: int = DEFAULT_MAX_VARIANTS) -> List[str]:
+    """
+    Aplica los mutadores en cadena (cada uno sobre las variantes que dejaron
+    los anteriores) y devuelve las variantes sin duplicados. Los payloads
+    originales van primero, en su orden; como mucho limit variantes.
+    """
+    variants = list(dict.fromkeys(payloads))
+    for mutate in mutators:
+        seen = dict.fromkeys(variants)
+        for payload in variants:
+            for variant in mutate(payload):
+                seen.setdefault(variant)
+            if len(seen) >= limit:
+                break
+        variants = list(seen)[:limit]
+    return variants
+
+
+def expand_pairs(pairs: Iterable[Tuple[str, str]], mutators: List[Callable[[str], List[str]]],
+                 limit: int = DEFAULT_MAX_VARIANTS) -> List[Tuple[str, str]]:
+    """
+    Como expand() para pares (condición verdadera, condición falsa): cada
+    mutador se aplica a los dos lados a la vez, y solo se conservan las
+    variantes que transforman ambos de la misma forma.
+    """
+    variants = list(dict.fromkeys(tuple(pair) for pair in pairs))
+    for mutate in mutators:
+        seen = dict.fromkeys(variants)
+        for true_side, false_side in variants:
+            true_variants, false_variants = mutate(true_side), mutate(false_side)
+            if len(true_variants) == len(false_variants):
+                for variant in zip(true_variants, false_variants):
+                    seen.setdefault(variant)
+            if len(seen) >= limit:
+                break
+        variants = list(seen)[:limit]
+    return variants
+
+
+# --- Huella estructural ----------------------------------------------------
+# Una respuesta JSON se resume como multiconjunto de (ruta, token): las
+# claves y la cantidad de elementos de cada lista cuentan; los números y
+# los dígitos dentro de textos no (ids, fechas, contadores cambian entre
+# respuestas equivalentes). Comparar dos huellas es O(tamaño).
+
+_DIGITS = re.compile(r"\d+")
+
+# Desde esta similitud dos respuestas se consideran la misma
+DEFAULT_SIMILARITY = 0.95
+
+
+class Fingerprint(NamedTuple):
+    status: int
+    features: Counter
+    size: int
+
+
+def fingerprint(status: int, data: Any) -> Fingerprint:
+    """Huella normalizada de una respuesta ya parseada (recorrido iterativo, sin recursión)."""
+    features: Counter = Counter()
+    stack = [("$", data)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            features[(path, "{}")] += 1
+            stack.extend((f"{path}.{key}", item) for key, item in value.items())
+        elif isinstance(value, list):
+            features[(path, "[]")] += 1
+            stack.extend((path + "[]", item) for item in value)
+        elif isinstance(value, bool) or value is None:
+            features[(path, repr(value))] += 1
+        elif isinstance(value, (int, float)):
+            features[(path, "0")] += 1
+        else:
+            features[(path, _DIGITS.sub("0", str(value)))] += 1
+    return Fingerprint(status, features, sum(features.values()))
+
+
+def similarity(a: Fingerprint, b: Fingerprint) -> float:
+    """Jaccard sobre los multiconjuntos de rasgos; 0 si difiere el status."""
+    if a.status != b.status:
+        return 0.0
+    union = sum((a.features | b.features).values())
+    if not union:
+        return 1.0
+    return sum((a.features & b.features).values()) / union
+
+
+# --- Criterios de éxito ----------------------------------------------------
+# Una familia declara "match": lista de alternativas (basta una), cada una
+# un objeto de condiciones (todas deben cumplirse). Las condiciones
+# *_baseline comparan contra la respuesta canónica del mismo destino y
+# parámetro (BaselineCache).
+
+class Evaluation(NamedTuple):
+    """Veredicto sobre una respuesta; se cachea por hash de la respuesta (y línea base)."""
+    matched: bool
+    count: int
+    status: int
+
+
+class Observation(NamedTuple):
+    """Lo que ven las condiciones: la respuesta y, si hace falta, su huella y la de la línea base."""
+    status: int
+    data: dict
+    text: str
+    fingerprint: Optional[Fingerprint]
+    baseline: Optional[Fingerprint]
+
+
+_BASELINE_CONDITIONS = {"same_as_baseline", "differs_from_baseline", "larger_than_baseline"}
+
+
+def _threshold(value: Any) -> float:
+    return DEFAULT_SIMILARITY if value is True else float(value)
+
+
+def _condition(name: str, value: Any) -> Callable[[Observation], bool]:
+    if name == "min_count":
+        return lambda o: (o.data.get("count") or 0) >= value
+    if name == "success":
+        return lambda o: bool(o.data.get("success")) == value
+    if name == "has_key":
+        return lambda o: value in o.data
+    if name == "truthy":
+        return lambda o: bool(o.data.get(value))
+    if name == "error_contains":
+        needles = [value] if isinstance(value, str) else list(value)
+        return lambda o: any(n in str(o.data.get("error", "")) for n in needles)
+    if name == "text_contains":
+        return lambda o: value in o.text
+    if name == "status":
+        return lambda o: o.status == value
+    if name == "same_as_baseline":
+        threshold = _threshold(value)
+        return lambda o: similarity(o.fingerprint, o.baseline) >= threshold
+    if name == "differs_from_baseline":
+        threshold = _threshold(value)
+        return lambda o: similarity(o.fingerprint, o.baseline) < threshold
+    if name == "larger_than_baseline":
+        # Misma forma de respuesta pero value veces más grande (más filas)
+        factor = 2.0 if value is True else float(value)
+        return lambda o: o.fingerprint.status == o.baseline.status and o.fingerprint.size >= factor * o.baseline.size
+    raise CorpusError(f"Condición desconocida: {name}")
+
+
+def compile_match(alternatives: Optional[List[dict]]) -> Optional[Callable[[Observation], bool]]:
+    """Convierte "match" en un predicado sobre una Observation. None si no hay criterio."""
+    if alternatives is None:
+        return None
+    compiled = [[_condition(name, value) for name, value in alternative.items()] for alternative in alternatives]
+    return lambda o: any(all(c(o) for c in conds) for conds in compiled)
+
+
+def _uses_baseline(*criteria: Optional[List[dict]]) -> bool:
+    return any(name in _BASELINE_CONDITIONS
+               for alternatives in criteria if alternatives for alternative in alternatives for name in alternative)
+
+
+# --- Corpus ----------------------------------------------------------------
+
+class Target(NamedTuple):
+    """Endpoint donde se inyecta: cada parámetro de inject recibe el payload por separado."""
+    name: str
+    method: str
+    path: str
+    params: Dict[str, str]
+    query: Dict[str, str]
+    json: Optional[dict]
+    inject: List[str]
+
+    def default(self, parameter: str) -> Any:
+        """Valor normal del parámetro: el que da la respuesta de línea base."""
+        for values in (self.params, self.query, self.json or {}):
+            if parameter in values:
+                return values[parameter]
+        raise KeyError(parameter)
+
+    def request(self, parameter: str, payload: Any) -> Tuple[str, Optional[dict]]:
+        """Ruta (con query) y cuerpo JSON con payload en parameter y el resto con sus valores normales."""
+        def fill(key: str, value: Any) -> Any:
+            return payload if key == parameter else value
+
+        path = self.path
+        for key, value in self.params.items():
+            path = path.replace("{%s}" % key, quote(str(fill(key, value))))
+        if self.query:
+            path += "?" + "&".join(f"{key}={quote(str(fill(key, value)))}" for key, value in self.query.items())
+        body = None
+        if self.json is not None:
+            body = {key: fill(key, value) for key, value in self.json.items()}
+        return path, body
+
+
+class Family(NamedTuple):
+    """Familia de payloads con sus mutadores, destinos y criterio de éxito."""
+    name: str
+    title: str
+    test: str
+    severity: str
+    description: Optional[str]
+    payloads: List[str]
+    # Familias booleanas: payload de condición falsa para cada payload (mismo índice)
+    controls: Optional[List[str]]
+    mutators: List[Callable[[str], List[str]]]
+    targets: List[Target]
+    match: Optional[Callable[[Observation], bool]]
+    # Claves de los criterios: familias con el mismo criterio comparten veredictos
+    match_key: str
+    # Criterio para la respuesta de la condición falsa
+    control: Optional[Callable[[Observation], bool]]
+    control_key: str
+    needs_baseline: bool
+    # Familias por tiempo (dast_timing): ajustes de TimingPolicy; los pares son (demora, control)
+    timing: Optional[dict]
+    report: List[str]
+    found: str
+    not_found: str
+    max_variants: int
+
+
+class Probe(NamedTuple):
+    """Una solicitud concreta: payload en un parámetro de un destino."""
+    target: str
+    parameter: str
+    payload: str
+    method: str
+    path: str
+    json: Optional[dict]
+    # Payload de condición falsa (familias booleanas)
+    control: Optional[str] = None
+
+
+class Corpus(NamedTuple):
+    targets: Dict[str, Target]
+    families: List[Family]
+
+
+def _target(name: str, spec: dict) -> Target:
+    params = dict(spec.get("params", {}))
+    query = dict(spec.get("query", {}))
+    body = spec.get("json")
+    inject = list(spec.get("inject", []))
+    known = set(params) | set(query) | set(body or {})
+    for parameter in inject:
+        if parameter not in known:
+            raise CorpusError(f"Destino {name}: el parámetro a inyectar '{parameter}' no está definido")
+    return Target(name, spec.get("method", "GET").upper(), spec["path"], params, query, body, inject)
+
+
+def _mutator(spec: Any) -> Callable[[str], List[str]]:
+    if isinstance(spec, str):
+        name, options = spec, {}
+    else:
+        name, options = spec.get("name"), {k: v for k, v in spec.items() if k != "name"}
+    if name not in MUTATORS:
+        raise CorpusError(f"Mutador desconocido: {name}")
+    return MUTATORS[name](**options)
+
+
+def _family(spec: dict, targets: Dict[str, Target]) -> Family:
+    name = spec.get("name")
+    pairs = spec.get("pairs")
+    if not name or not (spec.get("payloads") or pairs):
+        raise CorpusError(f"Familia sin nombre o sin payloads: {spec}")
+    if not spec.get("targets"):
+        raise CorpusError(f"Familia {name}: sin destinos ('targets')")
+    for target in spec["targets"]:
+        if target not in targets:
+            raise CorpusError(f"Familia {name}: destino desconocido '{target}'")
+    timing = spec.get("timing")
+    if timing is not None and (pairs is None or not isinstance(timing, dict)):
+        raise CorpusError(f"Familia {name}: 'timing' necesita pares (demora, control) y un objeto de ajustes")
+    if pairs is not None and timing is None and "control" not in spec:
+        raise CorpusError(f"Familia {name}: los pares necesitan un criterio 'control'")
+    match, control = spec.get("match"), spec.get("control")
+    return Family(
+        name=name,
+        title=spec.get("title", name),
+        test=spec.get("test", name),
+        severity=spec.get("severity", "INFO"),
+        description=spec.get("description"),
+        payloads=[pair[0] for pair in pairs] if pairs else list(spec["payloads"]),
+        controls=[pair[1] for pair in pairs] if pairs else None,
+        mutators=[_mutator(m) for m in spec.get("mutators", [])],
+        targets=[targets[t] for t in spec["targets"]],
+        match=compile_match(match),
+        match_key=json.dumps(match, sort_keys=True),
+        control=compile_match(control),
+        control_key=json.dumps(control, sort_keys=True),
+        needs_baseline=_uses_baseline(match, control),
+        timing=timing,
+        report=list(spec.get("report", [])),
+        found=spec.get("found", "Payload confirmado"),
+        not_found=spec.get("not_found", "No se pudo confirmar"),
+        max_variants=spec.get("max_variants", DEFAULT_MAX_VARIANTS),
+    )
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> Corpus:
+    """Lee y valida el corpus (destinos y familias) de un archivo JSON."""
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise CorpusError(f"{path}: JSON inválido: {e}") from e
+    try:
+        targets = {name: _target(name, spec) for name, spec in data.get("targets", {}).items()}
+        families = [_family(spec, targets) for spec in data.get("families", [])]
+    except (KeyError, TypeError) as e:
+        raise CorpusError(f"{path}: entrada incompleta: {e}") from e
+    return Corpus(targets, families)
+
+
+def probes(family: Family, mutate: bool = True) -> List[Probe]:
+    """
+    Reparte las variantes de la familia por sus destinos y parámetros. El
+    orden es determinista: payload por payload (los originales primero) y,
+    para cada uno, destinos y parámetros en el orden del corpus.
+    """
+    mutators = family.mutators if mutate else []
+    if family.controls is None:
+        variants = [(payload, None) for payload in expand(family.payloads, mutators, family.max_variants)]
+    else:
+        variants = expand_pairs(zip(family.payloads, family.controls), mutators, family.max_variants)
+    result = []
+    for payload, control in variants:
+        for target in family.targets:
+            for parameter in target.inject:
+                path, body = target.request(parameter, payload)
+                result.append(Probe(target.name, parameter, payload, target.method, path, body, control))
+    return result
+
+
+# --- Línea base ------------------------------------------------------------
+
+class Baseline(NamedTuple):
+    """Respuesta canónica de un destino/parámetro con su valor normal."""
+    key: str
+    status: int
+    content: bytes
+    fingerprint: Fingerprint
+
+
+class BaselineCache:
+    """
+    Una respuesta de línea base por (destino, parámetro), pedida una sola vez
+    por análisis y compartida por todas las familias: las sondas que la
+    necesitan a la vez esperan la misma solicitud. Si la solicitud falla,
+    la entrada se descarta y la siguiente sonda la vuelve a pedir (una
+    falla pasajera no deja al destino sin línea base el resto del análisis).
+    hits cuenta solo los reusos que obtuvieron la línea base.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.requests = 0
+        self.hits = 0
+        self._entries: Dict[Tuple[str, str], "asyncio.Task[Baseline]"] = {}
+
+    async def get(self, http: Any, target: Target, parameter: str) -> Baseline:
+        key = (target.name, parameter)
+        task = self._entries.get(key)
+        shared = task is not None
+        if not shared:
+            task = self._entries[key] = asyncio.ensure_future(self._fetch(http, target, parameter))
+            task.add_done_callback(lambda done: self._evict_failed(key, done))
+        baseline = await task
+        if shared:
+            self.hits += 1
+        return baseline
+
+    def _evict_failed(self, key: Tuple[str, str], task: "asyncio.Task[Baseline]") -> None:
+        if (task.cancelled() or task.exception() is not None) and self._entries.get(key) is task:
+            del self._entries[key]
+
+    async def _fetch(self, http: Any, target: Target, parameter: str) -> Baseline:
+        self.requests += 1
+        path, body = target.request(parameter, target.default(parameter))
+        response = await send_request(http, target.method, self.base_url + path, body)
+        return Baseline(f"{target.name}:{parameter}", response.status_code, response.content,
+                        fingerprint(response.status_code, _parse(response.content)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _parse(content: bytes) -> dict:
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def send_request(http: Any, method: str, url: str, body: Optional[dict], **options: Any) -> Any:
+    """options van a AsyncHttpClient.request (ej. attempts)."""
+    if method == "POST":
+        return await http.post(url, json=body, **options)
+    return await http.request(method, url, **options)
+
+
+# --- Motor de fuzzing ------------------------------------------------------
+
+class ProbeResult(NamedTuple):
+    probe: Probe
+    url: str
+    evaluation: Optional[Evaluation]
+    error: Optional[BaseException] = None
+
+
+class FamilyReport(NamedTuple):
+    """Lo que dejó una familia: todas sus sondas, las positivas y cuántas respuestas distintas hubo."""
+    family: Family
+    results: List[ProbeResult]
+    matches: List[ProbeResult]
+    unique_responses: int
+
+    @property
+    def first(self) -> ProbeResult:
+        """La primera sonda positiva (o la primera con respuesta), en el orden del corpus."""
+        if self.matches:
+            return self.matches[0]
+        answered = [r for r in self.results if r.evaluation is not None]
+        return answered[0] if answered else self.results[0]
+
+
+class Fuzzer:
+    """
+    Ejecuta las familias del corpus sobre un AsyncHttpClient: las sondas de
+    una familia salen a la vez (hasta concurrency en vuelo en todo el
+    análisis, y el cliente aplica su límite de tasa). Sondas idénticas se
+    envían una sola vez, y las respuestas se agrupan por hash (status +
+    cuerpo): el JSON se parsea y el criterio se evalúa una vez por
+    respuesta distinta, así miles de payloads cuestan solo las
+    evaluaciones únicas.
+
+    Las familias que comparan contra la línea base usan BaselineCache; una
+    sonda con el valor normal del parámetro reusa esa misma respuesta. En
+    las familias booleanas la condición falsa solo se envía si la
+    verdadera ya coincidió con la línea base.
+    """
+
+    def __init__(self, corpus: Corpus, base_url: str, concurrency: int = 4, mutate: bool = False):
+        self.corpus = corpus
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = max(1, concurrency)
+        self.mutate = mutate
+        self.baselines = BaselineCache(self.base_url)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._verdicts: Dict[Tuple[str, Optional[str], bytes], Evaluation] = {}
+        self._responses: set = set()
+        self.probes = 0
+        self.duplicates = 0
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    def evaluate(self, match: Optional[Callable[[Observation], bool]], match_key: str,
+                 status: int, content: bytes, baseline: Optional[Baseline] = None) -> Tuple[Evaluation, bytes]:
+        digest = hashlib.sha1(b"%d\n" % status + content).digest()
+        self._responses.add(digest)
+        key = (match_key, baseline.key if baseline is not None else None, digest)
+        evaluation = self._verdicts.get(key)
+        if evaluation is not None:
+            self.cache_hits += 1
+            return evaluation, digest
+        self.evaluations += 1
+        data = _parse(content)
+        matched = False
+        if match is not None:
+            observed = Observation(status, data, content.decode("utf-8", errors="replace"),
+                                   fingerprint(status, data) if baseline is not None else None,
+                                   baseline.fingerprint if baseline is not None else None)
+            matched = match(observed)
+        count = data.get("count") or 0
+        evaluation = self._verdicts[key] = Evaluation(matched, count if isinstance(count, int) else 0, status)
+        return evaluation, digest
+
+    async def _send(self, http: Any, family: Family, probe: Probe) -> Tuple[ProbeResult, Optional[bytes]]:
+        url = self.base_url + probe.path
+        target = self.corpus.targets[probe.target]
+        is_default = probe.control is None and probe.payload == target.default(probe.parameter)
+        try:
+            baseline = None
+            if family.needs_baseline or is_default:
+                baseline = await self.baselines.get(http, target, probe.parameter)
+            if is_default:
+                status, content = baseline.status, baseline.content
+            else:
+                async with self._semaphore:
+                    response = await send_request(http, probe.method, url, probe.json)
+                status, content = response.status_code, response.content
+            if not family.needs_baseline:
+                baseline = None
+            evaluation, digest = self.evaluate(family.match, family.match_key, status, content, baseline)
+
+            if probe.control is not None and evaluation.matched:
+                path, body = target.request(probe.parameter, probe.control)
+                async with self._semaphore:
+                    response = await send_request(http, probe.method, self.base_url + path, body)
+                control, _ = self.evaluate(family.control, family.control_key,
+                                           response.status_code, response.content, baseline)
+                evaluation = evaluation._replace(matched=control.matched)
+        except ConnectionError as e:
+            self.errors += 1
+            return ProbeResult(probe, url, None, e), None
+        return ProbeResult(probe, url, evaluation), digest
+
+    async def run_family(self, family: Family, http: Any) -> FamilyReport:
+        """Envía todas las sondas de la familia. Si ninguna obtuvo respuesta, relanza el primer error."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        expanded = probes(family, self.mutate)
+        # Mutadores distintos pueden llegar a la misma solicitud: se envía una vez
+        unique, seen = [], set()
+        for probe in expanded:
+            key = (probe.method, probe.path, json.dumps(probe.json, sort_keys=True), probe.control)
+            if key not in seen:
+                seen.add(key)
+                unique.append(probe)
+        self.duplicates += len(expanded) - len(unique)
+        self.probes += len(unique)
+        sent = await asyncio.gather(*(self._send(http, family, probe) for probe in unique))
+        results = [result for result, _ in sent]
+        if all(result.error is not None for result in results):
+            raise results[0].error
+        matches = [result for result in results if result.evaluation is not None and result.evaluation.matched]
+        digests = {digest for _, digest in sent if digest is not None}
+        return FamilyReport(family, results, matches, len(digests))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "families": len(self.corpus.families),
+            "probes": self.probes,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "unique_responses": len(self._responses),
+            "evaluations": self.evaluations,
+            "cache_hits": self.cache_hits,
+            "baselines": len(self.baselines),
+            "baseline_requests": self.baselines.requests,
+            "baseline_hits": self.baselines.hits,
+        }
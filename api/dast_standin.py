@@ -0,0 +1,189 @@
+# dast_standin.py
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import json
+import socket
+import sqlite3
+import threading
+import time
+
+
+# Los mismos productos que populate-db.js
+SAMPLE_PRODUCTS = [
+    ("Laptop Dell XPS 13", 1299.99, "Electronics", 15),
+    ("iPhone 15 Pro", 999.99, "Electronics", 30),
+    ("Samsung Galaxy S24", 899.99, "Electronics", 25),
+    ("MacBook Pro M3", 2499.99, "Electronics", 10),
+    ("Sony WH-1000XM5 Headphones", 399.99, "Audio", 50),
+    ("iPad Air", 599.99, "Electronics", 20),
+    ("Nintendo Switch OLED", 349.99, "Gaming", 40),
+    ("PlayStation 5", 499.99, "Gaming", 12),
+    ("Xbox Series X", 499.99, "Gaming", 18),
+    ("Apple Watch Series 9", 429.99, "Wearables", 35),
+    ("Kindle Paperwhite", 139.99, "Electronics", 60),
+    ("GoPro Hero 12", 399.99, "Cameras", 22),
+    ("DJI Mini 3 Drone", 759.99, "Cameras", 8),
+    ("Bose QuietComfort Earbuds", 299.99, "Audio", 45),
+    ('LG OLED TV 55"', 1799.99, "Electronics", 7),
+    ("Samsung 4K Monitor", 399.99, "Electronics", 28),
+    ("Logitech MX Master 3S Mouse", 99.99, "Accessories", 100),
+    ("Mechanical Keyboard RGB", 149.99, "Accessories", 55),
+    ("Webcam Logitech C920", 79.99, "Accessories", 65),
+    ("External SSD 1TB", 129.99, "Storage", 70),
+    ("Portable Charger 20000mAh", 49.99, "Accessories", 120),
+    ("USB-C Hub Multiport", 59.99, "Accessories", 90),
+    ("Ring Video Doorbell", 99.99, "Smart Home", 42),
+    ("Amazon Echo Dot", 49.99, "Smart Home", 150),
+    ("Philips Hue Starter Kit", 199.99, "Smart Home", 33),
+]
+
+COLUMNS = ("id", "name", "price", "category", "stock", "created_at")
+
+
+class StandInServer:
+    """
+    Réplica local de server-sqlite.js para probar y medir el DAST sin Node:
+    mismas rutas de productos, mismo SQL armado por concatenación (así que
+    es vulnerable igual que el original) y mismas respuestas de error,
+    sobre SQLite en memoria. latency agrega una demora fija por solicitud
+    (red + base de datos). Habla HTTP/1.1 con keep-alive.
+
+        with StandInServer(latency=0.05) as server:
+            ... server.base_url ...
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._create_products()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_class(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _create_products(self) -> None:
+        self._db.execute(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,"
+            " price REAL NOT NULL, category TEXT NOT NULL, stock INTEGER NOT NULL DEFAULT 0,"
+            " created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        self._db.executemany("INSERT INTO products (name, price, category, stock) VALUES (?, ?, ?, ?)",
+                             SAMPLE_PRODUCTS)
+        self._db.commit()
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._db.close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def query(self, sql: str) -> Tuple[list, int]:
+        """Ejecuta el SQL tal cual (como db.queryAsync/runAsync); devuelve filas y lastrowid."""
+        with self._db_lock:
+            cursor = self._db.execute(sql)
+            rows = [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+            self._db.commit()
+            return rows, cursor.lastrowid
+
+
+def _sqlite_error(e: sqlite3.Error) -> str:
+    # Formato de los mensajes de node-sqlite3
+    return f"SQLITE_ERROR: {e}"
+
+
+def _handler_class(server: StandInServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def setup(self) -> None:
+            super().setup()
+            # Como Node: sin Nagle, así encabezados y cuerpo no esperan al ACK retardado
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            server.connections += 1
+
+        def _send(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _begin(self) -> Tuple[str, dict]:
+            server.requests += 1
+            if server.latency:
+                time.sleep(server.latency)
+            parts = urlsplit(self.path)
+            return parts.path, parse_qs(parts.query)
+
+        def do_GET(self) -> None:
+            path, query = self._begin()
+            if path == "/health":
+                return self._send(200, {"status": "ok"})
+            if path == "/api/products":
+                rows, _ = server.query("SELECT * FROM products ORDER BY id")
+                return self._send(200, {"success": True, "count": len(rows), "data": rows})
+            if path == "/api/products/search":
+                term = query.get("name", [""])[0]
+                try:
+                    rows, _ = server.query(f"SELECT * FROM products WHERE name LIKE '%{term}%'")
+                except sqlite3.Error as e:
+                    message = _sqlite_error(e)
+                    return self._send(500, {"success": False, "message": "Error en la consulta",
+                                            "error": message, "stack": f"Error: {message}\n    at Statement.all"})
+                return self._send(200, {"success": True, "count": len(rows), "data": rows})
+            if path.startswith("/api/products/"):
+                product_id = unquote(path[len("/api/products/"):])
+                try:
+                    rows, _ = server.query(f"SELECT * FROM products WHERE id = {product_id}")
+                except sqlite3.Error as e:
+                    return self._send(500, {"success": False, "message": "Error al obtener producto",
+                                            "error": _sqlite_error(e)})
+                if not rows:
+                    return self._send(404, {"success": False, "message": "Producto no encontrado"})
+                return self._send(200, {"success": True, "data": rows[0]})
+            self._send(404, {"success": False, "message": "Ruta no encontrada"})
+
+        def do_POST(self) -> None:
+            path, _ = self._begin()
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                data = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"success": False, "message": "JSON inválido"})
+            if path != "/api/products":
+                return self._send(404, {"success": False, "message": "Ruta no encontrada"})
+            name, price, category, stock = (data.get(k) for k in ("name", "price", "category", "stock"))
+            query = f"INSERT INTO products (name, price, category, stock) VALUES ('{name}', {price}, '{category}', {stock})"
+            try:
+                _, last_id = server.query(query)
+            except sqlite3.Error as e:
+                return self._send(500, {"success": False, "message": "Error al crear producto",
+                                        "error": _sqlite_error(e), "query": query})
+            self._send(201, {"success": True, "message": "Producto creado exitosamente",
+                             "data": {"id": last_id, "name": name, "price": price, "category": category,
+                                      "stock": stock}})
+
+    return Handler
@@ -0,0 +1,247 @@
+# dast_timing.py
+
+from statistics import NormalDist, median
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import math
+import random
+import time
+
+from dast_engine import TransportError
+from dast_payloads import CorpusError, Family, Target, send_request
+
+
+class TimingPolicy(NamedTuple):
+    """Parámetros de la detección por tiempo (tiempos en segundos)."""
+    # Nivel de significancia de la prueba (una cola)
+    alpha: float = 0.01
+    # Potencia buscada al elegir cuántas muestras tomar
+    power: float = 0.9
+    # Demora mínima que se considera causada por el payload
+    min_delay: float = 0.1
+    # Muestras por brazo (control / demora): mínimo y tope
+    min_samples: int = 5
+    max_samples: int = 24
+    # Línea base: muestras mínimas y máximas, y error relativo buscado para su mediana
+    baseline_min: int = 5
+    baseline_max: int = 30
+    precision: float = 0.1
+
+
+class LatencyProfile(NamedTuple):
+    """Distribución de latencias de un endpoint: mediana y dispersión robusta (1,4826 · MAD)."""
+    samples: Tuple[float, ...]
+    median: float
+    spread: float
+
+    @classmethod
+    def of(cls, samples: Sequence[float]) -> "LatencyProfile":
+        center = median(samples)
+        mad = median(abs(s - center) for s in samples)
+        return cls(tuple(samples), center, 1.4826 * mad)
+
+    @property
+    def median_error(self) -> float:
+        """Error estándar aproximado de la mediana."""
+        return 1.2533 * self.spread / math.sqrt(len(self.samples))
+
+
+def mann_whitney_greater(slow: Sequence[float], fast: Sequence[float]) -> float:
+    """
+    p-valor de Mann-Whitney U (aproximación normal, con corrección por
+    empates y de continuidad) para "slow es mayor que fast". No asume
+    normalidad: las latencias tienen colas largas.
+    """
+    n1, n2 = len(slow), len(fast)
+    ranked = sorted([(v, 0) for v in slow] + [(v, 1) for v in fast])
+    rank_sum, ties, i = 0.0, 0.0, 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        # Rango promedio del grupo de empatados (rangos desde 1)
+        average = (i + j) / 2 + 1
+        rank_sum += average * sum(1 for k in range(i, j + 1) if ranked[k][1] == 0)
+        size = j - i + 1
+        ties += size ** 3 - size
+        i = j + 1
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 1 - NormalDist().cdf(z)
+
+
+def required_samples(profile: LatencyProfile, policy: TimingPolicy) -> int:
+    """
+    Muestras por brazo para detectar una demora de min_delay con la
+    dispersión observada (aproximación normal, corregida por la eficiencia
+    relativa de Mann-Whitney, 3/π). Objetivo silencioso: el mínimo;
+    ruidoso: más muestras, hasta max_samples.
+    """
+    z = NormalDist().inv_cdf
+    effect = policy.min_delay / max(profile.spread, 1e-4)
+    n = 2 * ((z(1 - policy.alpha) + z(policy.power)) / effect) ** 2 / (3 / math.pi)
+    return max(policy.min_samples, min(policy.max_samples, math.ceil(n)))
+
+
+class TimingVerdict(NamedTuple):
+    target: str
+    parameter: str
+    # URL con el payload de demora
+    url: str
+    payload: str
+    control: str
+    vulnerable: bool
+    p_value: float
+    # Diferencia de medianas demora - control (segundos)
+    shift: float
+    # Muestras por brazo del par decisivo
+    samples: int
+    # None si el endpoint falló antes de tener línea base
+    baseline: Optional[LatencyProfile]
+    error: Optional[BaseException] = None
+
+
+class TimingDetector:
+    """
+    Detección de inyección ciega por tiempo. Para cada endpoint (destino y
+    parámetro) arma una línea base de latencias con muestras adaptativas
+    y, con su dispersión, elige cuántas muestras tomar. Luego alterna en
+    orden aleatorio el payload de control (misma sintaxis, sin trabajo) y
+    el de demora, y decide con Mann-Whitney: vulnerable si la demora es
+    significativa y de al menos min_delay. Corta antes si el resultado ya
+    es claro, así un objetivo silencioso se resuelve con pocas muestras.
+
+    Los endpoints se miden en paralelo pero sin interferir: dentro de un
+    endpoint las muestras son secuenciales, y un payload de demora se envía
+    en un bloque exclusivo del AsyncHttpClient, así no se solapa con
+    ninguna otra solicitud del cliente (muestras de otros endpoints ni
+    sondas del Fuzzer que corren a la vez), que de otro modo esperarían a
+    la consulta costosa en el servidor y parecerían lentas.
+    Las latencias son las del cliente (perf_counter, monótono): desde el
+    envío hasta el primer byte, sin contar la conexión. Un payload de
+    demora se envía sin reintentos (cada reintento repetiría la consulta
+    costosa) y, si agota el timeout de lectura, cuenta como una muestra
+    lenta de al menos ese timeout; como la consulta sigue corriendo en el
+    servidor, el bloque exclusivo se mantiene otro tanto antes de soltarlo.
+    Un endpoint que falla por transporte queda con error en su veredicto
+    sin detener a los demás.
+    """
+
+    def __init__(self, base_url: str, policy: Optional[TimingPolicy] = None):
+        self.base_url = base_url.rstrip("/")
+        self.policy = policy or TimingPolicy()
+        self.endpoints = 0
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def policy_for(self, family: Family) -> TimingPolicy:
+        """La política del detector con los ajustes "timing" de la familia."""
+        unknown = set(family.timing or {}) - set(TimingPolicy._fields)
+        if unknown:
+            raise CorpusError(f"Familia {family.name}: ajustes de tiempo desconocidos: {sorted(unknown)}")
+        return self.policy._replace(**(family.timing or {}))
+
+    async def _measure(self, http: Any, target: Target, parameter: str, payload: Any, delay: bool) -> float:
+        path, body = target.request(parameter, payload)
+        if not delay:
+            response = await send_request(http, target.method, self.base_url + path, body)
+            self.requests += 1
+            return response.timing.ttfb - response.timing.connect
+        async with http.exclusive():
+            start = time.perf_counter()
+            try:
+                response = await send_request(http, target.method, self.base_url + path, body, attempts=1)
+            except TransportError as e:
+                if not e.timed_out or e.phase == "connect":
+                    raise
+                # La consulta costosa superó el timeout: la muestra es al menos así de lenta
+                elapsed = time.perf_counter() - start
+                self.requests += 1
+                self.timeouts += 1
+                await asyncio.sleep(elapsed)
+                return elapsed
+        self.requests += 1
+        return response.timing.ttfb - response.timing.connect
+
+    async def profile(self, http: Any, target: Target, parameter: str, policy: TimingPolicy) -> LatencyProfile:
+        """Latencias con el valor normal del parámetro hasta que la mediana es precisa (o baseline_max)."""
+        samples: List[float] = []
+        while True:
+            samples.append(await self._measure(http, target, parameter, target.default(parameter), False))
+            if len(samples) < policy.baseline_min:
+                continue
+            profile = LatencyProfile.of(samples)
+            # Precisión relativa a la demora buscada si el endpoint es muy rápido
+            scale = max(profile.median, policy.min_delay)
+            if profile.median_error <= policy.precision * scale or len(samples) >= policy.baseline_max:
+                return profile
+
+    async def _compare(self, http: Any, target: Target, parameter: str, payload: str, control: str,
+                       baseline: LatencyProfile, policy: TimingPolicy) -> TimingVerdict:
+        url = self.base_url + target.request(parameter, payload)[0]
+        slow: List[float] = []
+        fast: List[float] = []
+        p_value, shift = 1.0, 0.0
+        while True:
+            # Orden aleatorio en cada ronda: la carga ajena afecta a ambos brazos por igual
+            for delay in random.sample((True, False), 2):
+                latency = await self._measure(http, target, parameter, payload if delay else control, delay)
+                (slow if delay else fast).append(latency)
+            if len(slow) < policy.min_samples:
+                continue
+            p_value = mann_whitney_greater(slow, fast)
+            shift = median(slow) - median(fast)
+            if p_value < policy.alpha and shift >= policy.min_delay:
+                return TimingVerdict(target.name, parameter, url, payload, control, True, p_value, shift,
+                                     len(slow), baseline)
+            # Sin rastro de demora: no hace falta seguir midiendo
+            futile = shift < policy.min_delay / 4 and p_value > 0.2
+            # El ruido de los controles actualiza cuántas muestras hacen falta
+            needed = required_samples(LatencyProfile.of(baseline.samples + tuple(fast)), policy)
+            if futile or len(slow) >= needed:
+                return TimingVerdict(target.name, parameter, url, payload, control, False, p_value, shift,
+                                     len(slow), baseline)
+
+    async def probe_endpoint(self, http: Any, family: Family, target: Target, parameter: str,
+                             policy: TimingPolicy) -> TimingVerdict:
+        """
+        Prueba los pares de la familia en un endpoint hasta que uno demora
+        la respuesta. Una falla de transporte queda en el veredicto (error).
+        """
+        baseline = None
+        payload, control = family.payloads[0], family.controls[0]
+        try:
+            baseline = await self.profile(http, target, parameter, policy)
+            verdict = None
+            for payload, control in zip(family.payloads, family.controls):
+                verdict = await self._compare(http, target, parameter, payload, control, baseline, policy)
+                if verdict.vulnerable:
+                    break
+            return verdict
+        except ConnectionError as e:
+            self.errors += 1
+            url = self.base_url + target.request(parameter, payload)[0]
+            return TimingVerdict(target.name, parameter, url, payload, control, False, 1.0, 0.0, 0, baseline, e)
+
+    async def run_family(self, family: Family, http: Any) -> List[TimingVerdict]:
+        """
+        Todos los endpoints de la familia en paralelo; veredictos en el
+        orden del corpus. Si todos fallaron, relanza el primer error.
+        """
+        policy = self.policy_for(family)
+        endpoints = [(target, parameter) for target in family.targets for parameter in target.inject]
+        self.endpoints += len(endpoints)
+        verdicts = list(await asyncio.gather(*(self.probe_endpoint(http, family, target, parameter, policy)
+                                               for target, parameter in endpoints)))
+        if verdicts and all(verdict.error is not None for verdict in verdicts):
+            raise verdicts[0].error
+        return verdicts
+
+    def stats(self) -> Dict[str, int]:
+        return {"endpoints": self.endpoints, "requests": self.requests, "timeouts": self.timeouts,
+                "errors": self.errors}
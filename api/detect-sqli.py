@@ -1,34 +1,29 @@
 
-import re
-import json
+import argparse
+import contextlib
+import os
+import signal
+import subprocess
+import sys
+import time
 
-def analyze_sql_injection(filename):
+from sast_cache import ScanCache
+from sast_diff import scan_diff
+from sast_engine import DEFAULT_MATCHER
+from sast_reporters import REPORTERS, build_reporters
+from sast_scanner import iter_scan_files, iter_source_files, scan_source
+from sast_watch import Watcher, make_backend
+
+DEFAULT_CACHE_PATH = '.sast-cache.db'
+
+def analyze_sql_injection(filename, matcher=DEFAULT_MATCHER, multiline=False, taint=False):
     
     vulnerabilities = []
     
-    patterns = [
-        (r'`SELECT.*\$\{.*\}.*`', 'SQL Injection en SELECT'),
-        (r'`INSERT.*\$\{.*\}.*`', 'SQL Injection en INSERT'),
-        (r'`UPDATE.*\$\{.*\}.*`', 'SQL Injection en UPDATE'),
-        (r'`DELETE.*\$\{.*\}.*`', 'SQL Injection en DELETE'),
-        (r'`.*WHERE.*\$\{.*\}.*`', 'SQL Injection en WHERE clause'),
-        (r'`.*ORDER BY.*\$\{.*\}.*`', 'SQL Injection en ORDER BY'),
-    ]
-    
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        for line_num, line in enumerate(lines, 1):
-            for pattern, description in patterns:
-                if re.search(pattern, line):
-                    vulnerabilities.append({
-                        'line': line_num,
-                        'code': line.strip(),
-                        'type': description,
-                        'severity': 'CRITICAL',
-                        'cwe': 'CWE-89'
-                    })
+        # Reglas por línea (ver sast_engine.py) y análisis opcionales
+        # (literales multilínea y flujo de datos) en una sola lectura
+        vulnerabilities.extend(scan_source(filename, multiline, taint, matcher)[0])
                     
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo {filename}")
@@ -36,45 +31,176 @@ def analyze_sql_injection(filename):
     
     return vulnerabilities
 
+def report_formats(value):
+    """Tipo de --format: lista separada por coma, cada formato entre los conocidos."""
+    formats = [fmt.strip() for fmt in value.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in REPORTERS]
+    if unknown or not formats:
+        invalid = ', '.join(unknown) if unknown else repr(value)
+        raise argparse.ArgumentTypeError(f"formato inválido: {invalid} (opciones: {', '.join(REPORTERS)})")
+    return formats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detector SAST de SQL Injection")
+    parser.add_argument("targets", nargs="*",
+                        help="Archivos, directorios o patrones glob (por defecto: server-sqlite.js, "
+                             "o el directorio actual con --diff-base)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Número de procesos para analizar en paralelo (0 = todos los núcleos)")
+    parser.add_argument("--exclude", action="append", default=[],
+                        help="Patrón glob de rutas a ignorar (se puede repetir)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, default=None,
+                        help=f"Usar caché incremental en disco en modo directorio (por defecto: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--cache-max-mb", type=int, default=64,
+                        help="Tamaño máximo de la caché en MB antes de desalojar entradas")
+    parser.add_argument("--diff-base", metavar="REV",
+                        help="Analizar solo las líneas agregadas/modificadas respecto a REV (git diff)")
+    parser.add_argument("--multiline", action="store_true",
+                        help="Analizar además template literals completos (consultas en varias líneas)")
+    parser.add_argument("--format", default="json,text", type=report_formats,
+                        help="Reportes a generar, separados por coma: json, text, ndjson, sarif "
+                             "(por defecto: json,text)")
+    parser.add_argument("--taint", action="store_true",
+                        help="Seguir SQL armado por concatenación entre sentencias hasta db.all/run/...")
+    parser.add_argument("--watch", action="store_true",
+                        help="Quedarse vigilando los archivos y re-analizar solo los que cambian")
+    parser.add_argument("--watch-backend", choices=["auto", "inotify", "poll"], default="auto",
+                        help="Cómo detectar cambios en modo watch (por defecto: inotify si está disponible)")
+    parser.add_argument("--watch-interval", type=float, default=0.5,
+                        help="Segundos entre revisiones con el backend de polling")
+    return parser.parse_args()
+
+def iter_diff_findings(args):
+    # Modo PR: solo las líneas que toca el diff contra la revisión base
+    targets = args.targets or ['.']
+    print(f"\nAnalizando cambios respecto a: {args.diff_base}")
+    print("-"*60)
+    try:
+        vulnerabilities, errors = scan_diff(args.diff_base, targets, exclude=args.exclude,
+                                             multiline=args.multiline, taint=args.taint)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, 'stderr', None) or e
+        print(f"Error: No se pudo obtener el diff de git: {stderr}")
+        # Sin diff no hay análisis: un gate de PR no debe pasar con 0 hallazgos
+        sys.exit(2)
+    for filename, error in errors:
+        print(f"Error: No se pudo analizar {filename}: {error}")
+    yield from vulnerabilities
+
+def iter_directory_findings(args, jobs):
+    filenames = iter_source_files(args.targets, exclude=args.exclude)
+    print(f"\nAnalizando: {len(filenames)} archivos ({jobs} procesos)")
+    print("-"*60)
+    start = time.perf_counter()
+    cache = None
+    with contextlib.ExitStack() as stack:
+        if args.cache:
+            # Los análisis opcionales producen otros hallazgos: no comparten entradas
+            ruleset_version = (DEFAULT_MATCHER.ruleset_version
+                               + ("-multiline" if args.multiline else "")
+                               + ("-taint" if args.taint else ""))
+            cache = stack.enter_context(ScanCache(args.cache, ruleset_version,
+                                                  max_bytes=args.cache_max_mb * 1024 * 1024))
+        for filename, findings, error in iter_scan_files(filenames, jobs=jobs, cache=cache,
+                                                         multiline=args.multiline, taint=args.taint):
+            if error is not None:
+                print(f"Error: No se pudo analizar {filename}: {error}")
+                continue
+            for finding in findings:
+                yield {'file': filename, **finding}
+    print(f"\nTiempo de análisis: {time.perf_counter() - start:.2f} s")
+    if cache is not None:
+        print(f"Caché: {cache.hits} aciertos, {cache.misses} fallos, "
+              f"{cache.evictions} desalojos ({args.cache})")
+
+def run_watch(args, jobs):
+    # Modo watch: las reglas compiladas y los hallazgos por archivo quedan en
+    # memoria; cada cambio re-analiza solo los archivos guardados.
+    targets = args.targets or ['.']
+    watcher = Watcher(targets, args.format, exclude=args.exclude,
+                      multiline=args.multiline, taint=args.taint)
+    start = time.perf_counter()
+    for filename, error in watcher.initial_scan(jobs):
+        print(f"Error: No se pudo analizar {filename}: {error}")
+    print(f"\nAnálisis inicial: {len(watcher.results)} archivos, {watcher.total} vulnerabilidades "
+          f"({time.perf_counter() - start:.2f} s)")
+
+    backend = make_backend(args.watch_backend, targets, args.exclude, args.watch_interval)
+    print(f"Vigilando cambios ({backend.name}). Ctrl+C para salir.")
+    print("-"*60)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    try:
+        while True:
+            for filename, count, latency in watcher.update(backend.wait()):
+                if count < 0:
+                    print(f"🗑  {filename}: eliminado")
+                    continue
+                status = "✅" if count == 0 else "🚨"
+                timing = f" (guardado → resultado: {latency * 1000:.0f} ms)" if latency is not None else ""
+                print(f"{status} {filename}: {count} vulnerabilidades{timing}")
+            print(f"   Total: {watcher.total} vulnerabilidades")
+    except KeyboardInterrupt:
+        print("\nModo watch finalizado.")
+    finally:
+        backend.close()
+
 def main():
-    filename = 'server-sqlite.js'
+    args = parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
     print("="*60)
     print("ANÁLISIS SAST - SQL INJECTION DETECTOR")
     print("="*60)
-    print(f"\nAnalizando: {filename}")
-    print("-"*60)
     
-    vulnerabilities = analyze_sql_injection(filename)
+    if args.watch:
+        run_watch(args, jobs)
+        return
     
-    if vulnerabilities:
-        print(f"\n🚨 Se encontraron {len(vulnerabilities)} vulnerabilidades:\n")
-        
-        for i, vuln in enumerate(vulnerabilities, 1):
-            print(f"{i}. Línea {vuln['line']}: {vuln['type']}")
+    default_file = None
+    if args.diff_base:
+        vulnerabilities = iter_diff_findings(args)
+    elif not args.targets or (len(args.targets) == 1 and os.path.isfile(args.targets[0])):
+        # Modo clásico: un solo archivo, mismo reporte que siempre
+        default_file = args.targets[0] if args.targets else 'server-sqlite.js'
+        print(f"\nAnalizando: {default_file}")
+        print("-"*60)
+        vulnerabilities = analyze_sql_injection(default_file, multiline=args.multiline,
+                                                taint=args.taint)
+    else:
+        vulnerabilities = iter_directory_findings(args, jobs)
+    
+    # Los reportes se escriben a medida que llegan los hallazgos; si el
+    # proceso recibe SIGTERM (ej. timeout de CI) se cierran igual.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    reporters = build_reporters(args.format, default_file)
+    total = 0
+    complete = False
+    try:
+        for vuln in vulnerabilities:
+            total += 1
+            if total == 1:
+                print("\n🚨 Vulnerabilidades encontradas:\n")
+            print(f"{total}. Línea {vuln['line']}: {vuln['type']}")
+            if 'file' in vuln:
+                print(f"   Archivo: {vuln['file']}")
             print(f"   Severidad: {vuln['severity']}")
             print(f"   CWE: {vuln['cwe']}")
             print(f"   Código: {vuln['code'][:80]}...")
             print()
-        
-        with open('sast-results.json', 'w', encoding='utf-8') as f:
-            json.dump(vulnerabilities, f, indent=2)
-        print(f"✅ Resultados guardados en: sast-results.json")
-        
-        with open('sast-results.txt', 'w', encoding='utf-8') as f:
-            f.write("ANÁLISIS SAST - SQL INJECTION DETECTOR\n")
-            f.write("="*60 + "\n\n")
-            for i, vuln in enumerate(vulnerabilities, 1):
-                f.write(f"{i}. Línea {vuln['line']}: {vuln['type']}\n")
-                f.write(f"   Severidad: {vuln['severity']}\n")
-                f.write(f"   CWE: {vuln['cwe']}\n")
-                f.write(f"   Código: {vuln['code']}\n\n")
-        print(f"✅ Resultados guardados en: sast-results.txt")
-        
-    else:
+            for reporter in reporters:
+                reporter.write(vuln)
+        complete = True
+    finally:
+        for reporter in reporters:
+            reporter.close(complete)
+    
+    if total == 0:
         print("\n✅ No se encontraron vulnerabilidades.")
+    for reporter in reporters:
+        if reporter.written:
+            print(f"✅ Resultados guardados en: {reporter.path}")
     
     print("\n" + "="*60)
-    print(f"Total de vulnerabilidades encontradas: {len(vulnerabilities)}")
+    print(f"Total de vulnerabilidades encontradas: {total}")
     print("="*60)
 
 if __name__ == '__main__':
@@ -0,0 +1,357 @@
+# js_lexer.py
+
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+import codecs
+import io
+import mmap
+import os
+import re
+
+
+# Palabras clave que usan las reglas SAST (sensibles a mayúsculas, como PATTERNS)
+LEADING_KEYWORDS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+INNER_KEYWORDS = ("WHERE", "ORDER BY")
+
+# Máximo de caracteres que se guardan de cada literal para el reporte
+SNIPPET_LENGTH = 120
+
+# Archivos a partir de este tamaño se leen con mmap (si no se indica otra cosa)
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+_TAIL_LENGTH = max(len(k) for k in INNER_KEYWORDS) - 1
+_HEAD_LENGTH = max(len(k) for k in LEADING_KEYWORDS)
+
+# Estados del lexer
+CODE, TEMPLATE, SINGLE_QUOTE, DOUBLE_QUOTE, LINE_COMMENT, BLOCK_COMMENT = range(6)
+
+# Siguiente carácter relevante en cada estado; el resto se salta en bloque
+_NEXT_SPECIAL = {
+    CODE: re.compile(r"[`'\"/{}]"),
+    TEMPLATE: re.compile(r"[`\\$]"),
+    SINGLE_QUOTE: re.compile(r"[\\'\n]"),
+    DOUBLE_QUOTE: re.compile(r"[\\\"\n]"),
+}
+
+
+@dataclass
+class TemplateLiteral:
+    """
+    Resumen de un template literal (`...`) sin guardar su contenido completo:
+    - start_line: línea donde está el backtick de apertura
+    - end_line: línea del backtick de cierre
+    - interpolations: cantidad de ${...}
+    - keywords_before_interpolation: palabras de INNER_KEYWORDS que aparecen
+      en el texto estático antes de alguna interpolación
+    - head: primeros caracteres del contenido (para SELECT/INSERT/... al inicio)
+    - snippet: texto abreviado del literal, con las interpolaciones como ${…}
+    """
+    start_line: int
+    end_line: int = 0
+    interpolations: int = 0
+    keywords_before_interpolation: Set[str] = field(default_factory=set)
+    head: str = ""
+    snippet: str = ""
+
+    # Estado interno mientras el literal está abierto
+    _tail: str = field(default="", init=False, repr=False)
+    _seen: Set[str] = field(default_factory=set, init=False, repr=False)
+
+    def _add_static(self, text: str) -> None:
+        if len(self.head) < _HEAD_LENGTH:
+            self.head += text[:_HEAD_LENGTH - len(self.head)]
+        if len(self.snippet) < SNIPPET_LENGTH:
+            self.snippet += text[:SNIPPET_LENGTH - len(self.snippet)]
+
+        # Ventana = cola anterior + texto nuevo: detecta palabras partidas
+        # entre chunks sin retener el literal completo.
+        window = self._tail + text
+        for keyword in INNER_KEYWORDS:
+            if keyword in window:
+                self._seen.add(keyword)
+        self._tail = window[-_TAIL_LENGTH:]
+
+    def _add_interpolation(self) -> None:
+        self.interpolations += 1
+        self.keywords_before_interpolation |= self._seen
+        if len(self.head) < _HEAD_LENGTH:
+            self.head += "${"
+        if len(self.snippet) < SNIPPET_LENGTH:
+            self.snippet += "${…}"
+        # 'WH${x}ERE' no contiene WHERE: la cola se reinicia
+        self._tail = ""
+
+
+class TemplateLiteralLexer:
+    """
+    Lexer incremental de JavaScript que solo sigue lo necesario para
+    encontrar template literals: strings, comentarios, backticks y el
+    anidamiento de ${ ... } (con sus llaves internas y literales anidados).
+
+    Se alimenta por chunks con feed() y conserva el estado entre chunks, así
+    que un literal puede ocupar varias líneas o cruzar el borde de un chunk.
+    La memoria es acotada: por cada literal abierto solo se guarda un resumen
+    de tamaño fijo (TemplateLiteral), nunca su texto completo.
+
+    Limitación conocida: las expresiones regulares literales (/.../) no se
+    reconocen; un backtick o comilla dentro de una regex puede confundir al lexer.
+    """
+
+    def __init__(self):
+        self.line = 1
+        self.state = CODE
+        self._carry = ""
+        # Literales abiertos (el último es el más interno)
+        self._literals: List[TemplateLiteral] = []
+        # Profundidad de llaves dentro de cada ${ ... } abierto
+        self._brace_depths: List[int] = []
+
+    def feed(self, text: str, final: bool = False) -> List[TemplateLiteral]:
+        """Procesa un chunk y devuelve los literales que se cerraron en él."""
+        buf = self._carry + text
+        self._carry = ""
+        closed: List[TemplateLiteral] = []
+        pos = 0
+        end = len(buf)
+
+        while pos < end:
+            state = self.state
+
+            if state == LINE_COMMENT:
+                idx = buf.find("\n", pos)
+                if idx == -1:
+                    pos = end
+                    break
+                self.line += 1
+                pos = idx + 1
+                self.state = CODE
+                continue
+
+            if state == BLOCK_COMMENT:
+                idx = buf.find("*/", pos)
+                if idx == -1:
+                    # Un '*' final puede cerrar el comentario en el siguiente chunk
+                    stop = end - 1 if buf.endswith("*") and not final else end
+                    self.line += buf.count("\n", pos, stop)
+                    self._carry = buf[stop:]
+                    pos = end
+                    break
+                self.line += buf.count("\n", pos, idx)
+                pos = idx + 2
+                self.state = CODE
+                continue
+
+            m = _NEXT_SPECIAL[state].search(buf, pos)
+            if m is None:
+                self._consume_plain(buf, pos, end)
+                pos = end
+                break
+
+            idx = m.start()
+            ch = buf[idx]
+            self._consume_plain(buf, pos, idx)
+
+            # Caracteres que necesitan ver el siguiente: si están al final del
+            # buffer se guardan para el próximo chunk.
+            needs_lookahead = ch == "\\" or (ch == "$" and state == TEMPLATE) or (ch == "/" and state == CODE)
+            if needs_lookahead and idx + 1 >= end and not final:
+                self._carry = buf[idx:]
+                pos = end
+                break
+            nxt = buf[idx + 1] if idx + 1 < end else ""
+
+            if state == CODE:
+                pos = self._handle_code(ch, nxt, idx)
+            elif state == TEMPLATE:
+                pos = self._handle_template(ch, nxt, idx, closed)
+            else:
+                pos = self._handle_quote(ch, nxt, idx)
+
+        if final:
+            # Literales sin cerrar al final del archivo se descartan
+            self._literals.clear()
+            self._brace_depths.clear()
+
+        return closed
+
+    def _consume_plain(self, buf: str, start: int, stop: int) -> None:
+        if start >= stop:
+            return
+        if self.state == TEMPLATE:
+            self._literals[-1]._add_static(buf[start:stop])
+        self.line += buf.count("\n", start, stop)
+
+    def _handle_code(self, ch: str, nxt: str, idx: int) -> int:
+        if ch == "`":
+            self._literals.append(TemplateLiteral(start_line=self.line))
+            self.state = TEMPLATE
+        elif ch == "'":
+            self.state = SINGLE_QUOTE
+        elif ch == '"':
+            self.state = DOUBLE_QUOTE
+        elif ch == "/":
+            if nxt == "/":
+                self.state = LINE_COMMENT
+                return idx + 2
+            if nxt == "*":
+                self.state = BLOCK_COMMENT
+                return idx + 2
+        elif ch == "{":
+            if self._brace_depths:
+                self._brace_depths[-1] += 1
+        elif ch == "}":
+            if self._brace_depths:
+                if self._brace_depths[-1] == 0:
+                    # Fin de ${ ... }: volvemos al literal que lo contiene
+                    self._brace_depths.pop()
+                    self.state = TEMPLATE
+                else:
+                    self._brace_depths[-1] -= 1
+        return idx + 1
+
+    def _handle_template(self, ch: str, nxt: str, idx: int, closed: List[TemplateLiteral]) -> int:
+        literal = self._literals[-1]
+        if ch == "`":
+            literal.end_line = self.line
+            closed.append(self._literals.pop())
+            self.state = CODE
+            return idx + 1
+        if ch == "\\":
+            # Secuencia de escape: se conserva cruda como texto estático
+            literal._add_static(ch + nxt)
+            if nxt == "\n":
+                self.line += 1
+            return idx + 2
+        if nxt == "{":
+            literal._add_interpolation()
+            self._brace_depths.append(0)
+            self.state = CODE
+            return idx + 2
+        literal._add_static(ch)
+        return idx + 1
+
+    def _handle_quote(self, ch: str, nxt: str, idx: int) -> int:
+        if ch == "\\":
+            if nxt == "\n":
+                self.line += 1
+            return idx + 2
+        if ch == "\n":
+            # String sin cerrar: JS no permite saltos de línea, lo damos por terminado
+            self.line += 1
+        self.state = CODE
+        return idx + 1
+
+
+def iter_decoded_chunks(
+    filename: str,
+    chunk_size: int = 64 * 1024,
+    use_mmap: Optional[bool] = None,
+) -> Iterator[Tuple[bytes, str]]:
+    """
+    Lee el archivo una sola vez en chunks y genera (bytes crudos, texto).
+    El texto es UTF-8 con saltos de línea universales (igual que
+    open(..., 'r')); un carácter o un CRLF partido entre chunks se entrega
+    completo en el chunk siguiente, así que el texto puede venir vacío.
+    Con mmap el sistema operativo pagina el archivo y solo se decodifica un
+    chunk a la vez.
+    """
+    size = os.path.getsize(filename)
+    if use_mmap is None:
+        use_mmap = size >= MMAP_THRESHOLD
+
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    with open(filename, 'rb') as f:
+        if not use_mmap or size == 0:
+            while True:
+                raw = f.read(chunk_size)
+                yield raw, decoder.decode(raw, final=not raw)
+                if not raw:
+                    return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, size, chunk_size):
+                raw = mm[offset:offset + chunk_size]
+                yield raw, decoder.decode(raw, final=offset + chunk_size >= size)
+
+
+def _iter_chunks(filename: str, chunk_size: int, use_mmap: Optional[bool]) -> Iterator[str]:
+    """Solo el texto de iter_decoded_chunks, sin chunks vacíos."""
+    for _, chunk in iter_decoded_chunks(filename, chunk_size, use_mmap):
+        if chunk:
+            yield chunk
+
+
+def iter_template_literals(
+    filename: str,
+    chunk_size: int = 64 * 1024,
+    use_mmap: Optional[bool] = None,
+) -> Iterator[TemplateLiteral]:
+    """Genera los template literals del archivo a medida que se cierran."""
+    lexer = TemplateLiteralLexer()
+    for chunk in _iter_chunks(filename, chunk_size, use_mmap):
+        yield from lexer.feed(chunk)
+    yield from lexer.feed("", final=True)
+
+
+def classify_literal(literal: TemplateLiteral) -> List[str]:
+    """
+    Aplica las reglas SAST al literal completo (aunque ocupe varias líneas)
+    y devuelve las descripciones en el mismo orden que PATTERNS.
+    """
+    if literal.interpolations == 0:
+        return []
+
+    descriptions = [
+        f"SQL Injection en {keyword}"
+        for keyword in LEADING_KEYWORDS
+        if literal.head.startswith(keyword)
+    ]
+    if "WHERE" in literal.keywords_before_interpolation:
+        descriptions.append("SQL Injection en WHERE clause")
+    if "ORDER BY" in literal.keywords_before_interpolation:
+        descriptions.append("SQL Injection en ORDER BY")
+    return descriptions
+
+
+def literal_findings(literals: Iterable[TemplateLiteral]) -> List[dict]:
+    """Convierte literales en hallazgos, reportados en su línea de inicio."""
+    vulnerabilities = []
+    for literal in literals:
+        for description in classify_literal(literal):
+            vulnerabilities.append({
+                'line': literal.start_line,
+                'code': "`" + " ".join(literal.snippet.split()),
+                'type': description,
+                'severity': 'CRITICAL',
+                'cwe': 'CWE-89'
+            })
+
+    # Los literales anidados se cierran antes que el externo
+    vulnerabilities.sort(key=lambda v: v['line'])
+    return vulnerabilities
+
+
+def analyze_template_literals(
+    filename: str,
+    chunk_size: int = 64 * 1024,
+    use_mmap: Optional[bool] = None,
+) -> List[dict]:
+    """
+    Hallazgos a nivel de template literal. Detecta consultas partidas en
+    varias líneas que el análisis por línea no ve.
+    """
+    return literal_findings(iter_template_literals(filename, chunk_size, use_mmap))
+
+
+def merge_findings(line_findings: List[dict], multiline_findings: List[dict]) -> List[dict]:
+    """
+    Agrega a los hallazgos por línea los de literales multilínea que no
+    estén ya reportados con la misma (línea, tipo). Los hallazgos por línea
+    se conservan tal cual.
+    """
+    seen = {(v['line'], v['type']) for v in line_findings}
+    extra = [v for v in multiline_findings if (v['line'], v['type']) not in seen]
+    if not extra:
+        return line_findings
+    # sort es estable: dentro de una línea se mantiene el orden de PATTERNS
+    return sorted(line_findings + extra, key=lambda v: v['line'])
@@ -0,0 +1,480 @@
+# query_builder.py
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import queue
+import re
+import sqlite3
+import threading
+
+from sql_injection_corrector import EMAIL_PATTERN, FieldRule, MessageCode, disallowed_check, render_messages
+
+
+# Los nombres de tabla y columna no se pueden enlazar como parámetros: solo
+# se aceptan identificadores simples, y siempre salen de las reglas, nunca
+# de los valores.
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Operadores de los filtros: {columna: valor} es '=', {columna: (op, valor)}
+# el resto y {columna: [(op, valor), ...]} varias condiciones; además
+# 'contains' (substring literal, con LIKE escapado)
+_OPERATORS = {"=": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "like": "LIKE"}
+
+_NOT_AN_INT = int(MessageCode.NOT_AN_INT)
+_INVALID_EMAIL = int(MessageCode.INVALID_EMAIL)
+_TOO_LONG = int(MessageCode.TOO_LONG)
+_DISALLOWED_CHARS = int(MessageCode.DISALLOWED_CHARS)
+_EMPTY_REQUIRED = int(MessageCode.EMPTY_REQUIRED)
+_REQUIRED_MISSING = int(MessageCode.REQUIRED_MISSING)
+
+
+class QueryParameterError(ValueError):
+    """Un valor no cumple la regla de su columna; codes es la máscara de MessageCode."""
+
+    def __init__(self, field: str, codes: int, max_length: Optional[int] = None):
+        self.field = field
+        self.codes = codes
+        self.max_length = max_length
+        super().__init__(f"{field}: " + " ".join(self.messages))
+
+    @property
+    def messages(self) -> List[str]:
+        return render_messages(self.codes, self.max_length)
+
+
+def _quote(identifier: str) -> str:
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f"Identificador SQL inválido: {identifier!r}")
+    return '"' + identifier + '"'
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class StatementCache:
+    """
+    Caché LRU del SQL armado por forma de consulta (tipo, columnas, filtros
+    y operadores, orden, límite), así que una consulta repetida no vuelve a
+    armar ningún string. Como el texto que devuelve es siempre el mismo
+    objeto, la caché de sentencias compiladas de cada conexión sqlite3
+    (cached_statements) también acierta y la sentencia no se vuelve a
+    preparar. Compartible entre hilos y entre QueryBuilder.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        with self._lock:
+            sql = self._entries.get(key)
+            if sql is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sql
+        sql = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = sql
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return sql
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones sqlite3 reutilizables entre solicitudes e hilos (una
+    conexión la usa un solo hilo a la vez).
+    - Las conexiones se crean a medida que hacen falta, hasta size; si
+      están todas en uso se espera hasta timeout segundos.
+    - statement_cache_size se pasa como cached_statements de cada conexión:
+      conviene que alcance para todas las formas de consulta de la StatementCache.
+    - ':memory:' sería una base distinta por conexión: se usa una base en
+      memoria con caché compartida, que vive mientras el pool esté abierto.
+    """
+
+    def __init__(self, database: str, size: int = 4, statement_cache_size: int = 256,
+                 timeout: float = 5.0, uri: bool = False,
+                 row_factory: Optional[Callable[..., Any]] = None):
+        if database == ":memory:":
+            database, uri = f"file:pool-{id(self)}?mode=memory&cache=shared", True
+        self.database = database
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        self.uri = uri
+        self.row_factory = row_factory
+
+        self.created = 0
+        self.acquired = 0
+        self._connections: List[sqlite3.Connection] = []
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, uri=self.uri, check_same_thread=False,
+                               cached_statements=self.statement_cache_size)
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+                with self._lock:
+                    self._connections.append(conn)
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No hay conexiones libres tras {self.timeout} s") from None
+        self.acquired += 1
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Presta una conexión. Si el bloque termina con una transacción
+        abierta (ej. por una excepción) se revierte antes de devolverla.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict[str, int]:
+        # Préstamos que reutilizaron una conexión ya abierta
+        return {"connections": self.created, "acquired": self.acquired,
+                "reused": self.acquired - self.created}
+
+
+def _compile_binder(rule: FieldRule, filtering: bool = False) -> Callable[[Any], Any]:
+    """
+    Valida un valor con la regla y lo devuelve listo para enlazar, sin
+    reescribirlo: lo que la regla no acepta se rechaza con
+    QueryParameterError en lugar de modificarse. Un int se convierte (como
+    en el corrector) y a un correo se le quitan los espacios extremos.
+    Con filtering (valores de WHERE) un campo requerido acepta la cadena
+    vacía: filtrar por '' no escribe nada.
+    """
+    name = rule.name
+    max_length = rule.max_length
+    has_disallowed = disallowed_check(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+
+    if rule.field_type == "int":
+        def bind(value: Any) -> int:
+            if type(value) is int:
+                return value
+            try:
+                return int(str(value).strip())
+            except ValueError:
+                raise QueryParameterError(name, _NOT_AN_INT) from None
+
+        return bind
+
+    if rule.field_type == "email":
+        email_match = EMAIL_PATTERN.match
+
+        def bind(value: Any) -> str:
+            s = str(value).strip()
+            if max_length is not None and len(s) > max_length:
+                raise QueryParameterError(name, _TOO_LONG, max_length)
+            if not email_match(s):
+                raise QueryParameterError(name, _INVALID_EMAIL)
+            if has_disallowed is not None and has_disallowed(s):
+                raise QueryParameterError(name, _DISALLOWED_CHARS)
+            return s
+
+        return bind
+
+    required = rule.required and not filtering
+
+    def bind(value: Any) -> str:
+        s = value if type(value) is str else str(value)
+        if required and not s:
+            raise QueryParameterError(name, _EMPTY_REQUIRED)
+        if max_length is not None and len(s) > max_length:
+            raise QueryParameterError(name, _TOO_LONG, max_length)
+        if has_disallowed is not None and has_disallowed(s):
+            raise QueryParameterError(name, _DISALLOWED_CHARS)
+        return s
+
+    return bind
+
+
+def _compile_text_check(rule: FieldRule) -> Callable[[str], str]:
+    """
+    Valida el texto de un filtro contains/like en columnas de cualquier
+    tipo: es un fragmento, así que solo se exigen el largo y los caracteres
+    permitidos de la regla (ni formato ni obligatoriedad).
+    """
+    name = rule.name
+    max_length = rule.max_length
+    has_disallowed = disallowed_check(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+
+    def check(s: str) -> str:
+        if max_length is not None and len(s) > max_length:
+            raise QueryParameterError(name, _TOO_LONG, max_length)
+        if has_disallowed is not None and has_disallowed(s):
+            raise QueryParameterError(name, _DISALLOWED_CHARS)
+        return s
+
+    return check
+
+
+class QueryBuilder:
+    """
+    Consultas parametrizadas sobre una tabla cuyas columnas son las FieldRule
+    del corrector. Los valores se validan con la regla de su columna y se
+    enlazan como parámetros ('?'): nunca se insertan en el SQL, así que no
+    hace falta quitarles palabras clave ni secuencias de SQL, y no se
+    modifican. El SQL de cada forma de consulta se arma una vez
+    (StatementCache) y las conexiones salen de un ConnectionPool.
+
+        builder = QueryBuilder("products", rules, ConnectionPool("products.db"))
+        builder.select({"category": "Electrónica", "price": [(">=", 100), ("<=", 500)]}, order_by="price")
+    """
+
+    def __init__(self, table: str, rules: List[FieldRule], pool: ConnectionPool,
+                 statements: Optional[StatementCache] = None):
+        self.table = table
+        self.pool = pool
+        self.statements = statements if statements is not None else StatementCache()
+        self.rules = {rule.name: rule for rule in rules}
+        self._table = _quote(table)
+        self._columns = {rule.name: _quote(rule.name) for rule in rules}
+        self._binders = {rule.name: _compile_binder(rule) for rule in rules}
+        self._filters = {rule.name: _compile_binder(rule, filtering=True) for rule in rules}
+        self._text_checks = {rule.name: _compile_text_check(rule) for rule in rules}
+
+    # -- Valores ----------------------------------------------------------------
+
+    def _column(self, name: str) -> str:
+        column = self._columns.get(name)
+        if column is None:
+            raise ValueError(f"Columna desconocida en {self.table}: {name!r}")
+        return column
+
+    def bind_values(self, values: Dict[str, Any], partial: bool = False) -> Tuple[Tuple[str, ...], List[Any]]:
+        """
+        Columnas (en el orden de las reglas) y valores validados de un
+        registro. Falta un campo requerido: error, salvo con partial
+        (UPDATE); None en un campo opcional se enlaza como NULL.
+        """
+        for name in values.keys() - self._binders.keys():
+            self._column(name)
+        names, params = [], []
+        for name, bind in self._binders.items():
+            value = values.get(name)
+            if value is None:
+                if name not in values and (partial or not self.rules[name].required):
+                    continue
+                if self.rules[name].required:
+                    raise QueryParameterError(name, _REQUIRED_MISSING)
+                params.append(None)
+            else:
+                params.append(bind(value))
+            names.append(name)
+        return tuple(names), params
+
+    def _where(self, where: Optional[Dict[str, Any]]) -> Tuple[tuple, List[Any]]:
+        """Forma (columna, operador) de cada filtro y sus parámetros."""
+        if not where:
+            return (), []
+        shape, params = [], []
+        filters = self._filters
+        for name, condition in where.items():
+            bind = filters.get(name)
+            if bind is None:
+                self._column(name)
+            # Varias condiciones sobre la misma columna: lista de (op, valor)
+            for op, value in condition if type(condition) is list else (
+                    condition if type(condition) is tuple else ("=", condition),):
+                if op == "contains":
+                    # Substring literal: % y _ del valor no son comodines
+                    text = self._text_checks[name](str(value))
+                    params.append("%" + _escape_like(text) + "%")
+                elif op == "like":
+                    # Los comodines no cuentan para el largo ni la whitelist
+                    pattern = str(value)
+                    self._text_checks[name](pattern.replace("%", "").replace("_", ""))
+                    params.append(pattern)
+                elif op not in _OPERATORS:
+                    raise ValueError(f"Operador no soportado: {op!r}")
+                elif value is None:
+                    if op not in ("=", "!="):
+                        raise QueryParameterError(name, _REQUIRED_MISSING)
+                    op = "is null" if op == "=" else "is not null"
+                else:
+                    params.append(bind(value))
+                shape.append((name, op))
+        return tuple(shape), params
+
+    # -- SQL ----------------------------------------------------------------------
+
+    def _where_sql(self, shape: tuple) -> str:
+        if not shape:
+            return ""
+        conditions = []
+        for name, op in shape:
+            column = self._columns[name]
+            if op == "contains":
+                conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            elif op == "is null":
+                conditions.append(f"{column} IS NULL")
+            elif op == "is not null":
+                conditions.append(f"{column} IS NOT NULL")
+            else:
+                conditions.append(f"{column} {_OPERATORS[op]} ?")
+        return " WHERE " + " AND ".join(conditions)
+
+    def build_select(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Tuple[str, List[Any]]:
+        """SQL y parámetros de un SELECT, sin ejecutarlo."""
+        shape, params = self._where(where)
+        columns = tuple(columns) if columns else ()
+        if order_by is not None:
+            self._column(order_by)
+        if limit is not None:
+            params.append(self._limit(limit))
+        key = ("select", self.table, columns, shape, order_by, descending, limit is not None)
+
+        def build() -> str:
+            selected = ", ".join(self._column(name) for name in columns) if columns else "*"
+            sql = f"SELECT {selected} FROM {self._table}" + self._where_sql(shape)
+            if order_by is not None:
+                sql += f" ORDER BY {self._columns[order_by]}" + (" DESC" if descending else "")
+            if limit is not None:
+                sql += " LIMIT ?"
+            return sql
+
+        return self.statements.get(key, build), params
+
+    @staticmethod
+    def _limit(limit: Any) -> int:
+        if type(limit) is not int or limit < 0:
+            raise ValueError(f"LIMIT inválido: {limit!r}")
+        return limit
+
+    def build_insert(self, values: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        names, params = self.bind_values(values)
+        return self.statements.get(("insert", self.table, names), lambda: self._insert_sql(names)), params
+
+    def _insert_sql(self, names: Tuple[str, ...]) -> str:
+        columns = ", ".join(self._columns[name] for name in names)
+        return f"INSERT INTO {self._table} ({columns}) VALUES ({', '.join('?' * len(names))})"
+
+    def build_update(self, values: Dict[str, Any], where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        if not where:
+            raise ValueError("UPDATE sin filtros: se modificaría toda la tabla")
+        names, params = self.bind_values(values, partial=True)
+        if not names:
+            raise ValueError("UPDATE sin columnas para modificar")
+        shape, where_params = self._where(where)
+
+        def build() -> str:
+            assignments = ", ".join(f"{self._columns[name]} = ?" for name in names)
+            return f"UPDATE {self._table} SET {assignments}" + self._where_sql(shape)
+
+        return self.statements.get(("update", self.table, names, shape), build), params + where_params
+
+    def build_delete(self, where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        if not where:
+            raise ValueError("DELETE sin filtros: se borraría toda la tabla")
+        shape, params = self._where(where)
+        return self.statements.get(("delete", self.table, shape),
+                                   lambda: f"DELETE FROM {self._table}" + self._where_sql(shape)), params
+
+    # -- Ejecución ----------------------------------------------------------------
+
+    def select(self, where: Optional[Dict[str, Any]] = None, **options: Any) -> List[Any]:
+        """Filas de la tabla; options: columns, order_by, descending, limit."""
+        sql, params = self.build_select(where, **options)
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def insert(self, values: Dict[str, Any]) -> int:
+        """Inserta un registro y devuelve su rowid."""
+        sql, params = self.build_insert(values)
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute(sql, params).lastrowid
+
+    def insert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Inserta varios registros en una transacción con executemany. Se
+        agrupan por columnas presentes; un registro inválido revierte todo.
+        """
+        groups: Dict[Tuple[str, ...], List[List[Any]]] = {}
+        for record in records:
+            names, params = self.bind_values(record)
+            groups.setdefault(names, []).append(params)
+        count = 0
+        with self.pool.connection() as conn:
+            with conn:
+                for names, rows in groups.items():
+                    sql = self.statements.get(("insert", self.table, names), lambda: self._insert_sql(names))
+                    count += conn.executemany(sql, rows).rowcount
+        return count
+
+    def update(self, values: Dict[str, Any], where: Dict[str, Any]) -> int:
+        """Modifica las columnas dadas en las filas que cumplen where; devuelve cuántas."""
+        sql, params = self.build_update(values, where)
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute(sql, params).rowcount
+
+    def delete(self, where: Dict[str, Any]) -> int:
+        sql, params = self.build_delete(where)
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute(sql, params).rowcount
@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+from sanitize_pipeline import CsvWriter, NdjsonWriter, load_rules, read_csv, read_ndjson, run_pipeline
+
+
+def positive_int(value):
+    """Tipo de argparse para --chunk-size: entero mayor que 0."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"no es un entero: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1 (se recibió {number})")
+    return number
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Sanitiza un export NDJSON o CSV en streaming (memoria constante) antes de cargarlo en SQLite"
+    )
+    parser.add_argument("input", help="Archivo de entrada (.ndjson/.jsonl o .csv)")
+    parser.add_argument("--rules", required=True,
+                        help="JSON con las reglas: lista de {name, field_type, max_length, allowed_pattern, required}")
+    parser.add_argument("-o", "--output", required=True, help="Registros aceptados (mismo formato que la entrada)")
+    parser.add_argument("--rejected", help="Registros rechazados en NDJSON, con los mensajes de cada campo")
+    parser.add_argument("--format", choices=["auto", "ndjson", "csv"], default="auto",
+                        help="Formato de la entrada (por defecto: según la extensión)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para sanitizar en paralelo (0 = todos los núcleos)")
+    parser.add_argument("--chunk-size", type=positive_int, default=1000, help="Registros por lote enviado a cada proceso")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rules = load_rules(args.rules)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "csv" if args.input.lower().endswith(".csv") else "ndjson"
+
+    start = time.perf_counter()
+    with open(args.input, encoding='utf-8', newline='') as src, \
+            open(args.output, 'w', encoding='utf-8', newline='') as out:
+        rejected = open(args.rejected, 'w', encoding='utf-8') if args.rejected else None
+        try:
+            if fmt == "csv":
+                rows = read_csv(src)
+                # Columnas de salida: las de la entrada (se lee el encabezado antes de empezar)
+                first = next(rows, None)
+                fieldnames = [k for k in first[1] if k is not None] if first else [rule.name for rule in rules]
+                writer = CsvWriter(out, fieldnames)
+                if first is not None:
+                    rows = _prepend(first, rows)
+            else:
+                rows = read_ndjson(src)
+                writer = NdjsonWriter(out)
+            stats = run_pipeline(rows, rules, writer, NdjsonWriter(rejected) if rejected else None,
+                                 jobs=jobs, chunk_size=args.chunk_size)
+        finally:
+            if rejected is not None:
+                rejected.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Registros leídos: {stats['read']:,}")
+    print(f"Aceptados: {stats['accepted']:,} → {args.output}")
+    print(f"Rechazados: {stats['rejected']:,}" + (f" → {args.rejected}" if args.rejected else ""))
+    print(f"Tiempo: {elapsed:.2f} s ({stats['read'] / elapsed if elapsed else 0:,.0f} registros/s, {jobs} proceso(s))")
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+# sanitize_pipeline.py
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import json
+import re
+
+from sql_injection_corrector import FieldRule, SQLInjectionCorrector
+
+
+# Cada registro viaja por el pipeline como (línea, registro, error de lectura)
+Row = Tuple[int, Any, Optional[str]]
+# y sale como (línea, registro sanitizado u original, errores por campo o None)
+Outcome = Tuple[int, Any, Optional[Dict[str, List[str]]]]
+
+
+def load_rules(path: str) -> List[FieldRule]:
+    """
+    Lee las reglas de un JSON: lista de objetos con los campos de FieldRule;
+    allowed_pattern es el texto de la regex.
+    """
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+    rules = []
+    for spec in specs:
+        spec = dict(spec)
+        if spec.get("allowed_pattern") is not None:
+            spec["allowed_pattern"] = re.compile(spec["allowed_pattern"])
+        rules.append(FieldRule(**spec))
+    return rules
+
+
+# -- Lectura -------------------------------------------------------------------
+
+def read_ndjson(stream: IO[str]) -> Iterator[Row]:
+    """Un registro por línea; las líneas que no son JSON se informan como error."""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, line.rstrip("\n"), f"JSON inválido: {e}"
+
+
+def read_csv(stream: IO[str]) -> Iterator[Row]:
+    """
+    Registros de un CSV con encabezado. Una celda vacía se trata como campo
+    ausente (None), que es lo que indica en un CSV.
+    """
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, {k: (v if v != "" else None) for k, v in record.items()}, None
+
+
+# -- Escritura -------------------------------------------------------------------
+
+class NdjsonWriter:
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, record: Any) -> None:
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+class CsvWriter:
+    """Escribe con las columnas dadas; las claves extra se descartan y None se escribe vacío."""
+
+    def __init__(self, stream: IO[str], fieldnames: List[str]):
+        self.count = 0
+        self._writer = csv.DictWriter(stream, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._writer.writerow(record)
+        self.count += 1
+
+
+# -- Sanitización ---------------------------------------------------------------
+
+def sanitize_chunk(corrector: SQLInjectionCorrector, chunk: List[Row]) -> List[Outcome]:
+    """
+    Sanitiza un lote con la API por columnas (sanitize_batch). Un registro
+    es aceptado si todos sus campos quedaron válidos; el resto sale con el
+    registro original y los mensajes de los campos inválidos.
+    """
+    outcomes: List[Optional[Outcome]] = [None] * len(chunk)
+    positions, records = [], []
+    for i, (line_no, record, error) in enumerate(chunk):
+        if error is not None:
+            outcomes[i] = (line_no, record, {"": [error]})
+        elif type(record) is not dict:
+            outcomes[i] = (line_no, record, {"": ["El registro no es un objeto."]})
+        else:
+            positions.append(i)
+            records.append(record)
+
+    if records:
+        columns = corrector.sanitize_batch(records)
+        names = list(columns)
+        known = set(names)
+        invalid = set()
+        for column in columns.values():
+            invalid.update(column.invalid_rows)
+        value_columns = [column.values for column in columns.values()]
+
+        for k, (i, record) in enumerate(zip(positions, records)):
+            line_no = chunk[i][0]
+            if k in invalid:
+                errors = {name: column.messages(k) for name, column in columns.items() if not column.is_valid(k)}
+                outcomes[i] = (line_no, record, errors)
+                continue
+            sanitized = dict(zip(names, [values[k] for values in value_columns]))
+            # Los campos fuera de las reglas pasan sin cambios (como en sanitize_parameters)
+            if not known.issuperset(record):
+                for key in record.keys() - known:
+                    sanitized[key] = record[key]
+            outcomes[i] = (line_no, sanitized, None)
+    return outcomes
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    # Con size < 1 el primer lote saldría vacío y se perderían todos los registros
+    if size < 1:
+        raise ValueError(f"chunk_size debe ser al menos 1 (se recibió {size})")
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Corrector de cada proceso del pool: las reglas llegan una vez en el
+# initializer y se compilan ahí; después solo viajan lotes de registros.
+_worker_corrector: Optional[SQLInjectionCorrector] = None
+
+
+def _init_worker(rules: List[FieldRule]) -> None:
+    global _worker_corrector
+    _worker_corrector = SQLInjectionCorrector(rules)
+
+
+def _worker_chunk(chunk: List[Row]) -> List[Outcome]:
+    return sanitize_chunk(_worker_corrector, chunk)
+
+
+def sanitize_stream(
+    rows: Iterable[Row],
+    rules: List[FieldRule],
+    jobs: int = 1,
+    chunk_size: int = 1000,
+    max_pending: Optional[int] = None,
+) -> Iterator[Outcome]:
+    """
+    Etapa de sanitización: consume los registros a medida que llegan y
+    genera los resultados en el mismo orden. Con jobs > 1 los lotes se
+    reparten en un pool de procesos; como mucho max_pending lotes están en
+    vuelo (por defecto 2 por proceso), así que si el escritor se atrasa el
+    lector también se detiene y la memoria no depende del tamaño de la entrada.
+    chunk_size < 1 es un error (ValueError).
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size debe ser al menos 1 (se recibió {chunk_size})")
+    chunks = _chunks(rows, chunk_size)
+    if jobs <= 1:
+        corrector = SQLInjectionCorrector(rules)
+        for chunk in chunks:
+            yield from sanitize_chunk(corrector, chunk)
+        return
+
+    max_pending = max_pending or jobs * 2
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(rules,))
+    pending: deque = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(_worker_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def run_pipeline(
+    rows: Iterable[Row],
+    rules: List[FieldRule],
+    writer: Any,
+    rejected_writer: Optional[Any] = None,
+    jobs: int = 1,
+    chunk_size: int = 1000,
+) -> Dict[str, int]:
+    """
+    lector → sanitización → escritor. Los registros rechazados van a
+    rejected_writer como {"line", "record", "errors"}. Devuelve los contadores.
+    """
+    stats = {"read": 0, "accepted": 0, "rejected": 0}
+    for line_no, record, errors in sanitize_stream(rows, rules, jobs, chunk_size):
+        stats["read"] += 1
+        if errors is None:
+            writer.write(record)
+            stats["accepted"] += 1
+        else:
+            stats["rejected"] += 1
+            if rejected_writer is not None:
+                rejected_writer.write({"line": line_no, "record": record, "errors": errors})
+    return stats
@@ -0,0 +1,137 @@
+# sast_cache.py
+
+from typing import List, Optional
+import hashlib
+import json
+import sqlite3
+import time
+
+
+def content_digest(data: bytes) -> str:
+    """Hash del contenido del archivo; la ruta y el mtime no influyen."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def content_hasher():
+    """Hash incremental equivalente a content_digest, para leer por chunks."""
+    return hashlib.sha256()
+
+
+def file_digest(filename: str, chunk_size: int = 1024 * 1024) -> str:
+    """content_digest del archivo, leído en chunks sin cargarlo entero."""
+    digest = content_hasher()
+    with open(filename, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScanCache:
+    """
+    Caché persistente en disco (SQLite) de los hallazgos por archivo.
+    - Clave: (hash del contenido, versión del conjunto de reglas), así que
+      renombrar o mover un archivo no invalida su entrada. Cada versión
+      (ej. con y sin --multiline o --taint) tiene sus propias entradas:
+      alternar análisis sobre el mismo archivo de caché no la vacía, y las
+      de versiones que ya no se usan salen por el LRU.
+    - Desalojo LRU cuando el tamaño total de las entradas supera max_bytes.
+    - Contadores de aciertos/fallos/desalojos para reportar el ahorro.
+    """
+
+    def __init__(self, path: str, ruleset_version: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.ruleset_version = ruleset_version
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(path)
+        # Las cachés anteriores tenían una sola versión por archivo (tabla
+        # sin columna ruleset): se descartan, se vuelven a llenar solas.
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if columns and "ruleset" not in columns:
+            self._conn.execute("DROP TABLE entries")
+            self._conn.execute("DROP TABLE IF EXISTS meta")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " digest TEXT NOT NULL,"
+            " ruleset TEXT NOT NULL,"
+            " findings TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (digest, ruleset))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+        )
+        self._conn.commit()
+
+    def contains(self, digest: str) -> bool:
+        """Indica si hay entrada para el hash y la cuenta como acierto o fallo."""
+        key = (digest, self.ruleset_version)
+        row = self._conn.execute(
+            "SELECT 1 FROM entries WHERE digest = ? AND ruleset = ?", key
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE entries SET last_used = ? WHERE digest = ? AND ruleset = ?", (time.time(),) + key
+        )
+        return True
+
+    def load(self, digest: str) -> List[dict]:
+        """Lee una entrada que contains() ya confirmó (no afecta los contadores)."""
+        row = self._conn.execute(
+            "SELECT findings FROM entries WHERE digest = ? AND ruleset = ?", (digest, self.ruleset_version)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else []
+
+    def get(self, digest: str) -> Optional[List[dict]]:
+        if not self.contains(digest):
+            return None
+        return self.load(digest)
+
+    def put(self, digest: str, findings: List[dict]) -> None:
+        payload = json.dumps(findings, ensure_ascii=False)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (digest, ruleset, findings, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (digest, self.ruleset_version, payload, len(payload), time.time())
+        )
+
+    def evict(self) -> None:
+        """
+        Elimina las entradas menos usadas, de cualquier versión, hasta quedar
+        por debajo de max_bytes.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for digest, ruleset, size in self._conn.execute(
+            "SELECT digest, ruleset, size FROM entries ORDER BY last_used"
+        ):
+            victims.append((digest, ruleset))
+            excess -= size
+            if excess <= 0:
+                break
+
+        self._conn.executemany("DELETE FROM entries WHERE digest = ? AND ruleset = ?", victims)
+        self.evictions += len(victims)
+
+    def close(self) -> None:
+        self.evict()
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
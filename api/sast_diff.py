@@ -0,0 +1,114 @@
+# sast_diff.py
+
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import subprocess
+
+from js_lexer import TemplateLiteralLexer, literal_findings, merge_findings
+from sast_engine import DEFAULT_MATCHER, CompiledMatcher, decode_lines
+from sast_taint import TaintIndex
+from sast_scanner import DEFAULT_EXTENSIONS, DEFAULT_IGNORED_DIRS, is_ignored
+
+
+# Cabecera de hunk con -U0: "@@ -a[,b] +c[,d] @@"
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def parse_diff(diff_text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Extrae de la salida de `git diff -U0` los rangos de líneas agregadas o
+    modificadas por archivo: {ruta: [(inicio, fin), ...]} con líneas 1-based
+    e inclusivas, numeradas según la versión nueva del archivo.
+    """
+    ranges: Dict[str, List[Tuple[int, int]]] = {}
+    current: Optional[str] = None
+
+    for line in diff_text.splitlines():
+        if line.startswith("+++ "):
+            target = line[4:]
+            # /dev/null = archivo eliminado; no hay nada que analizar
+            current = None if target == "/dev/null" else target[2:] if target.startswith("b/") else target
+            continue
+
+        if current is None:
+            continue
+
+        m = _HUNK_RE.match(line)
+        if m:
+            start = int(m.group(1))
+            count = int(m.group(2)) if m.group(2) is not None else 1
+            # count == 0: el hunk solo borra líneas
+            if count > 0:
+                ranges.setdefault(current, []).append((start, start + count - 1))
+
+    return ranges
+
+
+def changed_line_ranges(base: str, targets: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Ejecuta `git diff` contra la revisión base (incluye cambios sin commitear)
+    y devuelve los rangos agregados/modificados, con rutas relativas al
+    directorio actual.
+    """
+    cmd = [
+        "git", "diff", "-U0", "--no-color", "--no-ext-diff", "--relative",
+        "--diff-filter=ACMR", base, "--", *targets,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", check=True)
+    return parse_diff(result.stdout)
+
+
+def scan_diff(
+    base: str,
+    targets: List[str],
+    matcher: CompiledMatcher = DEFAULT_MATCHER,
+    extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+    exclude: Optional[List[str]] = None,
+    multiline: bool = False,
+    taint: bool = False,
+):
+    """
+    Analiza solo las líneas que el diff contra base agrega o modifica.
+    Devuelve (hallazgos, errores) con el mismo formato que scan_files; el
+    campo 'line' es el número de línea real dentro del archivo.
+    Con multiline también se analizan los template literals que tocan alguna
+    línea cambiada, aunque empiecen antes del hunk. Con taint se agregan los
+    sinks con flujo de datos que caen en líneas cambiadas.
+    """
+    exclude = exclude or []
+    vulnerabilities: List[dict] = []
+    errors: List[Tuple[str, str]] = []
+
+    for path, ranges in sorted(changed_line_ranges(base, targets).items()):
+        filename = os.path.normpath(path)
+        if not filename.endswith(extensions) or is_ignored(filename, DEFAULT_IGNORED_DIRS, exclude):
+            continue
+
+        try:
+            with open(filename, 'rb') as f:
+                lines = decode_lines(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            errors.append((filename, str(e)))
+            continue
+
+        # El lexer y taint trabajan sobre el texto ya leído, sin releer el archivo
+        text = "".join(lines) if multiline or taint else ""
+        findings = list(matcher.scan_ranges(lines, ranges))
+        if multiline:
+            touched = [
+                literal for literal in TemplateLiteralLexer().feed(text, final=True)
+                if any(literal.start_line <= end and start <= literal.end_line for start, end in ranges)
+            ]
+            findings = merge_findings(findings, literal_findings(touched))
+        if taint:
+            changed = [
+                v for v in TaintIndex(text).analyze()
+                if any(start <= v['line'] <= end for start, end in ranges)
+            ]
+            findings = merge_findings(findings, changed)
+
+        for finding in findings:
+            vulnerabilities.append({'file': filename, **finding})
+
+    return vulnerabilities, errors
@@ -0,0 +1,200 @@
+# sast_engine.py
+
+import hashlib
+import io
+import json
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+
+# Subir este número cuando cambie la forma de evaluar las reglas (no solo las
+# reglas en sí) para invalidar resultados guardados en caché.
+ENGINE_VERSION = 1
+
+# Largo de línea a partir del cual se usa el motor lineal en lugar de la regex
+LINEAR_THRESHOLD = 128
+
+# Reglas SAST: (regex, descripción). El orden define el orden de los hallazgos
+# dentro de una misma línea, igual que en el bucle original de detect-sqli.py.
+PATTERNS: List[Tuple[str, str]] = [
+    (r'`SELECT.*\$\{.*\}.*`', 'SQL Injection en SELECT'),
+    (r'`INSERT.*\$\{.*\}.*`', 'SQL Injection en INSERT'),
+    (r'`UPDATE.*\$\{.*\}.*`', 'SQL Injection en UPDATE'),
+    (r'`DELETE.*\$\{.*\}.*`', 'SQL Injection en DELETE'),
+    (r'`.*WHERE.*\$\{.*\}.*`', 'SQL Injection en WHERE clause'),
+    (r'`.*ORDER BY.*\$\{.*\}.*`', 'SQL Injection en ORDER BY'),
+]
+
+
+class CompiledMatcher:
+    """
+    Motor de coincidencias precompilado para las reglas SAST.
+    - Prefiltro literal: todas las reglas exigen un backtick y un '${',
+      así que las líneas que no los contienen se descartan sin usar regex.
+    - Una sola regex combinada con grupos nombrados: cada regla va dentro de
+      un lookahead opcional tras el backtick inicial, de modo que una pasada
+      de finditer sobre los backticks de la línea reporta todas las
+      categorías que aplican.
+    - Motor lineal para líneas largas: los '.*' de las reglas hacen que la
+      regex retroceda de forma polinómica en líneas con muchos backticks y
+      '${' (ej. bundles minificados). A partir de linear_threshold caracteres
+      se usa una búsqueda de literales en orden con str.find, de costo lineal
+      en el largo de la línea y con resultados idénticos.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]] = PATTERNS, linear_threshold: int = LINEAR_THRESHOLD):
+        self.patterns = list(patterns)
+        self.linear_threshold = linear_threshold
+        self.descriptions = [description for _, description in self.patterns]
+        self.group_names = [f"r{i}" for i in range(len(self.patterns))]
+
+        # Todas las reglas empiezan con un backtick literal: se factoriza y
+        # el resto de cada regla queda como lookahead opcional. Como '.' no
+        # cruza '\n', cada backtick solo ve su propio segmento de línea,
+        # igual que re.search.
+        lookaheads = []
+        for name, (pattern, _) in zip(self.group_names, self.patterns):
+            if not pattern.startswith("`"):
+                raise ValueError(f"La regla debe empezar con un backtick: {pattern}")
+            lookaheads.append(f"(?=(?P<{name}>{pattern[1:]}))?")
+        self._combined = re.compile("`" + "".join(lookaheads))
+
+        # Reglas como cadenas de literales; None si alguna no es de la forma
+        # 'lit.*lit.*...' y entonces solo se usa la regex.
+        try:
+            self._chains = [_literal_chain(pattern) for pattern, _ in self.patterns]
+        except ValueError:
+            self._chains = None
+
+        # Huella del conjunto de reglas: cambia si cambia cualquier patrón,
+        # descripción o la versión del motor.
+        self.ruleset_version = hashlib.sha256(
+            json.dumps([ENGINE_VERSION, self.patterns]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def match_line(self, line: str) -> List[str]:
+        """
+        Devuelve las descripciones de todas las reglas que coinciden con la
+        línea, en el orden de PATTERNS.
+        """
+        if "`" not in line or "${" not in line:
+            return []
+
+        if self._chains is not None and len(line) > self.linear_threshold:
+            return self._match_linear(line)
+
+        matched = [False] * len(self.patterns)
+        for m in self._combined.finditer(line):
+            for i, group in enumerate(m.groups()):
+                if group is not None:
+                    matched[i] = True
+
+        return [
+            description
+            for description, hit in zip(self.descriptions, matched)
+            if hit
+        ]
+
+    def _match_linear(self, line: str) -> List[str]:
+        """
+        Las reglas son literales separados por '.*' (ej. '`', 'WHERE', '${',
+        '}', '`'), así que coinciden si y solo si los literales aparecen en
+        ese orden dentro de un mismo segmento sin '\\n'. Buscar cada literal
+        con str.find desde el final del anterior (el más a la izquierda
+        siempre es la mejor elección) equivale a re.search sin backtracking:
+        cada regla recorre la línea a lo sumo una vez por literal.
+        """
+        # Límites de los segmentos sin '\n' ('.' no cruza saltos de línea)
+        bounds = []
+        start = 0
+        while True:
+            newline = line.find("\n", start)
+            if newline == -1:
+                bounds.append((start, len(line)))
+                break
+            bounds.append((start, newline))
+            start = newline + 1
+
+        return [
+            description
+            for description, chain in zip(self.descriptions, self._chains)
+            if any(_chain_matches(line, chain, lo, hi) for lo, hi in bounds)
+        ]
+
+    def scan_lines(self, lines: Iterable[str], start: int = 1) -> Iterator[dict]:
+        """
+        Recorre las líneas y genera un hallazgo por cada regla que coincide,
+        con el mismo formato que analyze_sql_injection.
+        """
+        for line_num, line in enumerate(lines, start):
+            for description in self.match_line(line):
+                yield make_finding(line_num, line, description)
+
+    def scan_ranges(self, lines: List[str], ranges: Iterable[Tuple[int, int]]) -> Iterator[dict]:
+        """
+        Igual que scan_lines pero solo sobre los rangos (inicio, fin) 1-based
+        e inclusivos; los números de línea siguen siendo los del archivo.
+        """
+        for start, end in sorted(ranges):
+            end = min(end, len(lines))
+            yield from self.scan_lines(lines[start - 1:end], start)
+
+
+_REGEX_SPECIALS = set(".^$*+?{}[]\\|()")
+
+
+def _literal_chain(pattern: str) -> List[str]:
+    """
+    Convierte una regla 'lit.*lit.*...' en la lista de literales. Lanza
+    ValueError si la regla usa otra sintaxis de regex.
+    """
+    chain = []
+    for piece in pattern.split(".*"):
+        literal = []
+        i = 0
+        while i < len(piece):
+            ch = piece[i]
+            if ch == "\\" and i + 1 < len(piece) and not piece[i + 1].isalnum():
+                literal.append(piece[i + 1])
+                i += 2
+                continue
+            if ch in _REGEX_SPECIALS:
+                raise ValueError(f"Regla no soportada por el motor lineal: {pattern}")
+            literal.append(ch)
+            i += 1
+        if literal:
+            chain.append("".join(literal))
+    return chain
+
+
+def _chain_matches(line: str, chain: List[str], lo: int, hi: int) -> bool:
+    pos = lo
+    for literal in chain:
+        idx = line.find(literal, pos, hi)
+        if idx == -1:
+            return False
+        pos = idx + len(literal)
+    return True
+
+
+def make_finding(line_num: int, line: str, description: str) -> dict:
+    return {
+        'line': line_num,
+        'code': line.strip(),
+        'type': description,
+        'severity': 'CRITICAL',
+        'cwe': 'CWE-89'
+    }
+
+
+# Instancia por defecto, compilada una sola vez al importar el módulo
+DEFAULT_MATCHER = CompiledMatcher()
+
+
+def decode_lines(data: bytes) -> List[str]:
+    """
+    Decodifica el contenido crudo de un archivo con la misma semántica que
+    open(filename, 'r', encoding='utf-8').readlines() (saltos universales).
+    """
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines()
+
@@ -0,0 +1,200 @@
+# sast_reporters.py
+
+from typing import IO, List, Optional
+import io
+import json
+import os
+
+from sast_engine import PATTERNS
+from sast_taint import TAINT_DESCRIPTION
+
+
+# Reglas conocidas para SARIF: (id, descripción que aparece en 'type')
+RULES = [(f"SQLI{i:03d}", description) for i, (_, description) in enumerate(PATTERNS, 1)]
+RULES.append((f"SQLI{len(RULES) + 1:03d}", TAINT_DESCRIPTION))
+_RULE_IDS = {description: rule_id for rule_id, description in RULES}
+
+_SARIF_LEVELS = {'CRITICAL': 'error', 'HIGH': 'error', 'MEDIUM': 'warning', 'LOW': 'note'}
+
+
+class Reporter:
+    """
+    Escribe hallazgos a medida que se producen, sin acumularlos en memoria.
+    Cada hallazgo se vuelca al disco apenas se escribe, así que si el
+    análisis se interrumpe el archivo conserva los resultados parciales.
+    - lazy: el archivo se crea recién con el primer hallazgo (como el
+      reporte original, que no se escribía si no había vulnerabilidades).
+    """
+
+    lazy = False
+
+    def __init__(self, path: str, default_file: Optional[str] = None):
+        self.path = path
+        self.default_file = default_file
+        self.count = 0
+        self._f: Optional[IO[str]] = None
+        if not self.lazy:
+            self._open()
+
+    def _open(self) -> None:
+        self._f = open(self.path, 'w', encoding='utf-8')
+        self.start(self._f)
+
+    def write(self, finding: dict) -> None:
+        if self._f is None:
+            self._open()
+        self.count += 1
+        self.write_finding(self._f, finding)
+        self._f.flush()
+
+    def close(self, complete: bool = True) -> None:
+        """Cierra el documento; complete=False si el análisis se interrumpió."""
+        if self._f is None:
+            return
+        self.finish(self._f, complete)
+        self._f.close()
+        self._f = None
+
+    def render(self, findings: List[dict], offset: int) -> str:
+        """
+        Texto de findings como si ya se hubieran escrito offset hallazgos
+        (numeración y separadores incluidos), sin escribirlo. Permite
+        reusar el fragmento de un archivo que no cambió.
+        """
+        count, buffer = self.count, io.StringIO()
+        for self.count, finding in enumerate(findings, offset + 1):
+            self.write_finding(buffer, finding)
+        self.count = count
+        return buffer.getvalue()
+
+    def write_rendered(self, text: str, findings: int) -> None:
+        """Escribe un fragmento de render() que contiene findings hallazgos."""
+        if not findings:
+            return
+        if self._f is None:
+            self._open()
+        self.count += findings
+        self._f.write(text)
+        self._f.flush()
+
+    @property
+    def written(self) -> bool:
+        return os.path.exists(self.path) and (not self.lazy or self.count > 0)
+
+    # Puntos de extensión de cada formato
+    def start(self, f: IO[str]) -> None:
+        pass
+
+    def write_finding(self, f: IO[str], finding: dict) -> None:
+        raise NotImplementedError
+
+    def finish(self, f: IO[str], complete: bool) -> None:
+        pass
+
+
+class JsonArrayReporter(Reporter):
+    """sast-results.json: mismo contenido que json.dump(lista, indent=2)."""
+
+    lazy = True
+
+    def start(self, f):
+        f.write("[")
+
+    def write_finding(self, f, finding):
+        body = json.dumps(finding, indent=2).replace("\n", "\n  ")
+        f.write(("," if self.count > 1 else "") + "\n  " + body)
+
+    def finish(self, f, complete):
+        f.write("\n]")
+
+
+class NdjsonReporter(Reporter):
+    """Un hallazgo JSON por línea: cada línea escrita es válida por sí sola."""
+
+    def write_finding(self, f, finding):
+        f.write(json.dumps(finding, ensure_ascii=False) + "\n")
+
+
+class TextReporter(Reporter):
+    """sast-results.txt: formato de texto original."""
+
+    lazy = True
+
+    def start(self, f):
+        f.write("ANÁLISIS SAST - SQL INJECTION DETECTOR\n")
+        f.write("="*60 + "\n\n")
+
+    def write_finding(self, f, finding):
+        f.write(f"{self.count}. Línea {finding['line']}: {finding['type']}\n")
+        if 'file' in finding:
+            f.write(f"   Archivo: {finding['file']}\n")
+        f.write(f"   Severidad: {finding['severity']}\n")
+        f.write(f"   CWE: {finding['cwe']}\n")
+        f.write(f"   Código: {finding['code']}\n\n")
+
+
+class SarifReporter(Reporter):
+    """
+    SARIF 2.1.0 para subir a code scanning. El documento se escribe en
+    streaming: cabecera y reglas al inicio, un resultado por hallazgo y el
+    cierre (con executionSuccessful) al terminar.
+    """
+
+    def start(self, f):
+        rules = [
+            {
+                "id": rule_id,
+                "name": description,
+                "shortDescription": {"text": description},
+                "defaultConfiguration": {"level": "error"},
+                "helpUri": "https://cwe.mitre.org/data/definitions/89.html",
+                "properties": {"tags": ["security", "CWE-89"]},
+            }
+            for rule_id, description in RULES
+        ]
+        header = json.dumps({
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "version": "2.1.0",
+        }, indent=2)
+        driver = json.dumps({"driver": {"name": "detect-sqli", "rules": rules}}, indent=2)
+        # Se abre el documento a mano para poder seguir agregando resultados
+        f.write(header[:-2] + ',\n  "runs": [\n    {\n      "tool": '
+                + driver.replace("\n", "\n      ") + ',\n      "results": [')
+
+    def write_finding(self, f, finding):
+        uri = finding.get('file', self.default_file) or ""
+        result = {
+            "ruleId": _RULE_IDS.get(finding['type'], "SQLI000"),
+            "level": _SARIF_LEVELS.get(finding['severity'], "warning"),
+            "message": {"text": f"{finding['type']} ({finding['cwe']})"},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": uri.replace(os.sep, "/")},
+                    "region": {"startLine": finding['line'], "snippet": {"text": finding['code']}},
+                }
+            }],
+        }
+        body = json.dumps(result, ensure_ascii=False)
+        f.write(("," if self.count > 1 else "") + "\n        " + body)
+
+    def finish(self, f, complete):
+        invocations = json.dumps([{"executionSuccessful": complete}])
+        f.write('\n      ],\n      "invocations": ' + invocations + '\n    }\n  ]\n}\n')
+
+
+REPORTERS = {
+    'json': ('sast-results.json', JsonArrayReporter),
+    'text': ('sast-results.txt', TextReporter),
+    'ndjson': ('sast-results.ndjson', NdjsonReporter),
+    'sarif': ('sast-results.sarif', SarifReporter),
+}
+
+
+def build_reporters(formats: List[str], default_file: Optional[str] = None) -> List[Reporter]:
+    reporters = []
+    for fmt in formats:
+        if fmt not in REPORTERS:
+            raise ValueError(f"Formato de reporte desconocido: {fmt}")
+        path, cls = REPORTERS[fmt]
+        reporters.append(cls(path, default_file))
+    return reporters
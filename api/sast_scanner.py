@@ -0,0 +1,231 @@
+# sast_scanner.py
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import fnmatch
+import glob
+import os
+
+from sast_cache import ScanCache, content_hasher, file_digest
+from js_lexer import TemplateLiteralLexer, iter_decoded_chunks, literal_findings, merge_findings
+from sast_engine import DEFAULT_MATCHER, CompiledMatcher
+from sast_taint import TaintIndex
+
+
+# Directorios que nunca se analizan (dependencias, VCS, artefactos de build)
+DEFAULT_IGNORED_DIRS = {
+    "node_modules", ".git", ".hg", ".svn", "__pycache__",
+    "dist", "build", "coverage", ".next", ".venv", "venv",
+}
+
+# Extensiones que se consideran código JavaScript/TypeScript
+DEFAULT_EXTENSIONS = (".js", ".mjs", ".cjs", ".jsx", ".ts", ".tsx")
+
+
+def is_ignored(path: str, ignored_dirs: set, exclude: List[str]) -> bool:
+    parts = os.path.normpath(path).split(os.sep)
+    if any(part in ignored_dirs for part in parts):
+        return True
+    return any(fnmatch.fnmatch(path, pattern) for pattern in exclude)
+
+
+def iter_source_files(
+    targets: Iterable[str],
+    extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+    ignored_dirs: Optional[set] = None,
+    exclude: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Expande archivos, directorios y patrones glob a una lista ordenada y sin
+    duplicados de archivos a analizar. El orden es determinista para que el
+    reporte no dependa del sistema de archivos ni del número de procesos.
+    """
+    ignored_dirs = DEFAULT_IGNORED_DIRS if ignored_dirs is None else ignored_dirs
+    exclude = exclude or []
+    found = set()
+
+    for target in targets:
+        if os.path.isdir(target):
+            for root, dirs, files in os.walk(target):
+                # Podamos in-place para que os.walk no descienda a node_modules, etc.
+                dirs[:] = [d for d in dirs if d not in ignored_dirs]
+                for name in files:
+                    path = os.path.join(root, name)
+                    if name.endswith(extensions) and not is_ignored(path, ignored_dirs, exclude):
+                        found.add(os.path.normpath(path))
+        elif os.path.isfile(target):
+            # Un archivo explícito se analiza aunque no tenga extensión JS
+            found.add(os.path.normpath(target))
+        else:
+            for path in glob.glob(target, recursive=True):
+                if os.path.isfile(path) and not is_ignored(path, ignored_dirs, exclude):
+                    found.add(os.path.normpath(path))
+
+    return sorted(found)
+
+
+def scan_source(
+    filename: str,
+    multiline: bool = False,
+    taint: bool = False,
+    matcher: CompiledMatcher = DEFAULT_MATCHER,
+    chunk_size: int = 64 * 1024,
+) -> Tuple[List[dict], str]:
+    """
+    Analiza el archivo en una sola lectura por chunks y devuelve
+    (hallazgos, hash del contenido). Del mismo chunk se alimentan el hash,
+    las reglas por línea y, con multiline, el lexer de template literals
+    (js_lexer.py); así un archivo grande no se carga entero ni se lee dos
+    veces. Solo taint (sast_taint.py) necesita el texto completo, porque
+    resuelve funciones en cualquier parte del archivo.
+    Propaga OSError y UnicodeDecodeError para que cada llamador decida cómo
+    reportarlos.
+    """
+    digest = content_hasher()
+    lexer = TemplateLiteralLexer() if multiline else None
+    multiline_findings: List[dict] = []
+    parts: List[str] = []
+    findings: List[dict] = []
+    # Fragmentos de la línea todavía sin terminar (una línea minificada
+    # puede ocupar muchos chunks; se unen una sola vez al cerrarla)
+    pending: List[str] = []
+    line_num = 1
+
+    for raw, text in iter_decoded_chunks(filename, chunk_size):
+        digest.update(raw)
+        if not text:
+            continue
+        if lexer is not None:
+            multiline_findings.extend(literal_findings(lexer.feed(text)))
+        if taint:
+            parts.append(text)
+        lines = text.split("\n")
+        if len(lines) > 1:
+            pending.append(lines[0])
+            lines[0] = "".join(pending)
+            pending = [lines[-1]]
+            findings.extend(matcher.scan_lines(lines[:-1], line_num))
+            line_num += len(lines) - 1
+        else:
+            pending.append(text)
+
+    last = "".join(pending)
+    if last:
+        findings.extend(matcher.scan_lines([last], line_num))
+    if lexer is not None:
+        multiline_findings.extend(literal_findings(lexer.feed("", final=True)))
+        findings = merge_findings(findings, multiline_findings)
+    if taint:
+        findings = merge_findings(findings, TaintIndex("".join(parts)).analyze())
+    return findings, digest.hexdigest()
+
+
+def _scan_one(
+    filename: str,
+    multiline: bool = False,
+    taint: bool = False,
+) -> Tuple[str, List[dict], Optional[str], Optional[str]]:
+    """Trabajo de cada proceso: (archivo, hallazgos, error, hash del contenido)."""
+    try:
+        findings, digest = scan_source(filename, multiline, taint)
+        return filename, findings, None, digest
+    except (OSError, UnicodeDecodeError) as e:
+        return filename, [], str(e), None
+
+
+def _cached_digest(filename: str, cache: ScanCache) -> Tuple[Optional[str], Optional[str]]:
+    """(hash, error): hash solo si el contenido está en la caché."""
+    try:
+        digest = file_digest(filename)
+    except OSError as e:
+        return None, str(e)
+    return (digest if cache.contains(digest) else None), None
+
+
+def iter_scan_files(
+    filenames: List[str],
+    jobs: int = 1,
+    chunksize: Optional[int] = None,
+    cache: Optional[ScanCache] = None,
+    multiline: bool = False,
+    taint: bool = False,
+) -> Iterator[Tuple[str, List[dict], Optional[str]]]:
+    """
+    Analiza los archivos en serie (jobs=1) o repartidos en un pool de procesos
+    y genera (archivo, hallazgos, error) en el mismo orden que filenames, a
+    medida que cada archivo está listo, sin acumular resultados.
+    Con cache, los archivos cuyo contenido ya se analizó con las mismas reglas
+    se sirven desde disco y solo el resto se envía a los procesos.
+    Con multiline/taint se agregan los análisis opcionales (ver
+    scan_source); la caché debe abrirse con una versión distinta.
+    """
+    worker = partial(_scan_one, multiline=multiline, taint=taint)
+
+    # Primera pasada: solo se decide qué archivos están en caché (se guarda
+    # el hash, no los hallazgos, para no retener memoria).
+    cached: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    pending = filenames
+    if cache is not None:
+        pending = []
+        for filename in filenames:
+            digest, error = _cached_digest(filename, cache)
+            if digest is None and error is None:
+                pending.append(filename)
+            else:
+                cached[filename] = (digest, error)
+
+    pool = None
+    if jobs <= 1 or len(pending) <= 1:
+        scanned = map(worker, pending)
+    else:
+        if chunksize is None:
+            # Lotes grandes para amortizar el costo de IPC en corpus de miles de archivos
+            chunksize = max(1, len(pending) // (jobs * 8))
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        scanned = pool.map(worker, pending, chunksize=chunksize)
+
+    try:
+        for filename in filenames:
+            if filename in cached:
+                digest, error = cached[filename]
+                if error is not None:
+                    yield filename, [], error
+                else:
+                    yield filename, cache.load(digest), None
+                continue
+
+            # pool.map entrega en el orden de pending, que sigue a filenames
+            scanned_name, findings, error, digest = next(scanned)
+            if cache is not None and error is None:
+                cache.put(digest, findings)
+            yield scanned_name, findings, error
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def scan_files(
+    filenames: List[str],
+    jobs: int = 1,
+    chunksize: Optional[int] = None,
+    cache: Optional[ScanCache] = None,
+    multiline: bool = False,
+    taint: bool = False,
+) -> Tuple[List[dict], List[Tuple[str, str]]]:
+    """
+    Versión no incremental de iter_scan_files: devuelve (hallazgos, errores).
+    Cada hallazgo incluye el campo 'file' y el resultado queda ordenado por
+    (archivo, línea) sin importar qué proceso terminó antes.
+    """
+    vulnerabilities: List[dict] = []
+    errors: List[Tuple[str, str]] = []
+
+    for filename, findings, error in iter_scan_files(filenames, jobs, chunksize, cache, multiline, taint):
+        if error is not None:
+            errors.append((filename, error))
+            continue
+        for finding in findings:
+            vulnerabilities.append({'file': filename, **finding})
+
+    return vulnerabilities, errors
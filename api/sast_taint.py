@@ -0,0 +1,492 @@
+# sast_taint.py
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import re
+
+
+# Entradas controladas por el usuario (Express)
+SOURCE_PATTERN = re.compile(r"^(?:req|request)\.(?:query|params|body|headers|cookies)\b")
+
+# Métodos que ejecutan SQL (sqlite3, mysql/pg y los helpers de db-sqlite.js)
+SINK_METHODS = {
+    "all", "get", "run", "each", "exec", "query", "prepare",
+    "queryAsync", "runAsync",
+}
+
+# Métodos que agregan datos a un arreglo/objeto existente (ej. conditions.push(...))
+MUTATING_METHODS = {"push", "unshift", "concat", "set"}
+
+# Un string parece SQL si empieza con una palabra clave típica
+SQL_STRING_PATTERN = re.compile(
+    r"^\s*(?:SELECT|INSERT|UPDATE|DELETE|WHERE|AND|OR|ORDER\s+BY|FROM|VALUES|SET)\b",
+    re.IGNORECASE
+)
+
+CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "with", "return", "typeof"}
+DECLARATION_KEYWORDS = {"let", "const", "var", "export"}
+IGNORED_PREFIXES = {"await", "new", "typeof", "void", "async"}
+
+TAINT_DESCRIPTION = 'SQL Injection por flujo de datos'
+
+# Los espacios se consumen como prefijo de cada token para no iterar por ellos
+_TOKEN_RE = re.compile(r"""
+    [ \t\r\f\v]*
+  (?:
+    (?P<nl>\n)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<template>`(?:\\.|[^`\\])*`)
+  | (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")
+  | (?P<name>[A-Za-z_$][\w$]*(?:\??\.[A-Za-z_$][\w$]*)*)
+  | (?P<number>\d[\w.]*)
+  | (?P<op>=>|\+=|===|!==|==|!=|&&|\|\||\?\?|[^ \t\r\f\v])
+  )
+""", re.VERBOSE | re.DOTALL)
+
+_INTERPOLATION_RE = re.compile(r"\$\{([^}]*)\}")
+_NAME_RE = re.compile(r"[A-Za-z_$][\w$]*(?:\??\.[A-Za-z_$][\w$]*)*")
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    line: int
+
+
+@dataclass(frozen=True)
+class Taint:
+    """
+    Qué contiene un valor:
+    - sources: entradas del usuario de las que proviene (ej. 'req.query.name')
+    - params: índices de parámetros de la función actual que fluyen al valor
+    - sql: si incluye texto SQL
+    """
+    sources: FrozenSet[str] = frozenset()
+    params: FrozenSet[int] = frozenset()
+    sql: bool = False
+
+    def __or__(self, other: "Taint") -> "Taint":
+        return Taint(self.sources | other.sources, self.params | other.params, self.sql or other.sql)
+
+
+CLEAN = Taint()
+
+
+@dataclass
+class FunctionSummary:
+    """
+    Resumen memoizado de una función:
+    - returns: Taint del valor de retorno (params indica qué argumentos fluyen)
+    - sink_params: {índice de parámetro: línea del sink} para los parámetros
+      que llegan a una consulta SQL junto con texto SQL
+    """
+    returns: Taint = CLEAN
+    sink_params: Dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class _Unit:
+    """Una función del archivo (o el módulo completo) y su rango de tokens."""
+    name: Optional[str]
+    params: List[str]
+    start: int
+    end: int
+    parent: Optional[int]
+    children: List[Tuple[int, int]] = field(default_factory=list)
+    env: Dict[str, Taint] = field(default_factory=dict)
+
+
+def tokenize(source: str) -> List[Token]:
+    tokens = []
+    line = 1
+    for m in _TOKEN_RE.finditer(source):
+        kind = m.lastgroup
+        if kind == "nl":
+            line += 1
+            continue
+        text = m.group(kind)
+        if kind != "comment":
+            tokens.append(Token(kind, text, line))
+        if kind in ("comment", "template", "string"):
+            line += text.count("\n")
+    return tokens
+
+
+class TaintIndex:
+    """
+    Índice por archivo de asignaciones y concatenaciones, para seguir
+    consultas SQL armadas en varias sentencias, por ejemplo:
+
+        let q = "SELECT * FROM t WHERE name = '" + req.query.name + "'";
+        db.all(q);
+
+    El archivo se tokeniza una sola vez; cada función se analiza una sola
+    vez y su resumen (FunctionSummary) se memoiza, así que resolver un sink
+    o una llamada a un helper no vuelve a recorrer el archivo.
+    """
+
+    def __init__(self, source: str):
+        self.lines = source.split("\n")
+        self.tokens = tokenize(source)
+        self._match = self._match_brackets()
+        self.units = self._find_units()
+        self._by_name = {unit.name: i for i, unit in enumerate(self.units) if unit.name}
+        self._summaries: Dict[int, FunctionSummary] = {}
+        self._in_progress = set()
+        self.findings: List[dict] = []
+
+    # -- Estructura ----------------------------------------------------------
+
+    def _match_brackets(self) -> Dict[int, int]:
+        pairs = {"(": ")", "[": "]", "{": "}"}
+        match = {}
+        stack = []
+        for i, tok in enumerate(self.tokens):
+            if tok.kind != "op":
+                continue
+            if tok.text in pairs:
+                stack.append(i)
+            elif tok.text in (")", "]", "}"):
+                # Tolerante a código desbalanceado: se descarta hasta el par correcto
+                while stack and pairs[self.tokens[stack[-1]].text] != tok.text:
+                    stack.pop()
+                if stack:
+                    j = stack.pop()
+                    match[i] = j
+                    match[j] = i
+        return match
+
+    def _find_units(self) -> List[_Unit]:
+        tokens = self.tokens
+        units = [_Unit(name=None, params=[], start=0, end=len(tokens), parent=None)]
+        open_units = [0]
+
+        for i, tok in enumerate(tokens):
+            while len(open_units) > 1 and i >= units[open_units[-1]].end:
+                open_units.pop()
+            if tok.text != "{" or tok.kind != "op" or i not in self._match:
+                continue
+
+            header = self._function_header(i)
+            if header is None:
+                continue
+            name, params = header
+            end = self._match[i]
+            parent = open_units[-1]
+            units.append(_Unit(name=name, params=params, start=i + 1, end=end, parent=parent))
+            units[parent].children.append((i + 1, end))
+            open_units.append(len(units) - 1)
+
+        return units
+
+    def _function_header(self, brace: int) -> Optional[Tuple[Optional[str], List[str]]]:
+        """Si la llave abre el cuerpo de una función devuelve (nombre, parámetros)."""
+        tokens = self.tokens
+        if brace == 0:
+            return None
+        prev = tokens[brace - 1]
+
+        if prev.text == "=>":
+            k = brace - 2
+            if k >= 0 and tokens[k].kind == "name":
+                params, before = [tokens[k].text], k - 1
+            elif k >= 0 and tokens[k].text == ")" and k in self._match:
+                params, before = self._param_names(self._match[k], k), self._match[k] - 1
+            else:
+                return None
+            if before >= 0 and tokens[before].text == "async":
+                before -= 1
+            return self._assigned_name(before), params
+
+        if prev.text == ")" and brace - 1 in self._match:
+            open_paren = self._match[brace - 1]
+            params = self._param_names(open_paren, brace - 1)
+            before = open_paren - 1
+            if before < 0:
+                return None
+            head = tokens[before]
+            if head.text == "function":
+                return self._assigned_name(before - 1), params
+            if head.kind == "name" and head.text not in CONTROL_KEYWORDS and "." not in head.text:
+                # function nombre(...) { o método abreviado nombre(...) {
+                return head.text, params
+        return None
+
+    def _assigned_name(self, k: int) -> Optional[str]:
+        """Nombre en 'const NOMBRE = <función>' o 'NOMBRE: <función>'."""
+        tokens = self.tokens
+        if k >= 1 and tokens[k].text in ("=", ":") and tokens[k - 1].kind == "name":
+            return tokens[k - 1].text.split(".")[-1]
+        return None
+
+    def _param_names(self, open_paren: int, close_paren: int) -> List[str]:
+        params = []
+        depth = 0
+        expecting = True
+        for tok in self.tokens[open_paren + 1:close_paren]:
+            if tok.text in ("(", "[", "{"):
+                depth += 1
+            elif tok.text in (")", "]", "}"):
+                depth -= 1
+            elif tok.text == "," and depth == 0:
+                expecting = True
+            elif tok.kind == "name" and expecting and depth == 0:
+                params.append(tok.text)
+                expecting = False
+        return params
+
+    # -- Análisis ------------------------------------------------------------
+
+    def summary(self, name: str) -> Optional[FunctionSummary]:
+        """Resumen memoizado de la función con ese nombre, si existe en el archivo."""
+        index = self._by_name.get(name)
+        if index is None:
+            return None
+        return self._analyze(index)
+
+    def analyze(self) -> List[dict]:
+        """Analiza todas las funciones y devuelve los hallazgos ordenados por línea."""
+        for index in range(len(self.units)):
+            self._analyze(index)
+        seen = set()
+        findings = []
+        for finding in sorted(self.findings, key=lambda v: v['line']):
+            if finding['line'] not in seen:
+                seen.add(finding['line'])
+                findings.append(finding)
+        return findings
+
+    def _analyze(self, index: int) -> FunctionSummary:
+        if index in self._summaries:
+            return self._summaries[index]
+        if index in self._in_progress:
+            # Recursión: se usa un resumen vacío para cortar el ciclo
+            return FunctionSummary()
+        self._in_progress.add(index)
+
+        unit = self.units[index]
+        # El padre se analiza antes para que los closures vean sus variables
+        if unit.parent is not None:
+            self._analyze(unit.parent)
+        for i, param in enumerate(unit.params):
+            unit.env[param] = Taint(params=frozenset([i]))
+
+        summary = FunctionSummary()
+        for statement in self._statements(unit):
+            self._statement(unit, statement, summary)
+
+        self._in_progress.discard(index)
+        self._summaries[index] = summary
+        return summary
+
+    def _statements(self, unit: _Unit):
+        """Divide el cuerpo en sentencias, saltando los cuerpos de funciones anidadas."""
+        tokens = self.tokens
+        # Los cuerpos vacíos (start == end) no se saltan: no hay nada que saltar
+        skip = {start: end for start, end in unit.children if end > start}
+        current: List[int] = []
+        depth = 0
+        i = unit.start
+        while i < unit.end:
+            if i in skip:
+                i = skip[i]
+                continue
+            tok = tokens[i]
+
+            # '{' de objeto literal o desestructuración (no de bloque): se
+            # incluye completo en la sentencia actual
+            if (tok.text == "{" and tok.kind == "op" and depth <= 0 and i in self._match
+                    and current and (tokens[current[-1]].text in ("=", ":", ",", "return", "=>")
+                                     or all(tokens[c].text in DECLARATION_KEYWORDS for c in current))):
+                close = self._match[i]
+                while i <= close:
+                    if i in skip:
+                        i = skip[i]
+                        continue
+                    current.append(i)
+                    i += 1
+                continue
+
+            if tok.kind == "op" and tok.text in ("(", "["):
+                depth += 1
+            elif tok.kind == "op" and tok.text in (")", "]"):
+                depth -= 1
+
+            boundary = depth <= 0 and tok.kind == "op" and tok.text in (";", "{", "}")
+            # Inserción automática de ';': salto de línea sin operador pendiente
+            if (not boundary and current and depth <= 0 and tok.line != tokens[current[-1]].line
+                    and tokens[current[-1]].text not in ("=", "+", "+=", ",", "(", ".", "=>", "?", ":", "&&", "||")
+                    and tok.text not in ("+", ".", ")", "]", "?", ":", "&&", "||")):
+                yield current
+                current = []
+                depth = max(depth, 0)
+
+            if boundary:
+                if current:
+                    yield current
+                current = []
+                depth = 0
+            else:
+                current.append(i)
+            i += 1
+        if current:
+            yield current
+
+    def _lookup(self, unit: _Unit, name: str) -> Taint:
+        if SOURCE_PATTERN.match(name):
+            return Taint(sources=frozenset([name.replace("?.", ".")]))
+        base = name.split("?.")[0].split(".")[0]
+        scope: Optional[_Unit] = unit
+        while scope is not None:
+            if base in scope.env:
+                return scope.env[base]
+            scope = self.units[scope.parent] if scope.parent is not None else None
+        return CLEAN
+
+    def _split_args(self, open_paren: int) -> List[List[int]]:
+        close = self._match.get(open_paren)
+        if close is None:
+            return []
+        args: List[List[int]] = [[]]
+        depth = 0
+        for i in range(open_paren + 1, close):
+            text = self.tokens[i].text
+            if text in ("(", "[", "{"):
+                depth += 1
+            elif text in (")", "]", "}"):
+                depth -= 1
+            if text == "," and depth == 0:
+                args.append([])
+            else:
+                args[-1].append(i)
+        return [a for a in args if a]
+
+    def _eval(self, unit: _Unit, positions: List[int]) -> Taint:
+        """Taint de una expresión: unión de todas sus partes (concatenación)."""
+        tokens = self.tokens
+        result = CLEAN
+        skip_until = -1
+        for i in positions:
+            if i <= skip_until:
+                continue
+            tok = tokens[i]
+            if tok.kind == "string":
+                if SQL_STRING_PATTERN.match(tok.text[1:-1]):
+                    result = result | Taint(sql=True)
+            elif tok.kind == "template":
+                if SQL_STRING_PATTERN.match(tok.text[1:-1]):
+                    result = result | Taint(sql=True)
+                for expr in _INTERPOLATION_RE.findall(tok.text):
+                    for name in _NAME_RE.findall(expr):
+                        result = result | self._lookup(unit, name)
+            elif tok.kind == "name" and tok.text not in IGNORED_PREFIXES:
+                called = self._called_summary(i)
+                if called is not None:
+                    summary, open_paren = called
+                    args = self._split_args(open_paren)
+                    returns = summary.returns
+                    result = result | Taint(returns.sources, frozenset(), returns.sql)
+                    for p in returns.params:
+                        if p < len(args):
+                            result = result | self._eval(unit, args[p])
+                    skip_until = self._match.get(open_paren, open_paren)
+                else:
+                    result = result | self._lookup(unit, tok.text)
+        return result
+
+    def _called_summary(self, i: int) -> Optional[Tuple[FunctionSummary, int]]:
+        """Si tokens[i] es una llamada a una función del archivo, su resumen."""
+        tokens = self.tokens
+        if i + 1 >= len(tokens) or tokens[i + 1].text != "(" or "." in tokens[i].text:
+            return None
+        summary = self.summary(tokens[i].text)
+        if summary is None:
+            return None
+        return summary, i + 1
+
+    def _statement(self, unit: _Unit, statement: List[int], summary: FunctionSummary) -> None:
+        tokens = self.tokens
+        positions = statement
+        while positions and tokens[positions[0]].text in DECLARATION_KEYWORDS:
+            positions = positions[1:]
+        if not positions:
+            return
+        first = tokens[positions[0]]
+
+        # Asignación / declaración: x = expr, x += expr
+        if first.kind == "name" and len(positions) > 2 and tokens[positions[1]].text in ("=", "+="):
+            value = self._eval(unit, positions[2:])
+            target = first.text.split(".")[0]
+            if tokens[positions[1]].text == "+=" or "." in first.text:
+                value = value | self._lookup(unit, target)
+            unit.env[target] = value
+
+        # Desestructuración: const { a, b: c } = expr
+        elif first.text == "{" and positions[0] in self._match:
+            close = self._match[positions[0]]
+            rest = [p for p in positions if p > close]
+            if rest and tokens[rest[0]].text == "=":
+                value = self._eval(unit, rest[1:])
+                inner = [tokens[p] for p in positions if positions[0] < p < close]
+                for k, tok in enumerate(inner):
+                    nxt = inner[k + 1].text if k + 1 < len(inner) else ","
+                    if tok.kind == "name" and nxt in (",", "="):
+                        unit.env[tok.text] = value
+
+        elif first.text == "return":
+            summary.returns = summary.returns | self._eval(unit, positions[1:])
+
+        self._calls(unit, positions, summary)
+
+    def _calls(self, unit: _Unit, positions: List[int], summary: FunctionSummary) -> None:
+        """Sinks SQL, métodos que mutan arreglos y llamadas a helpers del archivo."""
+        tokens = self.tokens
+        for i in positions:
+            tok = tokens[i]
+            if tok.kind != "name" or i + 1 >= len(tokens) or tokens[i + 1].text != "(":
+                continue
+            args = self._split_args(i + 1)
+            method = tok.text.split(".")[-1]
+
+            if "." in tok.text and method in MUTATING_METHODS:
+                target = tok.text.split(".")[0]
+                value = CLEAN
+                for arg in args:
+                    value = value | self._eval(unit, arg)
+                unit.env[target] = self._lookup(unit, target) | value
+
+            elif "." in tok.text and method in SINK_METHODS and args:
+                value = self._eval(unit, args[0])
+                if value.sql and value.sources:
+                    self._report(tok.line)
+                if value.sql:
+                    for p in value.params:
+                        summary.sink_params.setdefault(p, tok.line)
+
+            elif "." not in tok.text:
+                called = self.summary(tok.text)
+                if called is None:
+                    continue
+                for p, _sink_line in called.sink_params.items():
+                    if p < len(args):
+                        value = self._eval(unit, args[p])
+                        if value.sources:
+                            self._report(tok.line)
+                        for q in value.params:
+                            summary.sink_params.setdefault(q, tok.line)
+
+    def _report(self, line: int) -> None:
+        self.findings.append({
+            'line': line,
+            'code': self.lines[line - 1].strip(),
+            'type': TAINT_DESCRIPTION,
+            'severity': 'CRITICAL',
+            'cwe': 'CWE-89'
+        })
+
+
+def analyze_taint(filename: str) -> List[dict]:
+    """Hallazgos de flujo de datos (fuente del usuario -> SQL concatenado -> sink)."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        source = f.read()
+    return TaintIndex(source).analyze()
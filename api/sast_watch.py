@@ -0,0 +1,294 @@
+# sast_watch.py
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from sast_reporters import REPORTERS
+from sast_scanner import (
+    DEFAULT_EXTENSIONS, DEFAULT_IGNORED_DIRS, _scan_one, is_ignored, iter_scan_files, iter_source_files,
+)
+
+
+# Máscara de eventos inotify (ver inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Tras el primer evento se espera un poco para agrupar ráfagas (ej. guardar
+# varios archivos a la vez o editores que escriben en dos pasos).
+DEBOUNCE_SECONDS = 0.05
+
+
+class PollingBackend:
+    """Detecta cambios comparando (mtime, tamaño) de cada archivo cada intervalo."""
+
+    name = "polling"
+
+    def __init__(self, targets: List[str], exclude: List[str], interval: float = 0.5):
+        self.targets = targets
+        self.exclude = exclude
+        self.interval = interval
+        self._stats = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        for filename in iter_source_files(self.targets, exclude=self.exclude):
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            stats[filename] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def wait(self) -> Set[str]:
+        """Bloquea hasta que haya cambios y devuelve las rutas afectadas."""
+        while True:
+            time.sleep(self.interval)
+            current = self._snapshot()
+            changed = {f for f, st in current.items() if self._stats.get(f) != st}
+            changed |= self._stats.keys() - current.keys()
+            self._stats = current
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyBackend:
+    """
+    Eventos del kernel vía inotify (Linux), con ctypes para no agregar
+    dependencias. Vigila cada directorio del árbol (inotify no es recursivo)
+    y agrega los directorios nuevos a medida que se crean.
+    """
+
+    name = "inotify"
+
+    def __init__(self, targets: List[str], exclude: List[str]):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify no está disponible en esta plataforma")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+
+        self.exclude = exclude
+        self._dirs: Dict[int, str] = {}
+        # Archivos sueltos pasados como objetivo: se vigila su directorio
+        self._only_files: Dict[str, Set[str]] = {}
+
+        for target in targets:
+            if os.path.isdir(target):
+                self._watch_tree(target)
+            elif os.path.isfile(target):
+                parent = os.path.dirname(target) or "."
+                self._only_files.setdefault(os.path.normpath(parent), set()).add(os.path.normpath(target))
+                self._add_watch(parent)
+            else:
+                raise OSError(f"inotify no admite patrones glob: {target}")
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = os.path.normpath(directory)
+
+    def _watch_tree(self, root: str) -> None:
+        for dirpath, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in DEFAULT_IGNORED_DIRS]
+            self._add_watch(dirpath)
+
+    def _read_events(self) -> Set[str]:
+        changed: Set[str] = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Se perdieron eventos: se informa el directorio completo
+                    changed.update(self._dirs.values())
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and name not in DEFAULT_IGNORED_DIRS:
+                        self._watch_tree(path)
+                        changed.update(iter_source_files([path], exclude=self.exclude))
+                    continue
+                only = self._only_files.get(directory)
+                if only is not None and os.path.normpath(path) not in only:
+                    continue
+                changed.add(os.path.normpath(path))
+
+    def wait(self) -> Set[str]:
+        while True:
+            select.select([self._fd], [], [])
+            time.sleep(DEBOUNCE_SECONDS)
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_backend(name: str, targets: List[str], exclude: List[str], interval: float):
+    """'auto' usa inotify si está disponible y si no cae a polling."""
+    if name in ("auto", "inotify"):
+        try:
+            return InotifyBackend(targets, exclude)
+        except (OSError, AttributeError):
+            if name == "inotify":
+                raise
+    return PollingBackend(targets, exclude, interval)
+
+
+class Watcher:
+    """
+    Modo watch: analiza el árbol una vez y después, por cada cambio,
+    vuelve a analizar solo los archivos modificados. Las reglas compiladas y
+    los hallazgos por archivo se mantienen en memoria, y los reportes se
+    reescriben solo cuando los hallazgos cambian.
+    """
+
+    def __init__(
+        self,
+        targets: List[str],
+        formats: List[str],
+        exclude: Optional[List[str]] = None,
+        multiline: bool = False,
+        taint: bool = False,
+        extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+    ):
+        self.targets = targets
+        self.formats = formats
+        self.exclude = exclude or []
+        self.multiline = multiline
+        self.taint = taint
+        self.extensions = extensions
+        self.results: Dict[str, List[dict]] = {}
+        for fmt in formats:
+            if fmt not in REPORTERS:
+                raise ValueError(f"Formato de reporte desconocido: {fmt}")
+        # Fragmento ya serializado de cada archivo por formato: (posición, texto)
+        self._fragments: Dict[str, Dict[str, Tuple[int, str]]] = {fmt: {} for fmt in formats}
+
+    def _wanted(self, filename: str) -> bool:
+        return filename.endswith(self.extensions) and not is_ignored(filename, DEFAULT_IGNORED_DIRS, self.exclude)
+
+    def _scan(self, filename: str) -> Optional[List[dict]]:
+        _, findings, error, _ = _scan_one(filename, self.multiline, self.taint)
+        return findings if error is None else None
+
+    def initial_scan(self, jobs: int = 1) -> List[Tuple[str, str]]:
+        """Análisis completo inicial (en paralelo si jobs > 1); devuelve los errores."""
+        errors = []
+        filenames = iter_source_files(self.targets, exclude=self.exclude)
+        for filename, findings, error in iter_scan_files(filenames, jobs=jobs, multiline=self.multiline,
+                                                         taint=self.taint):
+            if error is not None:
+                errors.append((filename, error))
+            else:
+                self.results[filename] = findings
+        self.write_reports()
+        return errors
+
+    @property
+    def total(self) -> int:
+        return sum(len(findings) for findings in self.results.values())
+
+    def update(self, changed: Iterable[str]) -> List[Tuple[str, int, Optional[float]]]:
+        """
+        Re-analiza los archivos cambiados. Devuelve (archivo, hallazgos,
+        latencia en segundos desde que se guardó) por cada archivo que cambió
+        de resultado; -1 hallazgos si el archivo se eliminó.
+        """
+        updates = []
+        dirty = False
+        for filename in sorted(changed):
+            if not self._wanted(filename):
+                continue
+            if not os.path.exists(filename):
+                if self.results.pop(filename, None) is not None:
+                    self._forget(filename)
+                    dirty = True
+                    updates.append((filename, -1, None))
+                continue
+
+            findings = self._scan(filename)
+            if findings is None or self.results.get(filename) == findings:
+                # Guardado sin cambios en los hallazgos: nada que reportar
+                continue
+            self.results[filename] = findings
+            self._forget(filename)
+            dirty = True
+            try:
+                saved_at = os.stat(filename).st_mtime
+            except OSError:
+                saved_at = None
+            updates.append((filename, len(findings), saved_at))
+
+        if dirty:
+            self.write_reports()
+
+        # La latencia se mide cuando los reportes ya están actualizados
+        now = time.time()
+        return [
+            (filename, count, None if saved_at is None else max(0.0, now - saved_at))
+            for filename, count, saved_at in updates
+        ]
+
+    def _forget(self, filename: str) -> None:
+        for fragments in self._fragments.values():
+            fragments.pop(filename, None)
+
+    def write_reports(self) -> None:
+        """
+        Actualiza los reportes de forma atómica (archivo temporal + rename).
+        Solo se serializan los archivos que cambiaron (o cuya numeración se
+        corrió); el resto reusa su fragmento ya generado.
+        """
+        for fmt in self.formats:
+            path, cls = REPORTERS[fmt]
+            tmp_path = path + ".tmp"
+            reporter = cls(tmp_path)
+            fragments = self._fragments[fmt]
+            offset = 0
+            for filename in sorted(self.results):
+                findings = self.results[filename]
+                fragment = fragments.get(filename)
+                if fragment is None or fragment[0] != offset:
+                    text = reporter.render([{'file': filename, **finding} for finding in findings], offset)
+                    fragment = fragments[filename] = (offset, text)
+                reporter.write_rendered(fragment[1], len(findings))
+                offset += len(findings)
+            reporter.close()
+            if reporter.count or not reporter.lazy:
+                os.replace(tmp_path, path)
+            elif os.path.exists(path):
+                # Sin hallazgos los reportes perezosos no existen (como en el modo normal)
+                os.remove(path)
@@ -0,0 +1,242 @@
+# schema_corrector.py
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+from sql_injection_corrector import CorrectionResult, FieldRule, MessageCode, ResultCache, SQLInjectionCorrector
+
+
+@dataclass
+class ObjectRule:
+    """
+    Sub-objeto de un payload JSON.
+    - name: clave del objeto dentro del padre (se ignora en los elementos de una lista)
+    - fields: reglas de sus claves (FieldRule, ObjectRule o ArrayRule)
+    - required: si el objeto es obligatorio
+    """
+    name: str
+    fields: List["Rule"] = field(default_factory=list)
+    required: bool = True
+
+
+@dataclass
+class ArrayRule:
+    """
+    Lista de un payload JSON.
+    - name: clave de la lista dentro del padre
+    - items: regla de cada elemento (FieldRule, ObjectRule o ArrayRule)
+    - max_items: límite de elementos; una lista más larga es inválida y no se recorre
+    - required: si la lista es obligatoria
+    """
+    name: str
+    items: "Rule"
+    max_items: Optional[int] = None
+    required: bool = True
+
+
+Rule = Union[FieldRule, ObjectRule, ArrayRule]
+
+# Tipos de nodo del esquema compilado
+_LEAF, _OBJECT, _ARRAY = range(3)
+
+
+class _Node(NamedTuple):
+    """
+    Regla compilada. Según kind se usa sanitize (hoja), steps/keys (objeto:
+    pares (clave, nodo) y claves conocidas) o items (lista).
+    """
+    kind: int
+    required: bool
+    # Código del resultado cuando el valor falta
+    missing_codes: int
+    # Hojas: max_length de la regla; listas: max_items
+    max_length: Optional[int]
+    sanitize: Optional[Callable[..., CorrectionResult]] = None
+    steps: Optional[List[tuple]] = None
+    keys: frozenset = frozenset()
+    items: Optional["_Node"] = None
+
+
+class PayloadResult(NamedTuple):
+    """
+    Resultado de sanitize_payload:
+    - value: el payload con los valores sanitizados (misma forma que el
+      original: las claves ausentes no aparecen, aunque sí en results)
+    - results: {ruta: CorrectionResult} de cada valor, ej. 'items[3].name'
+    """
+    value: Any
+    results: Dict[str, CorrectionResult]
+
+    @property
+    def is_valid(self) -> bool:
+        return all(result.is_valid for result in self.results.values())
+
+    def invalid_fields(self) -> List[str]:
+        return [path for path, result in self.results.items() if not result.is_valid]
+
+
+_NOT_AN_OBJECT = int(MessageCode.NOT_AN_OBJECT)
+_NOT_AN_ARRAY = int(MessageCode.NOT_AN_ARRAY)
+_TOO_MANY_ITEMS = int(MessageCode.TOO_MANY_ITEMS)
+_EXTRA_FIELD = int(MessageCode.EXTRA_FIELD)
+
+# Clave ausente en el objeto de entrada (distinta de un null explícito)
+_ABSENT = object()
+
+
+def _is_object(value: Any) -> bool:
+    # dict primero: es el caso de json.loads y cuesta menos que el isinstance
+    return type(value) is dict or isinstance(value, Mapping)
+
+
+class SchemaCorrector(SQLInjectionCorrector):
+    """
+    Corrector para payloads JSON anidados (objetos, listas y sub-esquemas
+    opcionales). El árbol de reglas se compila una vez en nodos y el payload
+    se recorre en una sola pasada con una pila explícita, sin recursión: la
+    pila crece con la profundidad del esquema y no con el tamaño de las
+    listas. Las hojas usan los mismos sanitizadores que sanitize_parameters,
+    que sigue disponible para las FieldRule del primer nivel.
+    """
+
+    def __init__(self, schema: List[Rule], cache: Optional[ResultCache] = None):
+        super().__init__([rule for rule in schema if isinstance(rule, FieldRule)], cache)
+        self._root = self._compile_schema(schema)
+
+    # -- Compilación ------------------------------------------------------------
+
+    def _leaf(self, rule: FieldRule) -> _Node:
+        plan = self._compile_rule(rule)
+        missing = plan.missing
+        return _Node(_LEAF, rule.required, missing.codes, missing.max_length, sanitize=plan.sanitize)
+
+    def _compile_schema(self, schema: List[Rule]) -> _Node:
+        """
+        Compila el árbol también sin recursión: cada objeto o lista se crea
+        con su lista de pasos vacía y se llena al sacarlo de la pila.
+        """
+        root = _Node(_OBJECT, True, int(MessageCode.REQUIRED_MISSING), None, steps=[],
+                     keys=frozenset(rule.name for rule in schema))
+        pending = [(schema, root.steps)]
+        while pending:
+            rules, steps = pending.pop()
+            for rule in rules:
+                node = self._node(rule, pending)
+                steps.append((rule.name, node))
+        return root
+
+    def _node(self, rule: Rule, pending: List[tuple]) -> _Node:
+        """Nodo de una regla; los hijos de objetos se agregan a pending."""
+        # Las listas de listas se resuelven acá mismo: una cadena, no un árbol
+        chain = []
+        while isinstance(rule, ArrayRule):
+            chain.append(rule)
+            rule = rule.items
+
+        if isinstance(rule, ObjectRule):
+            node = _Node(_OBJECT, rule.required, self._missing_codes(rule.required), None, steps=[],
+                         keys=frozenset(child.name for child in rule.fields))
+            pending.append((rule.fields, node.steps))
+        elif isinstance(rule, FieldRule):
+            node = self._leaf(rule)
+        else:
+            raise TypeError(f"Regla de esquema no soportada: {rule!r}")
+
+        for array in reversed(chain):
+            node = _Node(_ARRAY, array.required, self._missing_codes(array.required), array.max_items,
+                         items=node)
+        return node
+
+    @staticmethod
+    def _missing_codes(required: bool) -> int:
+        return int(MessageCode.REQUIRED_MISSING if required else MessageCode.OPTIONAL_MISSING)
+
+    # -- Recorrido -------------------------------------------------------------
+
+    def sanitize_payload(self, payload: Any) -> PayloadResult:
+        """
+        Sanitiza un payload anidado en una sola pasada. Cada valor queda en
+        results con su ruta ('cliente.email', 'items[0].sku'); las claves que
+        no están en el esquema se reportan como campos extra y se conservan,
+        igual que en sanitize_parameters. Una clave ausente se reporta como
+        faltante pero no se agrega a la salida (un null explícito sí se
+        conserva). Los objetos pueden ser cualquier Mapping (ej. OrderedDict
+        o lo que arme un object_hook); en la salida son dict.
+        """
+        results: Dict[str, CorrectionResult] = {}
+        root = self._root
+        if not _is_object(payload):
+            results[""] = CorrectionResult("", False, payload, None, _NOT_AN_OBJECT)
+            return PayloadResult(None, results)
+
+        value_out: Dict[str, Any] = {}
+
+        # Marcos de la pila: (es_objeto, iterador, valor original, contenedor
+        # de salida, prefijo de la ruta, nodo). Un objeto itera sus pasos
+        # (clave, nodo); una lista itera enumerate(elementos) y su nodo es el
+        # de los elementos.
+        stack = [(True, iter(root.steps), payload, value_out, "", root)]
+        while stack:
+            is_object, pending, source, out, prefix, parent = stack[-1]
+            step = next(pending, None)
+            if step is None:
+                stack.pop()
+                if is_object:
+                    self._extra_fields(source, parent.keys, out, prefix, results)
+                continue
+
+            absent = False
+            if is_object:
+                key, node = step
+                value = source.get(key, _ABSENT)
+                if value is _ABSENT:
+                    absent, value = True, None
+                path = prefix + key
+            else:
+                key, value = step
+                node = parent
+                path = f"{prefix}[{key}]"
+
+            kind = node.kind
+            if value is None:
+                results[path] = CorrectionResult(path, not node.required, None, None, node.missing_codes,
+                                                 node.max_length if kind == _LEAF else None)
+                sanitized = None
+            elif kind == _LEAF:
+                result = node.sanitize(value, path)
+                results[path] = result
+                sanitized = result.sanitized_value
+            elif kind == _OBJECT:
+                if not _is_object(value):
+                    results[path] = CorrectionResult(path, False, value, None, _NOT_AN_OBJECT)
+                    sanitized = None
+                else:
+                    sanitized = {}
+                    stack.append((True, iter(node.steps), value, sanitized, path + ".", node))
+            elif type(value) is not list:
+                results[path] = CorrectionResult(path, False, value, None, _NOT_AN_ARRAY)
+                sanitized = None
+            elif node.max_length is not None and len(value) > node.max_length:
+                results[path] = CorrectionResult(path, False, value, None, _TOO_MANY_ITEMS, node.max_length)
+                sanitized = None
+            else:
+                sanitized = []
+                stack.append((False, enumerate(value), value, sanitized, path, node.items))
+
+            if not is_object:
+                out.append(sanitized)
+            elif not absent:
+                out[key] = sanitized
+
+        return PayloadResult(value_out, results)
+
+    @staticmethod
+    def _extra_fields(value: Dict[str, Any], keys: frozenset, out: Dict[str, Any], prefix: str,
+                      results: Dict[str, CorrectionResult]) -> None:
+        """Claves fuera del esquema: se conservan y se reportan (como en sanitize_parameters)."""
+        for extra in value.keys() - keys:
+            extra_value = value[extra]
+            path = prefix + extra
+            results[path] = CorrectionResult(path, True, extra_value, extra_value, _EXTRA_FIELD)
+            out[extra] = extra_value
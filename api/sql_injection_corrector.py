@@ -1,8 +1,19 @@
 # sql_injection_corrector.py
 
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from enum import IntFlag
+from functools import partial
+from bisect import bisect_right
+from itertools import accumulate, compress
+from operator import ne
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 import re
+import sys
+import threading
+
+from corrector_metrics import CorrectorMetrics
 
 
 @dataclass
@@ -22,17 +33,509 @@ class FieldRule:
     required: bool = True
 
 
-@dataclass
-class CorrectionResult:
+class MessageCode(IntFlag):
     """
-    Resultado de la corrección de un campo.
+    Código de cada mensaje de CorrectionResult, combinables como máscara de
+    bits. El orden de los bits es el orden en que se agregan los mensajes.
     """
+    TRIMMED = 1
+    SQL_META_REMOVED = 2
+    SQL_KEYWORDS_REMOVED = 4
+    TRUNCATED = 8
+    DISALLOWED_CHARS_REMOVED = 16
+    EMPTY_REQUIRED = 32
+    EMAIL_TRUNCATED = 64
+    INVALID_EMAIL = 128
+    EMAIL_DISALLOWED_CHARS_REMOVED = 256
+    NOT_AN_INT = 512
+    REQUIRED_MISSING = 1024
+    OPTIONAL_MISSING = 2048
+    EXTRA_FIELD = 4096
+    NOT_AN_OBJECT = 8192
+    NOT_AN_ARRAY = 16384
+    TOO_MANY_ITEMS = 32768
+    TOO_LONG = 65536
+    DISALLOWED_CHARS = 131072
+
+
+MESSAGE_TEXT = {
+    MessageCode.TRIMMED: "Se recortaron espacios al inicio/fin.",
+    MessageCode.SQL_META_REMOVED: "Se eliminaron secuencias típicas de SQL (--, /*, */, ;).",
+    MessageCode.SQL_KEYWORDS_REMOVED: "Se eliminaron palabras clave SQL sospechosas (UNION, SELECT, DROP, etc.).",
+    MessageCode.TRUNCATED: "Se recortó a {max_length} caracteres.",
+    MessageCode.DISALLOWED_CHARS_REMOVED: "Se eliminaron caracteres no permitidos por el patrón del campo.",
+    MessageCode.EMPTY_REQUIRED: "Tras la sanitización el valor quedó vacío en un campo requerido.",
+    MessageCode.EMAIL_TRUNCATED: "Se recortó el correo a {max_length} caracteres.",
+    MessageCode.INVALID_EMAIL: "Formato de correo inválido.",
+    MessageCode.EMAIL_DISALLOWED_CHARS_REMOVED: "Se eliminaron caracteres no permitidos en el correo.",
+    MessageCode.NOT_AN_INT: "No se pudo convertir el valor a entero.",
+    MessageCode.REQUIRED_MISSING: "Campo requerido ausente.",
+    MessageCode.OPTIONAL_MISSING: "Campo opcional ausente.",
+    MessageCode.EXTRA_FIELD: "Campo no definido en reglas; no se aplicó sanitización específica.",
+    MessageCode.NOT_AN_OBJECT: "Se esperaba un objeto.",
+    MessageCode.NOT_AN_ARRAY: "Se esperaba una lista.",
+    # En los resultados de listas max_length lleva el máximo de elementos
+    MessageCode.TOO_MANY_ITEMS: "La lista supera el máximo de {max_length} elementos.",
+    # Validación sin modificar el valor (query_builder.py)
+    MessageCode.TOO_LONG: "El valor supera el máximo de {max_length} caracteres.",
+    MessageCode.DISALLOWED_CHARS: "El valor tiene caracteres no permitidos por el patrón del campo.",
+}
+
+# Códigos que implican que el valor se modificó (changes_made)
+CHANGE_CODES = (
+    MessageCode.TRIMMED | MessageCode.SQL_META_REMOVED | MessageCode.SQL_KEYWORDS_REMOVED
+    | MessageCode.TRUNCATED | MessageCode.DISALLOWED_CHARS_REMOVED
+    | MessageCode.EMAIL_TRUNCATED | MessageCode.EMAIL_DISALLOWED_CHARS_REMOVED
+)
+
+
+# (código, texto, lleva {max_length}) en el orden de los mensajes
+_MESSAGE_ORDER = [(int(code), text, "{" in text) for code, text in MESSAGE_TEXT.items()]
+_CHANGE_CODES = int(CHANGE_CODES)
+_EXTRA_FIELD = int(MessageCode.EXTRA_FIELD)
+_MISSING_CODES = int(MessageCode.REQUIRED_MISSING | MessageCode.OPTIONAL_MISSING)
+
+# Paso del sanitizador que produce cada código (para la instrumentación)
+_STEP_CODES = [
+    (int(MessageCode.TRIMMED), "strip"),
+    (int(MessageCode.SQL_META_REMOVED), "meta"),
+    (int(MessageCode.SQL_KEYWORDS_REMOVED), "keywords"),
+    (int(MessageCode.TRUNCATED | MessageCode.EMAIL_TRUNCATED), "truncate"),
+    (int(MessageCode.DISALLOWED_CHARS_REMOVED | MessageCode.EMAIL_DISALLOWED_CHARS_REMOVED), "whitelist"),
+    (int(MessageCode.INVALID_EMAIL), "format"),
+    (int(MessageCode.NOT_AN_INT), "int"),
+]
+
+
+def render_messages(codes: int, max_length: Optional[int] = None) -> List[str]:
+    """Convierte una máscara de MessageCode en los mensajes de CorrectionResult."""
+    if not codes:
+        return []
+    return [
+        text.format(max_length=max_length) if templated else text
+        for code, text, templated in _MESSAGE_ORDER
+        if codes & code
+    ]
+
+
+class _CorrectionFields(NamedTuple):
     field: str
     is_valid: bool
     original_value: Any
     sanitized_value: Any
-    changes_made: bool
-    messages: List[str]
+    codes: int = 0
+    # Largo usado en los mensajes de recorte
+    max_length: Optional[int] = None
+    # (changes_made, messages) dados explícitamente con el constructor anterior
+    legacy: Optional[Tuple[bool, Tuple[str, ...]]] = None
+
+
+def _restore_result(values: Tuple[Any, ...]) -> "CorrectionResult":
+    return tuple.__new__(CorrectionResult, values)
+
+
+class CorrectionResult(_CorrectionFields):
+    """
+    Resultado de la corrección de un campo. Es inmutable y compacto: los
+    mensajes se guardan como máscara de MessageCode (codes) y el texto se
+    genera solo si se consulta messages. changes_made y messages se
+    mantienen como atributos de solo lectura por compatibilidad.
+
+    El constructor anterior sigue funcionando, por posición o por nombre:
+    CorrectionResult(field, is_valid, original, sanitized, changes_made=...,
+    messages=[...]); esos valores se devuelven tal cual. Dos resultados son
+    iguales solo si ambos son CorrectionResult con los mismos campos (no se
+    comparan con tuplas). dataclasses.asdict ya no aplica: usar to_dict().
+    """
+    __slots__ = ()
+
+    def __new__(cls, field: str, is_valid: bool, original_value: Any, sanitized_value: Any,
+                codes: Any = 0, max_length: Any = None, changes_made: Optional[bool] = None,
+                messages: Optional[Sequence[str]] = None) -> "CorrectionResult":
+        if changes_made is None and messages is None and type(codes) is int:
+            return tuple.__new__(cls, (field, is_valid, original_value, sanitized_value, codes, max_length, None))
+        if type(codes) is bool or isinstance(max_length, list):
+            # Forma posicional anterior: (..., changes_made, messages)
+            changes_made, messages, codes, max_length = codes, max_length, 0, None
+        legacy = (bool(changes_made), tuple(messages or ()))
+        return tuple.__new__(cls, (field, is_valid, original_value, sanitized_value, codes, max_length, legacy))
+
+    def __reduce__(self):
+        return _restore_result, (tuple(self),)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and tuple.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    @property
+    def changes_made(self) -> bool:
+        if self.legacy is not None:
+            return self.legacy[0]
+        return bool(self.codes & _CHANGE_CODES)
+
+    @property
+    def messages(self) -> List[str]:
+        """Mensajes legibles; cada consulta devuelve una lista nueva."""
+        if self.legacy is not None:
+            return list(self.legacy[1])
+        return render_messages(self.codes, self.max_length)
+
+    @property
+    def message_codes(self) -> MessageCode:
+        return MessageCode(self.codes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación con los atributos del resultado original (ej. para JSON)."""
+        return {"field": self.field, "is_valid": self.is_valid, "original_value": self.original_value,
+                "sanitized_value": self.sanitized_value, "changes_made": self.changes_made,
+                "messages": self.messages}
+
+
+@dataclass
+class ColumnResult:
+    """
+    Resultado de sanitizar una columna completa (un campo de muchos registros):
+    - values: valores sanitizados (None donde el valor es inválido o falta)
+    - validity: bitmap de validez, un bit por fila (1 = válido)
+    - codes: máscara de MessageCode por fila
+    - originals: valores originales, como los reporta CorrectionResult
+    """
+    field: str
+    values: List[Any]
+    validity: bytearray
+    codes: array
+    originals: List[Any]
+    max_length: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def is_valid(self, i: int) -> bool:
+        return bool(self.validity[i >> 3] & (1 << (i & 7)))
+
+    @property
+    def invalid_rows(self) -> List[int]:
+        # Solo se miran los bytes del bitmap que no están completos
+        count = len(self.values)
+        return [
+            i
+            for index, byte in enumerate(self.validity) if byte != 0xff
+            for i in range(index * 8, min(index * 8 + 8, count)) if not byte >> (i & 7) & 1
+        ]
+
+    def messages(self, i: int) -> List[str]:
+        return render_messages(self.codes[i], self.max_length)
+
+    def result(self, i: int) -> CorrectionResult:
+        """La fila i como CorrectionResult (compatibilidad con sanitize_parameters)."""
+        return CorrectionResult(self.field, self.is_valid(i), self.originals[i], self.values[i],
+                                self.codes[i], self.max_length)
+
+
+def _validity_bitmap(count: int, invalid: Iterable[int]) -> bytearray:
+    """Bitmap con todas las filas válidas salvo las indicadas."""
+    bitmap = bytearray(b"\xff") * ((count + 7) // 8)
+    for i in invalid:
+        bitmap[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+    return bitmap
+
+
+def _combine_codes(count: int, flags: List[tuple]) -> array:
+    """
+    Combina los resultados por etapa, [(código, índices de las filas
+    afectadas)], en una máscara por fila.
+    """
+    codes = array("I", [0]) * count
+    for code, rows in flags:
+        code = int(code)
+        for i in rows:
+            codes[i] |= code
+    return codes
+
+
+def _changed_rows(before: List[Any], after: List[Any]) -> List[int]:
+    return list(compress(range(len(before)), map(ne, before, after)))
+
+
+# Separador de valores al procesar una columna como un solo string: no es
+# carácter de palabra (\b se comporta como en el borde del valor) y no forma
+# parte de ninguna secuencia de _sql_meta_pattern.
+_COLUMN_SEPARATOR = "\x00"
+
+
+def _keyword_candidates(values: List[str], joined: str) -> Optional[List[int]]:
+    """
+    Índices de los valores de la columna unida (sin separadores dentro de
+    los valores) que pueden contener una palabra clave, según el mismo
+    prefiltro que may_have_sql_keyword. None si hay que revisar todos.
+    """
+    if not joined.isascii() and _CASEFOLD_EXCEPTIONS.search(joined):
+        # 'İ' cambia de largo con lower(): las posiciones dejarían de coincidir
+        return None
+    positions = [m.start() for m in _KEYWORD_LITERALS.finditer(joined.lower())]
+    if not positions:
+        return []
+    # ends[k]: posición del separador que cierra el valor k
+    ends = list(accumulate(map((1).__add__, map(len, values))))
+    return sorted({bisect_right(ends, position) for position in positions})
+
+
+# Palabras clave que se eliminan de los strings
+SQL_KEYWORDS = ("union", "select", "insert", "update", "delete", "drop", "truncate", "shutdown",
+                "information_schema")
+
+# Patrón sencillo para correos (opcional, solo ejemplo)
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Búsqueda de las palabras clave como substrings sobre el texto en minúsculas:
+# sin IGNORECASE la regex puede saltar al primer carácter candidato en C.
+_KEYWORD_LITERALS = re.compile("|".join(SQL_KEYWORDS))
+
+# Caracteres no ASCII que IGNORECASE iguala a una letra ASCII pero cuyo
+# lower() no es esa letra (İ -> i̇, ı, ſ): con ellos no alcanza con buscar
+# la palabra clave en s.lower().
+_CASEFOLD_EXCEPTIONS = re.compile("[\u0130\u0131\u017f]")
+
+
+def has_sql_meta(s: str) -> bool:
+    """Equivale a _sql_meta_pattern.search(s), con búsquedas de substrings en C."""
+    return ";" in s or "--" in s or "/*" in s or "*/" in s
+
+
+def may_have_sql_keyword(s: str) -> bool:
+    """
+    Prefiltro de _sql_keywords_pattern: si devuelve False la regex seguro no
+    encuentra nada; si devuelve True hay que confirmarlo con la regex
+    (la palabra puede estar dentro de otra, ej. 'reselected').
+    """
+    if _KEYWORD_LITERALS.search(s.lower()):
+        return True
+    return not s.isascii() and _CASEFOLD_EXCEPTIONS.search(s) is not None
+
+
+# allowed_pattern que es una sola clase de caracteres: [...], [...]+, \w, \d+, etc.
+_SIMPLE_CLASS = re.compile(r"^(?:\[(?P<negated>\^?)(?P<body>(?:\\.|[^\\\]])+)\]|(?P<escape>\\[wWdDsS]))\+?$")
+
+
+def negated_class(pattern: re.Pattern) -> Optional[re.Pattern]:
+    """
+    Si allowed_pattern es una sola clase de caracteres, devuelve la clase
+    complementaria (con los mismos flags), que encuentra los caracteres a
+    eliminar. Para cualquier otro patrón devuelve None.
+    """
+    if not isinstance(pattern.pattern, str):
+        return None
+    m = _SIMPLE_CLASS.match(pattern.pattern)
+    if m is None:
+        return None
+    if m.group("escape"):
+        return re.compile("[^" + m.group("escape") + "]", pattern.flags)
+    if m.group("negated"):
+        body = m.group("body")
+        # [^^a] -> [\^a]: un '^' inicial volvería a negar la clase
+        return re.compile("[" + ("\\" + body if body.startswith("^") else body) + "]", pattern.flags)
+    return re.compile("[^" + m.group("body") + "]", pattern.flags)
+
+
+def compile_whitelist(pattern: re.Pattern, keep: str = "") -> Callable[[str], str]:
+    """
+    Devuelve una función equivalente a
+        "".join(ch for ch in s if pattern.match(ch))
+    pero que filtra en C:
+    - strings ASCII: bytes.translate con la lista de caracteres ASCII que el
+      patrón rechaza (se calcula una vez probando el patrón con cada uno, así
+      que es exacta para cualquier patrón)
+    - resto: la clase complementaria con sub() si el patrón es una sola clase
+      de caracteres; si no, el filtro original carácter por carácter
+    keep: caracteres que se conservan siempre (ej. el separador de columnas).
+    """
+    match = pattern.match
+    delete = bytes(code for code in range(128) if not match(chr(code)) and chr(code) not in keep)
+    negated = negated_class(pattern)
+
+    if negated is not None:
+        if keep:
+            negated = re.compile("(?![" + re.escape(keep) + "])(?:" + negated.pattern + ")", negated.flags)
+        remove = negated.sub
+
+        def filter_other(s: str) -> str:
+            return remove("", s)
+    else:
+        def filter_other(s: str) -> str:
+            return "".join(ch for ch in s if ch in keep or match(ch))
+
+    if not delete:
+        # El patrón acepta todo ASCII: solo hay que mirar los strings no ASCII
+        def filter_allowed(s: str) -> str:
+            return s if s.isascii() else filter_other(s)
+    else:
+        def filter_allowed(s: str) -> str:
+            if s.isascii():
+                return s.encode("ascii").translate(None, delete).decode("ascii")
+            return filter_other(s)
+
+    return filter_allowed
+
+
+def disallowed_check(pattern: re.Pattern) -> Callable[[str], bool]:
+    """Función que indica si un valor tiene caracteres que el patrón no permite."""
+    negated = negated_class(pattern)
+    if negated is not None:
+        # search() recorre en C y sobre un valor limpio no crea nada
+        search = negated.search
+        return lambda s: search(s) is not None
+    keep_allowed = compile_whitelist(pattern)
+    return lambda s: keep_allowed(s) != s
+
+
+class FieldPlan(NamedTuple):
+    """
+    Regla compilada: el sanitizador ya especializado para el tipo del campo,
+    con sus patrones y límites enlazados, listo para llamar por cada valor.
+    """
+    name: str
+    required: bool
+    sanitize: Callable[..., CorrectionResult]
+    sanitize_column: Callable[[Sequence[Any]], "ColumnResult"]
+    # Resultado (compartido, es inmutable) para cuando el campo no viene
+    missing: CorrectionResult
+    # True si el valor pasaría sin cambios y válido (ver validate_parameters)
+    is_clean: Callable[[Any], bool]
+
+
+class Verdict(NamedTuple):
+    """
+    Resultado de validate_parameters: ok, y si no, el primer campo que no
+    pasó y los MessageCode que le habría asignado sanitize_parameters.
+    """
+    ok: bool
+    field: Optional[str] = None
+    codes: int = 0
+
+
+# Se devuelve siempre el mismo objeto cuando la solicitud está limpia
+VERDICT_OK = Verdict(True)
+
+
+class ResultCache:
+    """
+    Caché LRU en memoria de resultados de sanitización, compartible entre
+    hilos y entre correctores.
+    - Clave: (sanitizador compilado de la regla, valor), así que el mismo
+      valor en dos reglas distintas no comparte entrada.
+    - Límite por cantidad de entradas y/o por bytes (estimados con
+      sys.getsizeof de los valores); se desaloja la entrada menos usada.
+    - Se guarda el CorrectionResult mismo: es inmutable, así que cada
+      acierto lo devuelve sin copiarlo y nadie puede alterar la entrada.
+    - Contadores de aciertos/fallos/desalojos para medir el beneficio.
+    """
+
+    # Costo fijo aproximado de una entrada (tupla, clave y nodo del dict)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None,
+                 max_value_length: int = 256):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("Se requiere max_entries o max_bytes")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Los valores largos (ej. descripciones) casi nunca se repiten:
+        # guardarlos solo desalojaría entradas útiles.
+        self.max_value_length = max_value_length
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[CorrectionResult, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CorrectionResult]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, entry: CorrectionResult, size: int) -> None:
+        with self._lock:
+            self._insert(key, entry, size)
+
+    def _insert(self, key: Hashable, entry: CorrectionResult, size: int) -> None:
+        """Inserta y desaloja hasta respetar los límites (con el lock tomado)."""
+        entries = self._entries
+        previous = entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        entries[key] = (entry, size)
+        self.bytes += size
+        max_entries = len(entries) if self.max_entries is None else self.max_entries
+        max_bytes = self.bytes if self.max_bytes is None else self.max_bytes
+        while len(entries) > max_entries or (self.bytes > max_bytes and entries):
+            _, (_, evicted_size) = entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def wrap(self, sanitize: Callable[..., CorrectionResult], field_name: str) -> Callable[..., CorrectionResult]:
+        """
+        Envuelve el sanitizador de una regla. Solo se guardan valores str
+        cortos: con otros tipos, valores iguales pueden tener str() distinto
+        (ej. Decimal('1.0') == Decimal('1.00')) y el resultado no sería el mismo.
+        """
+        # get/put en línea: en un acierto la consulta debe costar bastante
+        # menos que volver a sanitizar
+        entries, lock = self._entries, self._lock
+        move_to_end, insert = entries.move_to_end, self._insert
+        max_value_length = self.max_value_length
+        overhead = self.ENTRY_OVERHEAD
+        getsizeof = sys.getsizeof
+
+        def sanitize_cached(value: Any, field: str = field_name) -> CorrectionResult:
+            if type(value) is not str or len(value) > max_value_length:
+                return sanitize(value, field)
+            # La clave es la regla y el valor, no la ruta del llamador: las
+            # hojas anidadas de SchemaCorrector (ej. "items[3].name") comparten
+            # la entrada de su regla. El resultado guardado lleva el nombre de
+            # la regla y se renombra al devolverlo si hace falta.
+            key = (sanitize, value)
+            with lock:
+                item = entries.get(key)
+                if item is not None:
+                    move_to_end(key)
+                    self.hits += 1
+            if item is None:
+                result = sanitize(value, field_name)
+                size = overhead + getsizeof(value) + getsizeof(result.sanitized_value)
+                with lock:
+                    self.misses += 1
+                    insert(key, result, size)
+            else:
+                result = item[0]
+            return result if field == field_name else result._replace(field=field)
+
+        # Para medir el sanitizador en sí (corrector_metrics)
+        sanitize_cached.__wrapped__ = sanitize
+        return sanitize_cached
 
 
 class SQLInjectionCorrector:
@@ -45,18 +548,35 @@ class SQLInjectionCorrector:
       - Restringir caracteres a un patrón permitido (whitelist).
     """
 
-    def __init__(self, field_rules: List[FieldRule]):
+    def __init__(self, field_rules: List[FieldRule], cache: Optional[ResultCache] = None,
+                 metrics: Optional[CorrectorMetrics] = None):
         self.field_rules = {rule.name: rule for rule in field_rules}
+        # Caché opcional de resultados por (regla, valor) para campos string y email
+        self.cache = cache
+        # Instrumentación opcional (corrector_metrics.py); sin ella no se
+        # agrega ningún costo porque los sanitizadores no se envuelven
+        self.metrics = metrics
 
         # Patrones genéricos de cosas que queremos evitar
         self._sql_meta_pattern = re.compile(r"(--|/\*|\*/|;)", re.IGNORECASE)
         self._sql_keywords_pattern = re.compile(
-            r"\b(union|select|insert|update|delete|drop|truncate|shutdown|information_schema)\b",
+            r"\b(" + "|".join(SQL_KEYWORDS) + r")\b",
             re.IGNORECASE
         )
 
-        # Patrón sencillo para correos (opcional, solo ejemplo)
-        self._email_pattern = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+        self._email_pattern = EMAIL_PATTERN
+
+        # Cada regla se compila una sola vez; si se modifica field_rules
+        # después de crear el corrector hay que crear uno nuevo.
+        self._plans = [self._compile_rule(rule) for rule in self.field_rules.values()]
+        if metrics is not None:
+            self.sanitize_parameters = metrics.instrument(
+                self.sanitize_parameters,
+                [(plan.name, getattr(plan.sanitize, "__wrapped__", plan.sanitize),
+                  self._compile_steps(self.field_rules[plan.name]))
+                 for plan in self._plans],
+                _STEP_CODES, _CHANGE_CODES, _MISSING_CODES,
+            )
 
     def sanitize_parameters(self, params: Dict[str, Any]) -> Dict[str, CorrectionResult]:
         """
@@ -64,182 +584,467 @@ class SQLInjectionCorrector:
         y devuelve un diccionario {campo: CorrectionResult}.
         """
         results: Dict[str, CorrectionResult] = {}
+        get = params.get
 
-        for field_name, rule in self.field_rules.items():
-            original_value = params.get(field_name, None)
+        for field_name, _, sanitize, _, missing, _ in self._plans:
+            original_value = get(field_name)
 
             if original_value is None:
-                if rule.required:
-                    results[field_name] = CorrectionResult(
-                        field=field_name,
-                        is_valid=False,
-                        original_value=None,
-                        sanitized_value=None,
-                        changes_made=False,
-                        messages=["Campo requerido ausente."]
-                    )
-                else:
-                    results[field_name] = CorrectionResult(
-                        field=field_name,
-                        is_valid=True,
-                        original_value=None,
-                        sanitized_value=None,
-                        changes_made=False,
-                        messages=["Campo opcional ausente."]
-                    )
+                results[field_name] = missing
                 continue
 
-            # Enrutamos según el tipo
-            if rule.field_type == "int":
-                result = self._sanitize_int(field_name, original_value, rule)
-            elif rule.field_type == "email":
-                result = self._sanitize_email(field_name, original_value, rule)
-            else:
-                # Por defecto tratamos como string
-                result = self._sanitize_string(field_name, original_value, rule)
-
-            results[field_name] = result
+            results[field_name] = sanitize(original_value)
 
         # También podemos reportar campos extra que no están en las reglas
         for extra_field in params.keys() - self.field_rules.keys():
             value = params[extra_field]
-            results[extra_field] = CorrectionResult(
-                field=extra_field,
-                is_valid=True,
-                original_value=value,
-                sanitized_value=value,
-                changes_made=False,
-                messages=["Campo no definido en reglas; no se aplicó sanitización específica."]
-            )
+            results[extra_field] = CorrectionResult(extra_field, True, value, value, _EXTRA_FIELD)
 
         return results
 
-    def _sanitize_string(self, field: str, value: Any, rule: FieldRule) -> CorrectionResult:
-        messages: List[str] = []
-        changes_made = False
-
-        # Convertimos a string
-        s = str(value)
-        original = s
-
-        # Recortar espacios extremos
-        s = s.strip()
-        if s != original:
-            changes_made = True
-            messages.append("Se recortaron espacios al inicio/fin.")
-
-        # Eliminar secuencias típicas de SQL (--, /*, */, ;)
-        if self._sql_meta_pattern.search(s):
-            s = self._sql_meta_pattern.sub("", s)
-            changes_made = True
-            messages.append("Se eliminaron secuencias típicas de SQL (--, /*, */, ;).")
-
-        # Eliminar palabras clave SQL si aparecen completas (opcional, depende del uso).
-        # En muchos casos no quieres permitir que el usuario escriba 'SELECT' o 'DROP'.
-        if self._sql_keywords_pattern.search(s):
-            s = self._sql_keywords_pattern.sub("", s)
-            changes_made = True
-            messages.append("Se eliminaron palabras clave SQL sospechosas (UNION, SELECT, DROP, etc.).")
-
-        # Limitar longitud
-        if rule.max_length is not None and len(s) > rule.max_length:
-            s = s[:rule.max_length]
-            changes_made = True
-            messages.append(f"Se recortó a {rule.max_length} caracteres.")
-
-        # Aplicar patrón de caracteres permitidos (whitelist)
+    def validate_parameters(self, params: Dict[str, Any]) -> Verdict:
+        """
+        Solo valida, para el camino crítico (ej. un middleware): indica si
+        sanitize_parameters devolvería todos los campos válidos y sin cambios.
+        Por cada valor se hacen solo las comprobaciones (sin armar el valor
+        limpio), se detiene en el primer campo que no pasa y no mira los
+        campos extra. Si todo está limpio devuelve siempre VERDICT_OK; solo
+        al fallar se sanitiza ese campo para informar los códigos.
+        """
+        get = params.get
+        for field_name, required, sanitize, _, missing, is_clean in self._plans:
+            value = get(field_name)
+            if value is None:
+                if required:
+                    return Verdict(False, field_name, missing.codes)
+                continue
+            if not is_clean(value):
+                return Verdict(False, field_name, sanitize(value).codes)
+        return VERDICT_OK
+
+    def sanitize_columns(self, columns: Dict[str, Sequence[Any]]) -> Dict[str, ColumnResult]:
+        """
+        Sanitiza por columnas: {campo: valores de todas las filas}. Cada
+        columna se procesa de una vez, sin crear un dict ni un CorrectionResult
+        por fila. Un campo de las reglas sin columna se trata como ausente en
+        todas las filas; las columnas que no están en las reglas se ignoran.
+        Todas las columnas deben tener el mismo largo.
+        """
+        count = len(next(iter(columns.values()))) if columns else 0
+        results: Dict[str, ColumnResult] = {}
+        for plan in self._plans:
+            values = columns.get(plan.name)
+            if values is None:
+                values = [None] * count
+            results[plan.name] = plan.sanitize_column(values)
+        return results
+
+    def sanitize_batch(self, records: Iterable[Dict[str, Any]]) -> Dict[str, ColumnResult]:
+        """Como sanitize_columns, pero a partir de registros (ej. filas de un CSV)."""
+        records = records if isinstance(records, list) else list(records)
+        columns = {
+            plan.name: [record.get(plan.name) for record in records]
+            for plan in self._plans
+        }
+        return self.sanitize_columns(columns)
+
+    # -- Compilación de reglas -------------------------------------------------
+
+    def _compile_rule(self, rule: FieldRule) -> FieldPlan:
+        """Resuelve el tipo del campo una vez, en lugar de en cada llamada."""
+        if rule.field_type == "int":
+            sanitize, sanitize_column = self._compile_int(rule), self._compile_int_column(rule)
+            is_clean = self._compile_int_check(rule, sanitize)
+        elif rule.field_type == "email":
+            sanitize, sanitize_column = self._compile_email(rule), self._compile_email_column(rule)
+            is_clean = self._compile_email_check(rule)
+        else:
+            # Por defecto tratamos como string
+            sanitize, sanitize_column = self._compile_string(rule), self._compile_string_column(rule)
+            is_clean = self._compile_string_check(rule)
+        # Convertir un int cuesta menos que consultar la caché
+        if self.cache is not None and rule.field_type != "int":
+            sanitize = self.cache.wrap(sanitize, rule.name)
+        missing = CorrectionResult(rule.name, not rule.required, None, None,
+                                   int(MessageCode.REQUIRED_MISSING if rule.required else MessageCode.OPTIONAL_MISSING),
+                                   None if rule.field_type == "int" else rule.max_length)
+        return FieldPlan(rule.name, rule.required, sanitize, sanitize_column, missing, is_clean)
+
+    def _compile_steps(self, rule: FieldRule) -> List[Tuple[str, Callable[[Any], Any]]]:
+        """
+        Los pasos del sanitizador de la regla como funciones separadas, para
+        medir cuánto cuesta cada uno. Un paso que invalida el valor devuelve
+        None (o lanza ValueError) y corta la cadena.
+        """
+        remove_meta = partial(self._sql_meta_pattern.sub, "")
+        remove_keywords = partial(self._sql_keywords_pattern.sub, "")
+        max_length = rule.max_length
+        keep_allowed = compile_whitelist(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+
+        def truncate(s: str) -> str:
+            return s if max_length is None else s[:max_length]
+
+        def whitelist(s: str) -> str:
+            return s if keep_allowed is None else keep_allowed(s)
+
+        if rule.field_type == "int":
+            return [("int", lambda value: int(str(value).strip()))]
+        if rule.field_type == "email":
+            email_match = self._email_pattern.match
+            return [
+                ("strip", lambda value: str(value).strip()),
+                ("truncate", truncate),
+                ("format", lambda s: s if email_match(s) else None),
+                ("whitelist", whitelist),
+            ]
+        return [
+            ("strip", lambda value: str(value).strip()),
+            ("meta", lambda s: remove_meta(s) if has_sql_meta(s) else s),
+            ("keywords", lambda s: remove_keywords(s) if may_have_sql_keyword(s) else s),
+            ("truncate", truncate),
+            ("whitelist", whitelist),
+        ]
+
+    def _compile_string(self, rule: FieldRule) -> Callable[..., CorrectionResult]:
+        # Todo lo que se consulta por valor queda enlazado como variable local
+        remove_meta = self._sql_meta_pattern.sub
+        remove_keywords = self._sql_keywords_pattern.subn
+        max_length = rule.max_length
+        keep_allowed = compile_whitelist(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+        required = rule.required
+        # Códigos como int: combinar IntFlag con | es mucho más lento
+        trimmed, meta_removed, keywords_removed, truncated, disallowed_removed, empty_required = map(int, (
+            MessageCode.TRIMMED, MessageCode.SQL_META_REMOVED, MessageCode.SQL_KEYWORDS_REMOVED,
+            MessageCode.TRUNCATED, MessageCode.DISALLOWED_CHARS_REMOVED, MessageCode.EMPTY_REQUIRED,
+        ))
+
+        def sanitize(value: Any, field: str = rule.name) -> CorrectionResult:
+            codes = 0
+
+            # Convertimos a string
+            s = str(value)
+            original = s
+
+            # Recortar espacios extremos
+            s = s.strip()
+            if s != original:
+                codes = trimmed
+
+            # Eliminar secuencias típicas de SQL (--, /*, */, ;)
+            if has_sql_meta(s):
+                s = remove_meta("", s)
+                codes |= meta_removed
+
+            # Eliminar palabras clave SQL si aparecen completas. El prefiltro
+            # descarta casi todos los valores; subn busca y reemplaza en una
+            # sola pasada en lugar de search + sub.
+            if may_have_sql_keyword(s):
+                s, count = remove_keywords("", s)
+                if count:
+                    codes |= keywords_removed
+
+            # Limitar longitud
+            if max_length is not None and len(s) > max_length:
+                s = s[:max_length]
+                codes |= truncated
+
+            # Aplicar patrón de caracteres permitidos (whitelist)
+            if keep_allowed is not None:
+                # Aquí asumimos que allowed_pattern describe caracteres válidos (ej. r'[a-zA-Z0-9_@\.]+')
+                filtered = keep_allowed(s)
+                if filtered != s:
+                    s = filtered
+                    codes |= disallowed_removed
+
+            # Si después de limpiar queda vacío y el campo es requerido
+            if required and s == "":
+                return CorrectionResult(field, False, original, s, codes | empty_required, max_length)
+
+            return CorrectionResult(field, True, original, s, codes, max_length)
+
+        return sanitize
+
+    def _compile_int(self, rule: FieldRule) -> Callable[..., CorrectionResult]:
+        not_an_int = int(MessageCode.NOT_AN_INT)
+
+        def sanitize(value: Any, field: str = rule.name) -> CorrectionResult:
+            try:
+                # Intentamos castear directamente a int
+                ivalue = int(str(value).strip())
+            except ValueError:
+                return CorrectionResult(field, False, value, None, not_an_int)
+
+            # Por simplicidad, asumimos que cualquier int es válido.
+            return CorrectionResult(field, True, value, ivalue)
+
+        return sanitize
+
+    def _compile_email(self, rule: FieldRule) -> Callable[..., CorrectionResult]:
+        email_match = self._email_pattern.match
+        max_length = rule.max_length
+        keep_allowed = compile_whitelist(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+        email_truncated, invalid_email, disallowed_removed = map(int, (
+            MessageCode.EMAIL_TRUNCATED, MessageCode.INVALID_EMAIL, MessageCode.EMAIL_DISALLOWED_CHARS_REMOVED,
+        ))
+
+        def sanitize(value: Any, field: str = rule.name) -> CorrectionResult:
+            codes = 0
+
+            s = str(value).strip()
+            original = s
+
+            if max_length is not None and len(s) > max_length:
+                s = s[:max_length]
+                codes = email_truncated
+
+            # Validar formato básico de correo
+            if not email_match(s):
+                return CorrectionResult(field, False, original, None, codes | invalid_email, max_length)
+
+            # Opcional: aplicar patrón allowed_pattern
+            if keep_allowed is not None:
+                filtered = keep_allowed(s)
+                if filtered != s:
+                    s = filtered
+                    codes |= disallowed_removed
+
+            return CorrectionResult(field, True, original, s, codes, max_length)
+
+        return sanitize
+
+    # -- Validación ----------------------------------------------------------------
+    # Un valor está limpio si ninguna etapa del sanitizador lo cambiaría. Se
+    # usan las mismas comprobaciones en C que el sanitizador, pero sin
+    # construir el valor limpio ni el resultado, y se corta en la primera.
+
+    def _disallowed_check(self, rule: FieldRule) -> Optional[Callable[[str], bool]]:
+        return disallowed_check(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+
+    def _compile_string_check(self, rule: FieldRule) -> Callable[[Any], bool]:
+        find_keyword = self._sql_keywords_pattern.search
+        has_disallowed = self._disallowed_check(rule)
+        max_length = rule.max_length
+        required = rule.required
+
+        def is_clean(value: Any) -> bool:
+            s = value if type(value) is str else str(value)
+            if s.strip() != s or (required and not s):
+                return False
+            if max_length is not None and len(s) > max_length:
+                return False
+            if has_sql_meta(s) or (may_have_sql_keyword(s) and find_keyword(s) is not None):
+                return False
+            return has_disallowed is None or not has_disallowed(s)
+
+        return is_clean
+
+    def _compile_email_check(self, rule: FieldRule) -> Callable[[Any], bool]:
+        # _email_pattern negado: encuentra algo solo si el correo es inválido,
+        # así un correo válido no crea un objeto Match
+        email = self._email_pattern.pattern.lstrip("^").rstrip("$")
+        invalid_email = re.compile(r"\A(?!" + email + r"\Z)").search
+        has_disallowed = self._disallowed_check(rule)
+        max_length = rule.max_length
+
+        def is_clean(value: Any) -> bool:
+            # Los espacios extremos se quitan sin reportarlo como cambio
+            s = (value if type(value) is str else str(value)).strip()
+            if max_length is not None and len(s) > max_length:
+                return False
+            if invalid_email(s) is not None:
+                return False
+            return has_disallowed is None or not has_disallowed(s)
+
+        return is_clean
+
+    def _compile_int_check(self, rule: FieldRule, sanitize: Callable[..., CorrectionResult]) -> Callable[[Any], bool]:
+        # Lo que acepta int(): espacios, signo, dígitos Unicode y '_' entre dígitos
+        not_an_int = re.compile(r"\A(?!\s*[+-]?\d+(?:_\d+)*\s*\Z)").search
+
+        def is_clean(value: Any) -> bool:
+            if type(value) is int:
+                return True
+            if type(value) is str:
+                return not_an_int(value) is None
+            return sanitize(value).is_valid
+
+        return is_clean
+
+    # -- Columnas ----------------------------------------------------------------
+    # Mismo resultado que aplicar el sanitizador de la fila a cada valor, pero
+    # cada etapa recorre la columna completa en C (map, join/split, sub sobre
+    # la columna unida) y solo las filas afectadas se tocan en Python.
+
+    def _compile_string_column(self, rule: FieldRule) -> Callable[[Sequence[Any]], ColumnResult]:
+        remove_meta = partial(self._sql_meta_pattern.sub, "")
+        remove_keywords = partial(self._sql_keywords_pattern.sub, "")
+        max_length = rule.max_length
+        keep_allowed = keep_allowed_joined = None
         if rule.allowed_pattern is not None:
-            # Mantener solo los caracteres que cumplen el patrón a nivel global
-            # Aquí asumimos que allowed_pattern describe caracteres válidos (ej. r'[a-zA-Z0-9_@\.]+')
-            allowed_chars_pattern = rule.allowed_pattern
-
-            filtered = "".join(ch for ch in s if allowed_chars_pattern.match(ch))
-            if filtered != s:
-                s = filtered
-                changes_made = True
-                messages.append("Se eliminaron caracteres no permitidos por el patrón del campo.")
-
-        is_valid = True
-
-        # Si después de limpiar queda vacío y el campo es requerido
-        if rule.required and s == "":
-            is_valid = False
-            messages.append("Tras la sanitización el valor quedó vacío en un campo requerido.")
-
-        return CorrectionResult(
-            field=field,
-            is_valid=is_valid,
-            original_value=original,
-            sanitized_value=s,
-            changes_made=changes_made,
-            messages=messages
-        )
+            keep_allowed = compile_whitelist(rule.allowed_pattern)
+            # Sobre la columna unida el separador no se debe borrar
+            keep_allowed_joined = compile_whitelist(rule.allowed_pattern, keep=_COLUMN_SEPARATOR)
+        required = rule.required
+        missing_code = MessageCode.REQUIRED_MISSING if required else MessageCode.OPTIONAL_MISSING
+        sep = _COLUMN_SEPARATOR
+
+        def apply_to_column(remove_joined, remove_value, values: List[str], joined: str):
+            """
+            Aplica la etapa a cada valor: con una sola llamada sobre la columna
+            unida si ningún valor contiene el separador, o valor por valor.
+            """
+            if joined.count(sep) == len(values) - 1:
+                joined = remove_joined(joined)
+                return joined.split(sep), joined
+            values = list(map(remove_value, values))
+            return values, sep.join(values)
+
+        def sanitize_column(values: Sequence[Any]) -> ColumnResult:
+            count = len(values)
+            missing = [i for i, v in enumerate(values) if v is None] if None in values else []
+            originals = list(map(str, values))
+            current = list(map(str.strip, originals))
+            flags = [(MessageCode.TRIMMED, _changed_rows(originals, current))]
+
+            joined = sep.join(current)
+            if has_sql_meta(joined):
+                cleaned, joined = apply_to_column(remove_meta, remove_meta, current, joined)
+                flags.append((MessageCode.SQL_META_REMOVED, _changed_rows(current, cleaned)))
+                current = cleaned
+
+            # La regex de palabras clave es la etapa más cara: sobre la columna
+            # unida solo se buscan candidatos y la regex se aplica a esos valores
+            separable = joined.count(sep) == count - 1
+            candidates = _keyword_candidates(current, joined) if separable else None
+            if candidates is None:
+                cleaned, joined = apply_to_column(remove_keywords, remove_keywords, current, joined)
+                flags.append((MessageCode.SQL_KEYWORDS_REMOVED, _changed_rows(current, cleaned)))
+                current = cleaned
+            elif candidates:
+                removed = []
+                for i in candidates:
+                    value = remove_keywords(current[i])
+                    if value != current[i]:
+                        if not removed:
+                            current = list(current)
+                        current[i] = value
+                        removed.append(i)
+                flags.append((MessageCode.SQL_KEYWORDS_REMOVED, removed))
+
+            if max_length is not None and count and max(map(len, current)) > max_length:
+                truncated = [i for i, v in enumerate(current) if len(v) > max_length]
+                flags.append((MessageCode.TRUNCATED, truncated))
+                current = list(current)
+                for i in truncated:
+                    current[i] = current[i][:max_length]
+
+            if keep_allowed is not None:
+                filtered, _ = apply_to_column(keep_allowed_joined, keep_allowed, current, sep.join(current))
+                flags.append((MessageCode.DISALLOWED_CHARS_REMOVED, _changed_rows(current, filtered)))
+                current = filtered
+
+            invalid: List[int] = []
+            if required:
+                invalid = [i for i, value in enumerate(current) if not value]
+                flags.append((MessageCode.EMPTY_REQUIRED, invalid))
+
+            codes = _combine_codes(count, flags)
+            for i in missing:
+                codes[i] = missing_code
+                current[i] = originals[i] = None
+            if required and missing:
+                invalid = sorted(set(invalid).union(missing))
+
+            return ColumnResult(rule.name, current, _validity_bitmap(count, invalid), codes, originals,
+                                max_length)
+
+        return sanitize_column
+
+    def _compile_int_column(self, rule: FieldRule) -> Callable[[Sequence[Any]], ColumnResult]:
+        required = rule.required
+        missing_code = MessageCode.REQUIRED_MISSING if required else MessageCode.OPTIONAL_MISSING
+
+        def sanitize_column(values: Sequence[Any]) -> ColumnResult:
+            count = len(values)
+            missing = [i for i, v in enumerate(values) if v is None] if None in values else []
+            stripped = list(map(str.strip, map(str, values)))
+            for i in missing:
+                stripped[i] = "0"
+
+            bad: List[int] = []
+            try:
+                # Caso común: toda la columna convierte sin errores
+                converted: List[Any] = list(map(int, stripped))
+            except ValueError:
+                converted = []
+                for i, text in enumerate(stripped):
+                    try:
+                        converted.append(int(text))
+                    except ValueError:
+                        converted.append(None)
+                        bad.append(i)
+
+            codes = array("I", [0]) * count
+            for i in bad:
+                codes[i] = MessageCode.NOT_AN_INT
+            for i in missing:
+                codes[i] = missing_code
+                converted[i] = None
+            invalid = sorted(bad + missing) if required else bad
+
+            return ColumnResult(rule.name, converted, _validity_bitmap(count, invalid), codes, list(values))
+
+        return sanitize_column
+
+    def _compile_email_column(self, rule: FieldRule) -> Callable[[Sequence[Any]], ColumnResult]:
+        email_match = self._email_pattern.match
+        max_length = rule.max_length
+        keep_allowed = compile_whitelist(rule.allowed_pattern) if rule.allowed_pattern is not None else None
+        required = rule.required
+        missing_code = MessageCode.REQUIRED_MISSING if required else MessageCode.OPTIONAL_MISSING
+
+        def sanitize_column(values: Sequence[Any]) -> ColumnResult:
+            count = len(values)
+            missing = [i for i, v in enumerate(values) if v is None] if None in values else []
+            originals = list(map(str.strip, map(str, values)))
+            current = list(originals)
+            flags = []
+
+            if max_length is not None and count and max(map(len, current)) > max_length:
+                flags.append((MessageCode.EMAIL_TRUNCATED, [i for i, v in enumerate(current) if len(v) > max_length]))
+                current = [v[:max_length] for v in current]
+
+            invalid = [i for i, m in enumerate(map(email_match, current)) if m is None]
+            flags.append((MessageCode.INVALID_EMAIL, invalid))
+
+            if keep_allowed is not None:
+                filtered = list(map(keep_allowed, current))
+                # A los correos inválidos no se les aplica el patrón
+                changed = set(_changed_rows(current, filtered)).difference(invalid)
+                flags.append((MessageCode.EMAIL_DISALLOWED_CHARS_REMOVED, changed))
+                current = filtered
+
+            codes = _combine_codes(count, flags)
+            for i in invalid:
+                current[i] = None
+            if missing:
+                for i in missing:
+                    codes[i] = missing_code
+                    current[i] = originals[i] = None
+                invalid = sorted(set(invalid).difference(missing).union(missing if required else ()))
+
+            return ColumnResult(rule.name, current, _validity_bitmap(count, invalid), codes, originals,
+                                max_length)
+
+        return sanitize_column
+
+    # Compatibilidad: sanitizan un valor suelto compilando la regla al vuelo
+
+    def _sanitize_string(self, field: str, value: Any, rule: FieldRule) -> CorrectionResult:
+        return self._compile_string(rule)(value, field)
 
     def _sanitize_int(self, field: str, value: Any, rule: FieldRule) -> CorrectionResult:
-        messages: List[str] = []
-        original = value
-        changes_made = False
-
-        try:
-            # Intentamos castear directamente a int
-            ivalue = int(str(value).strip())
-        except ValueError:
-            return CorrectionResult(
-                field=field,
-                is_valid=False,
-                original_value=original,
-                sanitized_value=None,
-                changes_made=False,
-                messages=["No se pudo convertir el valor a entero."]
-            )
-          
-        # Por simplicidad, asumimos que cualquier int es válido.
-        return CorrectionResult(
-            field=field,
-            is_valid=True,
-            original_value=original,
-            sanitized_value=ivalue,
-            changes_made=changes_made,
-            messages=messages
-        )
+        return self._compile_int(rule)(value, field)
 
     def _sanitize_email(self, field: str, value: Any, rule: FieldRule) -> CorrectionResult:
-        messages: List[str] = []
-        changes_made = False
-
-        s = str(value).strip()
-        original = s
-
-        if rule.max_length is not None and len(s) > rule.max_length:
-            s = s[:rule.max_length]
-            changes_made = True
-            messages.append(f"Se recortó el correo a {rule.max_length} caracteres.")
-
-        # Validar formato básico de correo
-        if not self._email_pattern.match(s):
-            return CorrectionResult(
-                field=field,
-                is_valid=False,
-                original_value=original,
-                sanitized_value=None,
-                changes_made=changes_made,
-                messages=messages + ["Formato de correo inválido."]
-            )
-
-        # Opcional: aplicar patrón allowed_pattern 
-        if rule.allowed_pattern is not None:
-            allowed_chars_pattern = rule.allowed_pattern
-            filtered = "".join(ch for ch in s if allowed_chars_pattern.match(ch))
-            if filtered != s:
-                s = filtered
-                changes_made = True
-                messages.append("Se eliminaron caracteres no permitidos en el correo.")
-
-        return CorrectionResult(
-            field=field,
-            is_valid=True,
-            original_value=original,
-            sanitized_value=s,
-            changes_made=changes_made,
-            messages=messages
-        )
+        return self._compile_email(rule)(value, field)
